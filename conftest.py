@@ -0,0 +1,46 @@
+import os
+import threading
+
+import numpy as np
+import pytest
+
+# Корень репозитория в sys.path: тесты импортируют модули как src.*
+# Клиенты OpenAI/Groq создаются при импорте и требуют ключ; в тестах к API не обращаемся
+for key in ("OPENAI_API_KEY", "GROQ_API_KEY"):
+    os.environ.setdefault(key, "test")
+
+
+class FakeOutput:
+    """Stands in for AudioOutput: pulls attached streams in real time and keeps what was played."""
+
+    def __init__(self, sample_rate: int = 24000, channels: int = 1, block_duration: float = 0.02):
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.block_duration = block_duration
+        self.played = bytearray()
+        self._block = bytearray(int(block_duration * sample_rate) * channels * 2)
+        self._closed = threading.Event()
+
+    def attach(self, source, priority: int = 0, volume: float = 1.0) -> 'FakeOutput':
+        threading.Thread(target=self._pull, args=(source,), daemon=True).start()
+        return self
+
+    def _pull(self, source):
+        while not self._closed.wait(self.block_duration):
+            source.fill(memoryview(self._block))
+            self.played += self._block
+
+    def samples(self) -> np.ndarray:
+        """Everything played so far with the silence between blocks left out."""
+        samples = np.frombuffer(bytes(self.played), dtype=np.int16)
+        return samples[samples != 0]
+
+    def cancel(self):
+        self._closed.set()
+
+
+@pytest.fixture
+def fake_output():
+    output = FakeOutput()
+    yield output
+    output.cancel()
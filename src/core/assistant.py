@@ -1,143 +1,270 @@
+import asyncio
+import concurrent.futures
 import time
-import numpy as np
+from typing import Optional
+
+from src.core.audio_source import AudioSource
+from src.core.barge_in import BargeInMonitor
+from src.core.filler import FillerScheduler
 from src.core.mic_loop import AudioRecorder
-from src.modules.audio.stt import BaseSTT, WhisperSTT, UzbekVoiceSTT
+from src.modules.audio.output import audio_output
+from src.modules.audio.stt import BaseSTT, WhisperSTT, UzbekVoiceSTT, ChunkedHTTPSTT, HedgedSTT, STTEngine
 from src.modules.audio.tts import BaseTTS, AzureTTS, WhisperTTS
-from src.modules.intelligence.llm import BaseLLM, OpenAIGPT, GroqLLM, openai_client
-import pygame.mixer as player
-import playsound
+from src.modules.audio.tts_cache import CachedTTS
+from src.modules.audio.tts_pipeline import TTSPipeline
+from src.modules.intelligence.llm import (BaseLLM, ChatCompletionLLM, OpenAIGPT, GroqLLM, CachedLLM, MODEL,
+                                          openai_client, async_openai_client, groq_client)
+from src.modules.intelligence.router import RouterLLM
 from src.modules.vision.eye_controller import MechanicalEyes
 from src.modules.vision.scenes import wakeup
+from src.modules.web_interface.static.api import register_stats_source
 
 eye = MechanicalEyes
 
-player.init()
-player.music.load("core/audio_files/think.mp3")
+GREETING = "core/audio_files/gretting.mp3"
+# Декодируются при старте, чтобы первое воспроизведение не ждало ffmpeg
+CLIPS = [GREETING, "core/audio_files/draw1.mp3", "core/audio_files/draw2.mp3"]
 
 
 class Assistant(AudioRecorder):
-    def __init__(self, stt: BaseSTT, llm: BaseLLM, tts: BaseTTS):
-        super().__init__()
+    def __init__(self, stt: BaseSTT, llm: BaseLLM, tts: BaseTTS, source: Optional[AudioSource] = None):
+        super().__init__(source)
         self.stt = stt
         self.llm = llm
         self.tts = tts
+        self.stt_engine = STTEngine(stt)
+        self.tts_pipeline = TTSPipeline(tts)
+        self.filler = FillerScheduler()
+        self.tts.on_audio_start = self.filler.audio_ready
+        audio_output().preload(CLIPS)
 
     def voice_recording(self):
-        frames = []
-        is_first_iter = 1
         is_recording = 0
-        start_recording_time = time.perf_counter()
-        last_activity_time = start_recording_time
+        start_recording_time = None  # время первого кадра после начала ожидания
+        stt_stream = None
+        self.audio_buffer.reset()
+        self._drop_queued_audio()
 
         print("Начало записи...")
 
         while True:
-            if is_recording:
-                audio_frame = self.recorder.read()
-                frames.append(np.array(audio_frame, dtype=np.int16))
-
-                activity = self.cobra.process(audio_frame)
-                current_time = time.perf_counter()
+            # Время кадра по аудио, а не по часам: очередь не искажает паузы
+            audio_frame, frame_time = self.capture.read_timestamped()
+            self.audio_buffer.write(audio_frame)
+            if start_recording_time is None:
+                start_recording_time = frame_time
 
-                if activity >= self.STOP_THRESHOLD:
-                    # Refresh timer if voice still active
-                    last_activity_time = current_time
+            if is_recording:
+                # Провайдер получает аудио, пока пользователь еще говорит
+                samples = self.audio_buffer.latest(len(audio_frame))
+                stt_stream.feed(samples)
+                activity = self._vad(audio_frame)
 
-                if current_time - last_activity_time > self.SILENCE_DURATION:
+                if self.endpointer.update(activity, samples, frame_time):
                     #   =========================================
                     #   Send and Transcribe
                     #   =========================================
                     start_time = time.perf_counter()
-                    # player.music.play()
+                    # Если ответ задержится, тишину заполнит короткий звук
+                    self.filler.start()
                     print("Запись остановлена (тишина)")
-                    self._save_audio(frames)
-                    transcribed_text = self.stt.transcribe(self.output_file)
+                    audio = self._utterance_audio()
+                    transcribed_text = self._transcribe(stt_stream, audio)
+                    stt_stream = None
                     print(transcribed_text)
-                    self.recorder.stop()
-                    for chunk_response in self.llm.generate_response(transcribed_text):
-                        print("Chunk sent: ", chunk_response)
-                        # player.music.stop()
-                        print("Full time: ", time.perf_counter() - start_time, "sec")
-                        self.tts.synthesize(chunk_response)
-                        print("play end")
-                    self.recorder.start()
+                    self._save_audio(audio)
+
+                    barged_in = bool(transcribed_text) and self._respond(transcribed_text, start_time)
+                    self.filler.finish()
+                    if barged_in:
+                        # Пользователь перебил - его фраза уже в буфере, пишем дальше
+                        stt_stream = self._begin_utterance(self.BARGE_IN_FRAMES * self.porcupine.frame_length)
+                        continue
+
+                    # Пока говорили сами, слушать было некому - отбрасываем накопленное
+                    self._drop_queued_audio()
+                    if self.capture.overruns:
+                        print("Capture overruns:", self.capture.overruns)
+                    self.audio_buffer.reset()
                     is_recording = 0
-                    start_recording_time = time.perf_counter()
+                    start_recording_time = None
             else:
-                if time.perf_counter() - start_recording_time > self.MAX_RECORDING_TIME:
+                if frame_time - start_recording_time > self.MAX_RECORDING_TIME:
                     print("Session end. Say Arif to speak again")
+                    print("Energy gate:", self.energy_gate.stats())
+                    print("Fillers:", self.filler.stats())
+                    if hasattr(self.tts, "stats"):
+                        print("TTS cache:", self.tts.stats())
+                    print("TTS pipeline:", self.tts_pipeline.stats())
+                    self.llm.reset_session()
                     break
-                # Инициализация фреймов при первой итерации
-                if is_first_iter:
-                    frames = [
-                        np.array(self.recorder.read(), dtype=np.int16)
-                        for _ in range(int(self.porcupine.sample_rate / self.porcupine.frame_length))
-                    ]
-                    is_first_iter = 0
-
-                # Чтение новых фреймов и удаление старых
-                audio_frame = self.recorder.read()
-                frames.append(np.array(audio_frame, dtype=np.int16))
-                frames.pop(0)
 
                 # Проверка на детекцию голоса
-                if self.cobra.process(audio_frame) >= self.STOP_THRESHOLD:
+                activity = self._vad(audio_frame)
+                if activity >= self.STOP_THRESHOLD:
                     print("voice activity detected.")
-                    last_activity_time = time.perf_counter()
+                    # Фраза начинается с pre-roll, чтобы не обрезать первое слово
+                    stt_stream = self._begin_utterance(self.PREROLL_DURATION * self.sample_rate)
+                    self.endpointer.update(activity, self.audio_buffer.latest(len(audio_frame)), frame_time)
                     is_recording = 1
-                    is_first_iter = 1
                     print("Начало записи...")
 
+    def _drop_queued_audio(self):
+        # Запись с файла ждала нас, а не звучала в комнате: из нее ничего не выбрасываем
+        if self.recorder.realtime:
+            self.capture.queue.clear()
+
+    def _begin_utterance(self, preroll: int):
+        self.endpointer.reset()
+        self.audio_buffer.mark(preroll)
+        stt_stream = self.stt.open_stream(self.sample_rate, self.channels)
+        stt_stream.feed(self.audio_buffer.utterance())
+        return stt_stream
+
+    def _transcribe(self, stt_stream, audio):
+        stt_future = self.stt_engine.finish(stt_stream, audio)
+        # Пока идет распознавание, поднимаем соединение с LLM
+        self.stt_engine.runner.submit(asyncio.to_thread(self.llm.warm_up))
+        try:
+            return stt_future.result()
+        except (asyncio.TimeoutError, concurrent.futures.TimeoutError):
+            print("STT не ответил вовремя")
+        except Exception as e:
+            # Ошибка провайдера не должна останавливать цикл: считаем, что фразы не было
+            print(f"Ошибка распознавания: {e!r}")
+        return None
+
+    def _respond(self, transcribed_text: str, start_time: float) -> bool:
+        """Speaks the answer; returns True if the user barged in."""
+        monitor = None
+        if self.BARGE_IN:
+            self.audio_buffer.reset()
+            monitor = BargeInMonitor(
+                self.capture, self.cobra, self.audio_buffer,
+                self.BARGE_IN_THRESHOLD, self.BARGE_IN_FRAMES, self._on_barge_in
+            )
+            monitor.start()
+
+        responses = self.llm.generate_response(transcribed_text)
+        cached = getattr(self.llm, "last_hit", None)
+        if cached is not None and cached.audio_path:
+            # Готовая озвучка: ответ звучит без обращения к LLM и TTS
+            print("Full time: ", time.perf_counter() - start_time, "sec")
+            self.tts.play_file(cached.audio_path)
+            responses = []
+        # Следующее предложение синтезируется, пока звучит текущее
+        self.tts_pipeline.begin()
+        try:
+            for chunk_response in responses:
+                if self.tts_pipeline.cancelled:
+                    break
+                print("Chunk sent: ", chunk_response, time.perf_counter() - start_time, "sec")
+                self.tts_pipeline.submit(chunk_response)
+        finally:
+            # Закрываем генератор: поток LLM обрывается, частичный ответ попадает в историю
+            if hasattr(responses, "close"):
+                responses.close()
+            self.tts_pipeline.finish()
+            print("play end")
+
+        if monitor and monitor.stop():
+            print("Barge-in: пользователь перебил ответ")
+            return True
+        return False
+
+    def _on_barge_in(self):
+        self.tts_pipeline.cancel()
+        self.tts.stop()
+        self.llm.cancel()
+
     def run(self, context, TalkState):
-        self.recorder.start()
+        self.capture.start()
+        # Соединение с STT поднимается в фоне, пока ждем wake word
+        self.stt.warm_up()
         try:
             print("Начало прослушивания... ")
             while True:
-                audio_frame = self.recorder.read()
-                keyword_index = self.porcupine.process(audio_frame)
+                audio_frame = self.capture.read()
+                # Porcupine видит и тихие кадры прямо перед громким: мягкое начало слова не срезается
+                keyword_index = -1
+                for frame in self.energy_gate.open_frames(audio_frame):
+                    keyword_index = self.porcupine.process(frame)
+                    if keyword_index >= 0:
+                        break
                 if keyword_index == 0:
+                    # Приветствие звучит одновременно с анимацией глаз
+                    greeting = audio_output().play(GREETING)
                     wakeup()
                     context.set_state(TalkState())
-                    playsound.playsound("core/audio_files/gretting.mp3")
+                    greeting.wait()
                     print("Salom dostim! Qanday yordam kerak?")
 
                     self.voice_recording()
+                    self.energy_gate.reset_lookback()
 
         except KeyboardInterrupt:
             print("Остановка...")
+        except EOFError:
+            print("Источник аудио закончился")
         finally:
             self._cleanup()
 
+    def _cleanup(self):
+        super()._cleanup()
+        # Закрываем пул соединений STT, пока цикл событий еще работает
+        self.stt.close()
+
     @classmethod
-    def create(cls, stt_type: str, llm_type: str, tts_type: str) -> 'Assistant':
+    def create(cls, stt_type: str, llm_type: str, tts_type: str,
+               source: Optional[AudioSource] = None) -> 'Assistant':
         stt = Assistant._create_stt(stt_type)
         llm = Assistant._create_llm(llm_type)
         tts = Assistant._create_tts(tts_type)
-        return cls(stt, llm, tts)
+        assistant = cls(stt, llm, tts, source)
+        assistant.register_stats()
+        return assistant
+
+    def register_stats(self) -> None:
+        """Exposes the latency and cache statistics on the admin panel's /stats."""
+        for name, component in [("stt", self.stt), ("llm", self.llm), ("tts", self.tts)]:
+            if hasattr(component, "stats"):
+                register_stats_source(name, component.stats)
+        register_stats_source("tts_pipeline", self.tts_pipeline.stats)
+        register_stats_source("filler", self.filler.stats)
+        register_stats_source("energy_gate", self.energy_gate.stats)
 
     @staticmethod
     def _create_stt(stt_type: str) -> BaseSTT:
         if stt_type == "whisper":
-            return WhisperSTT(openai_client)
+            return WhisperSTT(async_openai_client)
         elif stt_type == "mohirai":
             return UzbekVoiceSTT()
+        elif stt_type == "chunked":
+            return ChunkedHTTPSTT()
+        elif stt_type == "hedged":
+            return HedgedSTT([UzbekVoiceSTT(), WhisperSTT(async_openai_client)])
         else:
             raise ValueError(f"Unsupported STT type: {stt_type}")
 
     @staticmethod
     def _create_llm(llm_type: str) -> BaseLLM:
         if llm_type == "openai":
-            return OpenAIGPT()
+            return CachedLLM(OpenAIGPT())
         elif llm_type == "groq":
-            return GroqLLM()
+            return CachedLLM(GroqLLM())
+        elif llm_type == "router":
+            # Groq отвечает тем же персонажем: общие память и инструменты
+            gpt = OpenAIGPT()
+            groq = ChatCompletionLLM(groq_client, MODEL, gpt.memory, gpt.tool_schemas, gpt.tool_runtime)
+            return CachedLLM(RouterLLM({"openai": gpt, "groq": groq}))
         else:
             raise ValueError(f"Unsupported LLM type: {llm_type}")
 
     @staticmethod
     def _create_tts(tts_type: str) -> BaseTTS:
         if tts_type == "whisper":
-            return WhisperTTS(openai_client)
+            return CachedTTS(WhisperTTS(openai_client))
         elif tts_type == "azure":
-            return AzureTTS()
+            return CachedTTS(AzureTTS())
         else:
             raise ValueError(f"Unsupported TTS type: {tts_type}")
@@ -0,0 +1,59 @@
+import numpy as np
+
+
+class AudioRingBuffer:
+    """Fixed-capacity int16 ring buffer for pre-roll and utterance capture.
+
+    Every sample is stored twice (at ``i`` and ``i + capacity``), so the most
+    recent ``n`` samples are always one contiguous slice and reading an
+    utterance never has to stitch or copy the wrapped parts together.
+    """
+
+    def __init__(self, capacity: int, dtype=np.int16):
+        self.capacity = capacity
+        self._data = np.zeros(2 * capacity, dtype=dtype)
+        self._write_pos = 0
+        self._total = 0
+        self._mark = 0
+
+    def write(self, frame) -> None:
+        """Copies one frame of samples into the buffer in place."""
+        n = len(frame)
+        if n > self.capacity:
+            frame = frame[-self.capacity:]
+            self._total += n - self.capacity
+            n = self.capacity
+
+        pos = self._write_pos
+        first = min(n, self.capacity - pos)
+        self._data[pos:pos + first] = frame[:first]
+        self._data[pos + self.capacity:pos + self.capacity + first] = frame[:first]
+        if first < n:
+            rest = n - first
+            self._data[:rest] = frame[first:]
+            self._data[self.capacity:self.capacity + rest] = frame[first:]
+
+        self._write_pos = (pos + n) % self.capacity
+        self._total += n
+
+    def latest(self, n: int) -> np.ndarray:
+        """Returns a contiguous view of the last ``n`` samples written."""
+        n = min(n, self._total, self.capacity)
+        end = self._write_pos + self.capacity
+        return self._data[end - n:end]
+
+    def mark(self, preroll: int = 0) -> None:
+        """Starts an utterance that includes the last ``preroll`` samples."""
+        self._mark = max(self._total - preroll, 0)
+
+    def utterance(self) -> np.ndarray:
+        """Returns a contiguous view of everything written since ``mark``."""
+        return self.latest(self._total - self._mark)
+
+    def reset(self) -> None:
+        self._write_pos = 0
+        self._total = 0
+        self._mark = 0
+
+    def __len__(self) -> int:
+        return min(self._total, self.capacity)
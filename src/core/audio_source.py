@@ -0,0 +1,137 @@
+import time
+from abc import ABC, abstractmethod
+from typing import List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from pvrecorder import PvRecorder
+
+from src.modules.audio.audio_data import AudioData
+
+
+class AudioSource(ABC):
+    """Frame-by-frame 16-bit mono audio input used by the listening loops."""
+
+    sample_rate: int
+    frame_length: int
+    # Живой источник не ждет потребителя; запись можно притормозить, не теряя кадров
+    realtime = True
+
+    @abstractmethod
+    def start(self):
+        pass
+
+    @abstractmethod
+    def stop(self):
+        pass
+
+    @abstractmethod
+    def read(self) -> Sequence[int]:
+        pass
+
+    def delete(self):
+        pass
+
+
+class PvRecorderSource(AudioSource):
+    def __init__(self, frame_length: int, device_index: int = -1, sample_rate: int = 16000):
+        self.frame_length = frame_length
+        self.sample_rate = sample_rate
+        self.recorder = PvRecorder(device_index=device_index, frame_length=frame_length)
+
+    def start(self):
+        self.recorder.start()
+
+    def stop(self):
+        self.recorder.stop()
+
+    def read(self) -> Sequence[int]:
+        return self.recorder.read()
+
+    def delete(self):
+        self.recorder.delete()
+
+
+class ReplaySource(AudioSource):
+    """Replays a WAV file or PCM array as if it came from the microphone.
+
+    ``speed`` paces the frames: 1.0 is real time, 4.0 four times faster and
+    0 as fast as the consumer reads. After the audio, ``tail_silence`` seconds
+    of silence are emitted so VAD can close the last utterance, then ``read``
+    raises ``EOFError``. Replay is not real time, so a full capture queue
+    pauses it instead of dropping frames.
+    """
+
+    realtime = False
+
+    def __init__(self, audio: Union[AudioData, np.ndarray, str], frame_length: int = 512,
+                 sample_rate: int = 16000, speed: float = 1.0, tail_silence: float = 2.0):
+        if isinstance(audio, str):
+            audio = AudioData.from_file(audio)
+        if isinstance(audio, AudioData):
+            if audio.sample_rate != sample_rate or audio.channels != 1:
+                raise ValueError(f"Expected {sample_rate} Hz mono audio, got "
+                                 f"{audio.sample_rate} Hz with {audio.channels} channels")
+            audio = audio.samples
+
+        tail = np.zeros(int(tail_silence * sample_rate), dtype=np.int16)
+        self.samples = np.concatenate([np.asarray(audio, dtype=np.int16), tail])
+        self.frame_length = frame_length
+        self.sample_rate = sample_rate
+        self.speed = speed
+        self._position = 0
+        self._started_at: Optional[float] = None
+
+    def start(self):
+        self._started_at = time.perf_counter() - self._position / self.sample_rate / (self.speed or 1)
+
+    def stop(self):
+        self._started_at = None
+
+    def read(self) -> np.ndarray:
+        end = self._position + self.frame_length
+        if end > len(self.samples):
+            raise EOFError("Replay finished")
+
+        if self.speed > 0:
+            if self._started_at is None:
+                self.start()
+            due = self._started_at + end / self.sample_rate / self.speed
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+        frame = self.samples[self._position:end]
+        self._position = end
+        return frame
+
+    def rewind(self):
+        self._position = 0
+        if self._started_at is not None:
+            self.start()
+
+
+class SyntheticSource(ReplaySource):
+    """Generates a scripted signal, e.g. ``[("silence", 1.0), ("noise", 0.8)]``.
+
+    Segment kinds are ``silence``, ``noise`` and ``tone`` (440 Hz unless a
+    frequency is given as the third element); amplitudes are int16 peaks.
+    """
+
+    def __init__(self, segments: List[Tuple], frame_length: int = 512, sample_rate: int = 16000,
+                 speed: float = 0.0, amplitude: int = 3000, seed: int = 0):
+        rng = np.random.default_rng(seed)
+        parts = []
+        for segment in segments:
+            kind, duration = segment[0], segment[1]
+            n = int(duration * sample_rate)
+            if kind == "silence":
+                parts.append(rng.normal(0, amplitude / 300, n))
+            elif kind == "noise":
+                parts.append(rng.normal(0, amplitude / 3, n))
+            elif kind == "tone":
+                frequency = segment[2] if len(segment) > 2 else 440
+                parts.append(amplitude * np.sin(2 * np.pi * frequency * np.arange(n) / sample_rate))
+            else:
+                raise ValueError(f"Unsupported segment type: {kind}")
+        samples = np.clip(np.concatenate(parts), -32768, 32767).astype(np.int16)
+        super().__init__(samples, frame_length, sample_rate, speed, tail_silence=0.0)
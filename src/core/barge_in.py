@@ -0,0 +1,59 @@
+import threading
+from typing import Callable, Optional
+
+from src.core.audio_buffer import AudioRingBuffer
+from src.core.capture import CaptureThread
+
+
+class BargeInMonitor:
+    """Keeps VAD running while the assistant speaks.
+
+    Takes over reading the capture queue for the duration of a response,
+    keeps writing frames into the utterance buffer (so the interrupting
+    phrase has its pre-roll) and calls ``on_trigger`` once ``min_frames``
+    consecutive frames reach ``threshold``. Frames after the trigger stay in
+    the queue for the recording loop.
+    """
+
+    def __init__(self, capture: CaptureThread, vad, audio_buffer: AudioRingBuffer,
+                 threshold: float, min_frames: int, on_trigger: Callable[[], None]):
+        self.capture = capture
+        self.vad = vad
+        self.audio_buffer = audio_buffer
+        self.threshold = threshold
+        self.min_frames = min_frames
+        self.on_trigger = on_trigger
+        self.triggered = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self.triggered.clear()
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="barge-in", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        voiced = 0
+        while not self._stopping.is_set():
+            try:
+                frame = self.capture.read(timeout=0.1)
+            except TimeoutError:
+                continue
+            except EOFError:
+                return
+
+            self.audio_buffer.write(frame)
+            voiced = voiced + 1 if self.vad.process(frame) >= self.threshold else 0
+            if voiced >= self.min_frames:
+                self.triggered.set()
+                self.on_trigger()
+                return
+
+    def stop(self) -> bool:
+        """Stops monitoring; returns True if the user barged in."""
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        return self.triggered.is_set()
@@ -0,0 +1,149 @@
+import threading
+from typing import Callable, Optional, Tuple
+
+import numpy as np
+
+from src.core.audio_source import AudioSource
+
+
+class FrameQueue:
+    """Bounded single-producer/single-consumer queue of fixed-size frames.
+
+    Frames live in one preallocated array. The producer only moves ``_head``
+    and the consumer only moves ``_tail``, so no lock is needed on the data
+    path; Events are used just to wake a waiting side. When the queue is
+    full the newest frame is dropped and counted in ``overruns`` - unless
+    ``block_when_full`` is set (replayed or synthetic input), in which case
+    ``push`` waits for the consumer instead.
+
+    A frame returned by ``pop`` is a view that stays valid until the next
+    ``pop`` call.
+    """
+
+    def __init__(self, slots: int, frame_length: int, block_when_full: bool = False):
+        self.slots = slots
+        self.block_when_full = block_when_full
+        self._frames = np.zeros((slots, frame_length), dtype=np.int16)
+        self._timestamps = np.zeros(slots, dtype=np.float64)
+        self._head = 0
+        self._tail = 0
+        self._pending_release = False
+        self._ready = threading.Event()
+        self._space = threading.Event()
+        self.closed = False
+        self.overruns = 0
+
+    def push(self, frame, timestamp: float, cancelled: Callable[[], bool] = lambda: False) -> bool:
+        while self._head - self._tail >= self.slots:
+            if self.closed or cancelled():
+                return False
+            if not self.block_when_full:
+                self.overruns += 1
+                return False
+            self._space.clear()
+            if self._head - self._tail >= self.slots:
+                self._space.wait(0.05)
+        index = self._head % self.slots
+        self._frames[index] = frame
+        self._timestamps[index] = timestamp
+        # Публикуем кадр только после записи данных
+        self._head += 1
+        self._ready.set()
+        return True
+
+    def pop(self, timeout: Optional[float] = None) -> Tuple[np.ndarray, float]:
+        if self._pending_release:
+            self._tail += 1
+            self._pending_release = False
+            self._space.set()
+
+        while self._tail == self._head:
+            if self.closed:
+                raise EOFError("Capture stopped")
+            self._ready.clear()
+            if self._tail == self._head and not self._ready.wait(timeout):
+                raise TimeoutError("No audio frame within timeout")
+
+        index = self._tail % self.slots
+        self._pending_release = True
+        return self._frames[index], float(self._timestamps[index])
+
+    def clear(self):
+        """Drops everything captured so far (consumer side only)."""
+        self._pending_release = False
+        self._tail = self._head
+        self._space.set()
+
+    def close(self):
+        self.closed = True
+        self._ready.set()
+        self._space.set()
+
+    def __len__(self) -> int:
+        return self._head - self._tail - self._pending_release
+
+
+class CaptureThread:
+    """Reads the audio source on its own thread so slow consumers never stall it.
+
+    Each frame is stamped with its audio time: the end of the frame in
+    seconds of audio read since capture started, counting frames dropped on
+    overrun. Timing decisions based on it (endpointing, session length) do
+    not depend on how long a frame waited in the queue, and replayed input
+    keeps its own timeline even when it is read faster than real time.
+    """
+
+    def __init__(self, source: AudioSource, slots: int = 256):
+        self.source = source
+        # Запись с файла ждет потребителя, а живой микрофон ждать не может
+        self.queue = FrameQueue(slots, source.frame_length, block_when_full=not source.realtime)
+        self.error: Optional[Exception] = None
+        self.frame_duration = source.frame_length / source.sample_rate
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self.source.start()
+        self._thread = threading.Thread(target=self._run, name="audio-capture", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        frames = 0
+        try:
+            while self._running:
+                frame = self.source.read()
+                frames += 1
+                self.queue.push(frame, frames * self.frame_duration, self._stopping)
+        except Exception as e:
+            self.error = e
+        finally:
+            self.queue.close()
+
+    def _stopping(self) -> bool:
+        return not self._running
+
+    def read(self, timeout: Optional[float] = None) -> np.ndarray:
+        return self.read_timestamped(timeout)[0]
+
+    def read_timestamped(self, timeout: Optional[float] = None) -> Tuple[np.ndarray, float]:
+        """Next frame and its audio time in seconds."""
+        try:
+            return self.queue.pop(timeout)
+        except EOFError:
+            if isinstance(self.error, EOFError) or self.error is None:
+                raise
+            raise RuntimeError(f"Audio capture failed: {self.error}") from self.error
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+        self.source.stop()
+
+    @property
+    def overruns(self) -> int:
+        return self.queue.overruns
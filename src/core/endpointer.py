@@ -0,0 +1,108 @@
+import math
+from abc import ABC, abstractmethod
+from typing import Optional
+
+import numpy as np
+
+
+class BaseEndpointer(ABC):
+    """Decides when the current utterance is over.
+
+    ``update`` is called once per captured frame while recording, with the
+    Cobra voice probability for that frame.
+    """
+
+    @abstractmethod
+    def reset(self):
+        pass
+
+    @abstractmethod
+    def update(self, probability: float, frame: np.ndarray, now: float) -> bool:
+        pass
+
+
+class FixedSilenceEndpointer(BaseEndpointer):
+    """The original rule: stop after a fixed amount of silence."""
+
+    def __init__(self, voice_threshold: float = 0.9, silence_duration: float = 1.0):
+        self.voice_threshold = voice_threshold
+        self.silence_duration = silence_duration
+        self._last_voice: Optional[float] = None
+
+    def reset(self):
+        self._last_voice = None
+
+    def update(self, probability: float, frame: np.ndarray, now: float) -> bool:
+        if self._last_voice is None or probability >= self.voice_threshold:
+            self._last_voice = now
+        return now - self._last_voice > self.silence_duration
+
+
+class AdaptiveEndpointer(BaseEndpointer):
+    """Shortens the silence timeout when the utterance is clearly finished.
+
+    Short commands close after ``min_silence``; the timeout grows with the
+    amount of speech heard so far, with the longest pause the speaker has
+    already made mid-utterance, and while the trailing frames are still
+    above the noise floor or Cobra is unsure.
+    """
+
+    def __init__(self, sample_rate: int, voice_threshold: float = 0.9,
+                 min_silence: float = 0.35, max_silence: float = 1.0, hard_limit: float = 1.5,
+                 long_utterance: float = 4.0, pause_margin: float = 1.25,
+                 energy_margin_db: float = 6.0, uncertain_probability: float = 0.4,
+                 extension: float = 1.5):
+        self.sample_rate = sample_rate
+        self.voice_threshold = voice_threshold
+        self.min_silence = min_silence
+        self.max_silence = max_silence
+        self.hard_limit = hard_limit
+        self.long_utterance = long_utterance
+        self.pause_margin = pause_margin
+        self.energy_margin_db = energy_margin_db
+        self.uncertain_probability = uncertain_probability
+        self.extension = extension
+        self.reset()
+
+    def reset(self):
+        self._last_voice: Optional[float] = None
+        self._speech_time = 0.0
+        self._longest_pause = 0.0
+        self._trail_probability = 0.0
+        self._trail_db = 0.0
+        self._noise_db: Optional[float] = None
+
+    @staticmethod
+    def _level_db(frame: np.ndarray) -> float:
+        samples = np.asarray(frame, dtype=np.float32)
+        return 20 * math.log10(math.sqrt(float(np.dot(samples, samples)) / max(len(samples), 1)) + 1.0)
+
+    def required_silence(self) -> float:
+        progress = min(self._speech_time / self.long_utterance, 1.0)
+        timeout = self.min_silence + (self.max_silence - self.min_silence) * progress
+        timeout = max(timeout, min(self._longest_pause * self.pause_margin, self.max_silence))
+
+        # Слышно дыхание/"э-э" или Cobra сомневается -> человек, скорее всего, продолжит
+        if self._noise_db is not None and self._trail_db > self._noise_db + self.energy_margin_db:
+            timeout *= self.extension
+        if self._trail_probability >= self.uncertain_probability:
+            timeout *= self.extension
+        return min(timeout, self.hard_limit)
+
+    def update(self, probability: float, frame: np.ndarray, now: float) -> bool:
+        level_db = self._level_db(frame)
+        self._trail_probability = 0.7 * self._trail_probability + 0.3 * probability
+        self._trail_db = 0.7 * self._trail_db + 0.3 * level_db
+
+        if self._last_voice is None or probability >= self.voice_threshold:
+            if self._last_voice is not None:
+                self._longest_pause = max(self._longest_pause, now - self._last_voice)
+            self._last_voice = now
+            self._speech_time += len(frame) / self.sample_rate
+        elif self._noise_db is None or level_db < self._noise_db:
+            self._noise_db = level_db
+        else:
+            # Пол шума поднимается медленно, опускается сразу
+            self._noise_db += 0.05 * (level_db - self._noise_db)
+
+        return now - self._last_voice > self.required_silence()
@@ -0,0 +1,130 @@
+"""Offline evaluation of end-of-utterance detectors.
+
+Replays labeled WAV files through Cobra (or an energy-based stand-in) and
+each endpointer, and reports how often the speaker would have been cut off
+against how much silence the endpointer waited after the labeled end.
+
+The manifest is a CSV with ``path,speech_end`` columns, where ``speech_end``
+is the time in seconds at which the speaker really finished; paths are
+relative to the manifest::
+
+    python -m src.core.endpointer_eval labels.csv --vad cobra
+"""
+import argparse
+import csv
+import os
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from src.core.endpointer import AdaptiveEndpointer, BaseEndpointer, FixedSilenceEndpointer
+from src.modules.audio.audio_data import AudioData
+
+FRAME_LENGTH = 512
+
+
+class EnergyVAD:
+    """Maps frame level above a running noise floor to a 0..1 probability."""
+
+    def __init__(self, range_db: float = 20.0):
+        self.range_db = range_db
+        self._noise_db: Optional[float] = None
+
+    def process(self, frame: np.ndarray) -> float:
+        samples = frame.astype(np.float32)
+        level_db = 20 * np.log10(np.sqrt(np.mean(samples * samples)) + 1.0)
+        if self._noise_db is None or level_db < self._noise_db:
+            self._noise_db = level_db
+        else:
+            self._noise_db += 0.01 * (level_db - self._noise_db)
+        return float(np.clip((level_db - self._noise_db) / self.range_db, 0.0, 1.0))
+
+
+def load_manifest(manifest_path: str) -> List[Dict]:
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+    with open(manifest_path, newline="") as f:
+        return [
+            {"path": os.path.join(base_dir, row["path"]), "speech_end": float(row["speech_end"])}
+            for row in csv.DictReader(f)
+        ]
+
+
+def replay(audio: AudioData, probabilities: List[float], endpointer: BaseEndpointer,
+           onset_threshold: float) -> Optional[float]:
+    """Returns the time (s) at which the endpointer fired, or None."""
+    endpointer.reset()
+    recording = False
+    for i, probability in enumerate(probabilities):
+        now = (i + 1) * FRAME_LENGTH / audio.sample_rate
+        frame = audio.samples[i * FRAME_LENGTH:(i + 1) * FRAME_LENGTH]
+        if not recording:
+            recording = probability >= onset_threshold
+            if not recording:
+                continue
+        if endpointer.update(probability, frame, now):
+            return now
+    return None
+
+
+def evaluate(items: List[Dict], vad_factory: Callable, endpointers: Dict[str, Callable[[int], BaseEndpointer]],
+             onset_threshold: float = 0.9) -> Dict[str, Dict]:
+    results = {name: {"cutoffs": 0, "missed": 0, "latencies": []} for name in endpointers}
+
+    for item in items:
+        audio = AudioData.from_file(item["path"])
+        # Пауза в конце файла, чтобы любой детектор успел сработать
+        audio.samples = np.concatenate([audio.samples, np.zeros(2 * audio.sample_rate, dtype=np.int16)])
+        vad = vad_factory()
+        n_frames = len(audio.samples) // FRAME_LENGTH
+        probabilities = [
+            vad.process(audio.samples[i * FRAME_LENGTH:(i + 1) * FRAME_LENGTH]) for i in range(n_frames)
+        ]
+
+        for name, factory in endpointers.items():
+            fired = replay(audio, probabilities, factory(audio.sample_rate), onset_threshold)
+            if fired is None:
+                results[name]["missed"] += 1
+            elif fired < item["speech_end"]:
+                results[name]["cutoffs"] += 1
+            else:
+                results[name]["latencies"].append(fired - item["speech_end"])
+    return results
+
+
+def print_report(results: Dict[str, Dict], total: int, baseline: str):
+    baseline_latency = np.mean(results[baseline]["latencies"]) if results[baseline]["latencies"] else 0.0
+    print(f"{'endpointer':<12} {'cut-offs':>9} {'missed':>7} {'mean, ms':>9} {'p95, ms':>8} {'saved, ms':>10}")
+    for name, stats in results.items():
+        latencies = np.array(stats["latencies"]) * 1000
+        mean = latencies.mean() if len(latencies) else float("nan")
+        p95 = np.percentile(latencies, 95) if len(latencies) else float("nan")
+        print(f"{name:<12} {stats['cutoffs']:>4}/{total:<4} {stats['missed']:>7} {mean:>9.0f} {p95:>8.0f} "
+              f"{baseline_latency * 1000 - mean:>10.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Evaluate endpointers on labeled WAV files")
+    parser.add_argument("manifest", help="CSV with path,speech_end columns")
+    parser.add_argument("--vad", choices=["cobra", "energy"], default="cobra")
+    parser.add_argument("--threshold", type=float, default=0.9)
+    args = parser.parse_args()
+
+    if args.vad == "cobra":
+        import pvcobra
+        from src.core.mic_loop import ACCESS_KEY
+        cobra = pvcobra.create(access_key=ACCESS_KEY)
+
+        class _CobraVAD:
+            def process(self, frame):
+                return cobra.process(frame)
+
+        vad_factory = _CobraVAD
+    else:
+        vad_factory = EnergyVAD
+
+    labeled = load_manifest(args.manifest)
+    report = evaluate(labeled, vad_factory, {
+        "fixed": lambda sr: FixedSilenceEndpointer(args.threshold, 1.0),
+        "adaptive": lambda sr: AdaptiveEndpointer(sr, voice_threshold=args.threshold),
+    }, onset_threshold=args.threshold)
+    print_report(report, len(labeled), baseline="fixed")
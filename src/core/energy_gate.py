@@ -0,0 +1,106 @@
+from typing import Optional
+
+import numpy as np
+
+from src.core.audio_buffer import AudioRingBuffer
+
+
+class EnergyGate:
+    """Cheap RMS/zero-crossing pre-check run before Porcupine and Cobra.
+
+    A frame is gated (neural inference skipped) when its level stays within
+    ``margin_db`` of an adaptive noise floor. Hiss-like frames, with a high
+    zero-crossing rate and only a small level rise, are gated as well. After
+    any loud frame, ``hangover_frames`` frames pass through unconditionally
+    so word onsets and soft endings are never cut. ``open_frames`` also
+    covers the other side: when the gate opens it returns up to
+    ``lookback_frames`` gated frames from just before the loud one, so a
+    soft wake-word onset still reaches Porcupine.
+    """
+
+    def __init__(self, margin_db: float = 9.0, min_level_db: float = 30.0, zcr_max: float = 0.35,
+                 hangover_frames: int = 15, rise_rate: float = 0.01, fall_rate: float = 0.5,
+                 lookback_frames: int = 10):
+        self.margin_db = margin_db
+        self.min_level_db = min_level_db
+        self.zcr_max = zcr_max
+        self.hangover_frames = hangover_frames
+        self.rise_rate = rise_rate
+        self.fall_rate = fall_rate
+        self.lookback_frames = lookback_frames
+        self.noise_db: Optional[float] = None
+        self.gated = 0
+        self.processed = 0
+        self._hangover = 0
+        self._scratch = np.zeros(0, dtype=np.float32)
+        self._lookback: Optional[AudioRingBuffer] = None
+        self._gated_run = 0
+
+    def _measure(self, frame):
+        if len(self._scratch) != len(frame):
+            self._scratch = np.zeros(len(frame), dtype=np.float32)
+        x = self._scratch
+        np.copyto(x, frame, casting='unsafe')
+        level_db = 10 * np.log10(np.dot(x, x) / len(x) + 1.0)
+        zcr = np.count_nonzero(np.signbit(x[1:]) != np.signbit(x[:-1])) / (len(x) - 1)
+        return float(level_db), zcr
+
+    def is_silent(self, frame) -> bool:
+        level_db, zcr = self._measure(frame)
+
+        if self.noise_db is None:
+            self.noise_db = level_db
+
+        above = level_db - self.noise_db
+        loud = level_db >= self.min_level_db and above >= self.margin_db
+        if loud and zcr > self.zcr_max and above < 2 * self.margin_db:
+            loud = False
+
+        # Пол шума быстро опускается и медленно поднимается; во время речи
+        # почти не двигается, но постоянный новый шум со временем догоняет
+        if level_db < self.noise_db:
+            self.noise_db += self.fall_rate * above
+        else:
+            self.noise_db += (self.rise_rate / 10 if loud else self.rise_rate) * above
+
+        if loud:
+            self._hangover = self.hangover_frames
+        elif self._hangover > 0:
+            self._hangover -= 1
+        else:
+            self.gated += 1
+            return True
+
+        self.processed += 1
+        return False
+
+    def open_frames(self, frame) -> np.ndarray:
+        """Frames to run inference on, as a ``(n, frame_length)`` array.
+
+        Empty while the frame is gated; otherwise the gated frames right
+        before it (at most ``lookback_frames``) followed by the frame itself.
+        The result is a view that stays valid until the next call.
+        """
+        if self._lookback is None or self._lookback.capacity != (self.lookback_frames + 1) * len(frame):
+            self._lookback = AudioRingBuffer((self.lookback_frames + 1) * len(frame))
+            self._gated_run = 0
+        self._lookback.write(frame)
+        if self.is_silent(frame):
+            self._gated_run = min(self._gated_run + 1, self.lookback_frames)
+            return self._lookback.latest(0).reshape(0, len(frame))
+        frames = self._lookback.latest((self._gated_run + 1) * len(frame)).reshape(-1, len(frame))
+        self._gated_run = 0
+        return frames
+
+    def reset_lookback(self) -> None:
+        """Forgets gated frames, e.g. after the loop stopped reading for a while."""
+        self._gated_run = 0
+
+    def stats(self) -> dict:
+        total = self.gated + self.processed
+        return {
+            "gated": self.gated,
+            "processed": self.processed,
+            "gated_ratio": self.gated / total if total else 0.0,
+            "noise_db": self.noise_db,
+        }
@@ -0,0 +1,108 @@
+import glob
+import random
+import threading
+import time
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from src.modules.audio.output import FILLER, Playback, audio_output
+from src.utils.latency import LatencyTracker
+
+FILLER_CLIPS = sorted(glob.glob("core/audio_files/filler*.mp3")) or ["core/audio_files/think.mp3"]
+
+
+class FillerScheduler:
+    """Masks slow answers with a short filler clip ("hmm...").
+
+    ``start`` is called when the user stops speaking. If no answer audio
+    has started ``threshold`` seconds later, a clip from the pool plays;
+    the same clip is not repeated until the pool is exhausted. The clip
+    fades out as soon as ``audio_ready`` reports the first TTS audio.
+    Clips are decoded into the AudioOutput once at start-up, so firing
+    costs no disk access.
+    """
+
+    def __init__(self, clips: Sequence[str] = FILLER_CLIPS, threshold: float = 1.2, fade_ms: int = 150,
+                 volume: float = 0.7):
+        self.threshold = threshold
+        self.fade_ms = fade_ms
+        self.volume = volume
+        self.sounds: List[np.ndarray] = []
+        try:
+            output = audio_output()
+            output.open()
+            self.sounds = [output.load(path) for path in clips]
+        except Exception as e:
+            print(f"Filler audio disabled: {e}")
+        self.time_to_audio = LatencyTracker(window=100)
+        self.turns = 0
+        self.fired = 0
+        self._bag: List[np.ndarray] = []
+        self._last: Optional[np.ndarray] = None
+        self._playback: Optional[Playback] = None
+        self._timer: Optional[threading.Timer] = None
+        self._started_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        with self._lock:
+            self._cancel_timer()
+            self.turns += 1
+            self._started_at = time.perf_counter()
+            if self.sounds:
+                self._timer = threading.Timer(self.threshold, self._fire)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def _next_sound(self) -> np.ndarray:
+        if not self._bag:
+            self._bag = random.sample(self.sounds, len(self.sounds))
+            # Новый круг не начинается с только что звучавшего клипа
+            if len(self._bag) > 1 and self._bag[-1] is self._last:
+                self._bag[0], self._bag[-1] = self._bag[-1], self._bag[0]
+        self._last = self._bag.pop()
+        return self._last
+
+    def _fire(self) -> None:
+        with self._lock:
+            if self._started_at is None:
+                return
+            self.fired += 1
+            self._playback = audio_output().play(self._next_sound(), FILLER, self.volume)
+            print(f"Filler: no answer audio after {self.threshold:.1f} s")
+
+    def _cancel_timer(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def _fade_out(self) -> None:
+        if self._playback is not None:
+            self._playback.stop(self.fade_ms)
+            self._playback = None
+
+    def audio_ready(self) -> None:
+        """First answer audio is about to play: drop the filler."""
+        with self._lock:
+            self._cancel_timer()
+            self._fade_out()
+            if self._started_at is not None:
+                self.time_to_audio.record(time.perf_counter() - self._started_at)
+                self._started_at = None
+
+    def finish(self) -> None:
+        """Turn over (answered, empty transcript or barge-in)."""
+        with self._lock:
+            self._cancel_timer()
+            self._fade_out()
+            self._started_at = None
+
+    def stats(self) -> dict:
+        return {
+            "turns": self.turns,
+            "fired": self.fired,
+            "fire_rate": self.fired / self.turns if self.turns else 0.0,
+            "time_to_audio_p50": self.time_to_audio.p50,
+            "time_to_audio_p95": self.time_to_audio.p95,
+        }
@@ -1,42 +1,81 @@
 import os
-import wave
+import time
 import pvcobra
 import pvporcupine
-from pvrecorder import PvRecorder
+from typing import Optional
 from dotenv import load_dotenv
 
+from src.core.audio_buffer import AudioRingBuffer
+from src.core.audio_source import AudioSource, PvRecorderSource
+from src.core.capture import CaptureThread
+from src.core.endpointer import AdaptiveEndpointer, BaseEndpointer
+from src.core.energy_gate import EnergyGate
+from src.modules.audio.audio_data import AudioData
+
 load_dotenv()
 ACCESS_KEY = os.getenv("YOUR_PICOVOICE_ACCESS_KEY")
 
 
 class AudioRecorder:
-    def __init__(self):
+    def __init__(self, source: Optional[AudioSource] = None):
         self.porcupine = pvporcupine.create(
             access_key=ACCESS_KEY,
             keyword_paths=['core/pv_files/arif.ppn'],
             model_path='core/pv_files/porcupine_params_ar.pv'
         )
-        self.recorder = PvRecorder(device_index=-1, frame_length=self.porcupine.frame_length)
+        self.recorder = source or PvRecorderSource(self.porcupine.frame_length, device_index=-1)
+        if (self.recorder.frame_length, self.recorder.sample_rate) != \
+                (self.porcupine.frame_length, self.porcupine.sample_rate):
+            raise ValueError(f"Audio source must deliver {self.porcupine.frame_length}-sample frames "
+                             f"at {self.porcupine.sample_rate} Hz")
         self.cobra = pvcobra.create(access_key=ACCESS_KEY)
+        # Отдельный поток чтения: кадры не теряются, пока идут STT/LLM/TTS
+        self.capture = CaptureThread(self.recorder)
 
         self.channels = 1
-        self.output_file = "core/audio_files/recording.wav"
+        # Каталог для архивации фраз; None - ничего не пишем на диск
+        self.archive_dir = None
         self.sample_rate = self.porcupine.sample_rate
 
-        self.STOP_THRESHOLD = 0.9
-        self.SILENCE_DURATION = 1   # Лимит тишины в сек
+        self.STOP_THRESHOLD = 0.9   # Порог Cobra для начала записи
         self.MAX_RECORDING_TIME = 30  # Максимальное время записи в секундах
+        self.PREROLL_DURATION = 1  # Сколько секунд до начала речи сохраняем
+        self.MAX_UTTERANCE_TIME = 30  # Длиннее этого хранится только хвост фразы
+        # Перебивание ответа голосом. Без эхоподавления динамик может
+        # перебить сам себя, поэтому включается явно: BARGE_IN=1
+        self.BARGE_IN = os.getenv("BARGE_IN", "0") == "1"
+        self.BARGE_IN_THRESHOLD = 0.95
+        self.BARGE_IN_FRAMES = 3  # ~100 мс речи подряд
+
+        # Тихие кадры не гоняем через Porcupine/Cobra
+        self.energy_gate = EnergyGate()
+
+        self.audio_buffer = AudioRingBuffer(
+            (self.PREROLL_DURATION + self.MAX_UTTERANCE_TIME) * self.sample_rate
+        )
+        # FixedSilenceEndpointer(self.STOP_THRESHOLD, 1) - прежнее поведение
+        self.endpointer: BaseEndpointer = AdaptiveEndpointer(self.sample_rate, voice_threshold=self.STOP_THRESHOLD)
+
+    def _utterance_audio(self) -> AudioData:
+        return AudioData(self.audio_buffer.utterance(), self.sample_rate, self.channels)
+
+    def _save_audio(self, audio: AudioData):
+        if not self.archive_dir:
+            return
+        os.makedirs(self.archive_dir, exist_ok=True)
+        file_path = os.path.join(self.archive_dir, f"recording_{time.time_ns()}.wav")
+        audio.save(file_path)
+        print("Файл сохранен как:", file_path)
 
-    def _save_audio(self, frames):
-        print("Сохранение данных в .wav файл...")
-        with wave.open(self.output_file, 'wb') as wf:
-            wf.setnchannels(self.channels)
-            wf.setsampwidth(2)
-            wf.setframerate(self.sample_rate)
-            wf.writeframes(b''.join(frame.tobytes() for frame in frames))
-        print("Файл сохранен как:", self.output_file)
+    def _vad(self, audio_frame) -> float:
+        if self.energy_gate.is_silent(audio_frame):
+            return 0.0
+        return self.cobra.process(audio_frame)
 
     def _cleanup(self):
+        print("Energy gate:", self.energy_gate.stats())
+        if hasattr(self, 'capture'):
+            self.capture.stop()
         if hasattr(self, 'recorder'):
             self.recorder.delete()
         if hasattr(self, 'cobra'):
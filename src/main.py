@@ -6,6 +6,7 @@ from modules.vision.eye_tracker import EyeTracker
 from src.core.assistant import Assistant
 from src.core.state import SleepState
 from src.modules.vision.eye_controller import MechanicalEyes
+from src.modules.web_interface.static.api import run_server
 
 context = Context(SleepState())
 Eye_controller = MechanicalEyes()
@@ -32,5 +33,7 @@ if __name__ == "__main__":
     assistant = Assistant.create(stt_type="mohirai", llm_type="openai", tts_type="azure")
     assis_thread = threading.Thread(target=assistant.run, args=[context, TalkState])
     assis_thread.start()
+    # Панель администратора: анимация и /stats
+    threading.Thread(target=run_server, daemon=True).start()
 
     asyncio.run(main())
@@ -0,0 +1,50 @@
+import io
+import wave
+
+import numpy as np
+
+
+class AudioData:
+    """Mono/multichannel 16-bit PCM held in memory.
+
+    ``samples`` may be a view into a capture buffer, so consumers that keep
+    the audio around past the current turn should call ``copy()``.
+    """
+
+    def __init__(self, samples: np.ndarray, sample_rate: int, channels: int = 1):
+        self.samples = samples
+        self.sample_rate = sample_rate
+        self.channels = channels
+
+    @property
+    def duration(self) -> float:
+        return len(self.samples) / (self.sample_rate * self.channels)
+
+    def copy(self) -> 'AudioData':
+        return AudioData(self.samples.copy(), self.sample_rate, self.channels)
+
+    def to_wav_bytes(self) -> bytes:
+        return self.to_wav().getvalue()
+
+    def to_wav(self, name: str = "recording.wav") -> io.BytesIO:
+        buffer = io.BytesIO()
+        with wave.open(buffer, 'wb') as wf:
+            wf.setnchannels(self.channels)
+            wf.setsampwidth(2)
+            wf.setframerate(self.sample_rate)
+            wf.writeframes(self.samples)
+        buffer.seek(0)
+        buffer.name = name
+        return buffer
+
+    def save(self, file_path: str) -> None:
+        with open(file_path, "wb") as f:
+            f.write(self.to_wav().getbuffer())
+
+    @classmethod
+    def from_file(cls, file_path: str) -> 'AudioData':
+        with wave.open(file_path, 'rb') as wf:
+            if wf.getsampwidth() != 2:
+                raise ValueError(f"Only 16-bit PCM is supported: {file_path}")
+            samples = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+            return cls(samples, wf.getframerate(), wf.getnchannels())
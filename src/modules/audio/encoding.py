@@ -0,0 +1,109 @@
+import inspect
+import io
+import time
+from abc import ABC, abstractmethod
+
+from src.modules.audio.audio_data import AudioData
+
+try:
+    import soundfile
+except ImportError:  # FLAC/Opus недоступны, остается WAV
+    soundfile = None
+
+
+def opus_supported() -> bool:
+    """Opus needs libsndfile with Ogg/Opus and soundfile >= 0.13 (``compression_level``)."""
+    return (soundfile is not None
+            and "OPUS" in soundfile.available_subtypes("OGG")
+            and "compression_level" in inspect.signature(soundfile.write).parameters)
+
+
+class EncodedAudio:
+    def __init__(self, data: bytes, filename: str, mime_type: str, raw_bytes: int, encode_time: float):
+        self.data = data
+        self.filename = filename
+        self.mime_type = mime_type
+        self.raw_bytes = raw_bytes
+        self.encode_time = encode_time
+
+    @property
+    def ratio(self) -> float:
+        return self.raw_bytes / max(len(self.data), 1)
+
+    def as_upload(self) -> tuple:
+        """(filename, bytes, mime type) tuple accepted by requests and OpenAI."""
+        return self.filename, self.data, self.mime_type
+
+    def __repr__(self):
+        return (f"EncodedAudio({self.filename}: {self.raw_bytes} -> {len(self.data)} bytes, "
+                f"x{self.ratio:.1f}, {self.encode_time * 1000:.1f} ms)")
+
+
+class AudioEncoder(ABC):
+    filename: str
+    mime_type: str
+
+    def encode(self, audio: AudioData) -> EncodedAudio:
+        started = time.perf_counter()
+        data = self._encode(audio)
+        return EncodedAudio(data, self.filename, self.mime_type, audio.samples.nbytes,
+                            time.perf_counter() - started)
+
+    @abstractmethod
+    def _encode(self, audio: AudioData) -> bytes:
+        pass
+
+
+class WavEncoder(AudioEncoder):
+    filename = "recording.wav"
+    mime_type = "audio/wav"
+
+    def _encode(self, audio: AudioData) -> bytes:
+        return audio.to_wav_bytes()
+
+
+class FlacEncoder(AudioEncoder):
+    filename = "recording.flac"
+    mime_type = "audio/flac"
+
+    def _encode(self, audio: AudioData) -> bytes:
+        buffer = io.BytesIO()
+        soundfile.write(buffer, audio.samples.reshape(-1, audio.channels), audio.sample_rate,
+                        format="FLAC", subtype="PCM_16")
+        return buffer.getvalue()
+
+
+class OpusEncoder(AudioEncoder):
+    filename = "recording.ogg"
+    mime_type = "audio/ogg"
+
+    def __init__(self, bitrate_kbps: int = 24):
+        self.bitrate_kbps = bitrate_kbps
+
+    @property
+    def compression_level(self) -> float:
+        # libsndfile линейно отображает уровень 0..1 на 256..6 кбит/с
+        return min(max(1 - (self.bitrate_kbps * 1000 - 6000) / 250000, 0.0), 1.0)
+
+    def _encode(self, audio: AudioData) -> bytes:
+        buffer = io.BytesIO()
+        soundfile.write(buffer, audio.samples.reshape(-1, audio.channels), audio.sample_rate,
+                        format="OGG", subtype="OPUS", compression_level=self.compression_level)
+        return buffer.getvalue()
+
+
+def create_encoder(codec: str, **kwargs) -> AudioEncoder:
+    if codec == "wav":
+        return WavEncoder()
+    if soundfile is None:
+        print(f"soundfile is not installed, uploading WAV instead of {codec}")
+        return WavEncoder()
+    if codec == "flac":
+        return FlacEncoder()
+    elif codec == "opus":
+        if not opus_supported():
+            print("soundfile/libsndfile cannot write Opus, uploading FLAC instead")
+            return FlacEncoder()
+        return OpusEncoder(**kwargs)
+    else:
+        raise ValueError(f"Unsupported codec: {codec}")
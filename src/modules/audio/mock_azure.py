@@ -0,0 +1,121 @@
+import argparse
+import threading
+import time
+from typing import Optional
+
+import azure.cognitiveservices.speech as speechsdk
+import numpy as np
+
+
+class _Future:
+    def __init__(self, result):
+        self._result = result
+
+    def get(self):
+        return self._result
+
+
+class MockCancellationDetails:
+    def __init__(self, reason: speechsdk.CancellationReason, error_details: str = ""):
+        self.reason = reason
+        self.error_details = error_details
+
+
+class MockSynthesisResult:
+    def __init__(self, pcm: bytes, first_chunk_delay: float, chunk_delay: float, chunk_bytes: int,
+                 stopped: threading.Event, fail_after: Optional[int] = None):
+        self.pcm = pcm
+        self.first_chunk_delay = first_chunk_delay
+        self.chunk_delay = chunk_delay
+        self.chunk_bytes = chunk_bytes
+        self.stopped = stopped
+        self.fail_after = fail_after
+        self.started = time.perf_counter()
+
+
+class MockSynthesizer:
+    """Stand-in for ``speechsdk.SpeechSynthesizer`` with ``audio_config=None``.
+
+    ``start_speaking_ssml_async(...).get()`` returns at once; audio then
+    becomes readable through ``MockAudioDataStream`` after
+    ``first_chunk_delay`` and in ``chunk_delay`` steps, as a real
+    synthesis would arrive, so first-byte playback can be tested offline.
+    The rendered audio is a quiet tone ``duration`` seconds long. With
+    ``fail_after`` the service cancels the synthesis with an error once that
+    many bytes have been read, as a dropped connection would.
+    """
+
+    def __init__(self, first_chunk_delay: float = 0.15, chunk_delay: float = 0.02, duration: float = 1.0,
+                 sample_rate: int = 24000, chunk_bytes: int = 4800, fail_after: Optional[int] = None):
+        self.first_chunk_delay = first_chunk_delay
+        self.chunk_delay = chunk_delay
+        self.duration = duration
+        self.sample_rate = sample_rate
+        self.chunk_bytes = chunk_bytes
+        self.fail_after = fail_after
+        self.requests = []
+        self._stopped = threading.Event()
+
+    def _render(self) -> bytes:
+        t = np.arange(int(self.duration * self.sample_rate)) / self.sample_rate
+        return (np.sin(2 * np.pi * 220 * t) * 3000).astype(np.int16).tobytes()
+
+    def start_speaking_ssml_async(self, ssml: str) -> _Future:
+        self.requests.append(ssml)
+        self._stopped = threading.Event()
+        return _Future(MockSynthesisResult(self._render(), self.first_chunk_delay, self.chunk_delay,
+                                           self.chunk_bytes, self._stopped, self.fail_after))
+
+    def stop_speaking_async(self) -> _Future:
+        self._stopped.set()
+        return _Future(None)
+
+
+class MockAudioDataStream:
+    """Pull stream over a ``MockSynthesisResult`` (``speechsdk.AudioDataStream`` interface)."""
+
+    def __init__(self, result: MockSynthesisResult):
+        self.result = result
+        self.position = 0
+        self.status = speechsdk.StreamStatus.PartialData
+        self.cancellation_details: Optional[MockCancellationDetails] = None
+
+    def read_data(self, buffer: bytes) -> int:
+        result = self.result
+        if result.stopped.is_set():
+            return self._cancel(speechsdk.CancellationReason.CancelledByUser)
+        if result.fail_after is not None and self.position >= result.fail_after:
+            return self._cancel(speechsdk.CancellationReason.Error, "Connection was closed by the remote host")
+        if self.position >= len(result.pcm):
+            self.status = speechsdk.StreamStatus.AllData
+            return 0
+        # Чанк номер n готов через first_chunk_delay + n * chunk_delay после старта
+        ready_at = result.started + result.first_chunk_delay + \
+            self.position // result.chunk_bytes * result.chunk_delay
+        time.sleep(max(ready_at - time.perf_counter(), 0.0))
+        n = min(len(buffer), result.chunk_bytes, len(result.pcm) - self.position)
+        memoryview(buffer).cast("B")[:n] = result.pcm[self.position:self.position + n]
+        self.position += n
+        return n
+
+    def _cancel(self, reason: speechsdk.CancellationReason, error_details: str = "") -> int:
+        self.status = speechsdk.StreamStatus.Canceled
+        self.cancellation_details = MockCancellationDetails(reason, error_details)
+        return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time AzureTTS first-byte playback against a fake synthesizer")
+    parser.add_argument("--first-chunk-delay", type=float, default=0.15)
+    parser.add_argument("--chunk-delay", type=float, default=0.02)
+    parser.add_argument("--duration", type=float, default=1.0)
+    args, _ = parser.parse_known_args()
+
+    from src.modules.audio.tts import AzureTTS
+
+    tts = AzureTTS(MockSynthesizer(args.first_chunk_delay, args.chunk_delay, args.duration),
+                   audio_stream=MockAudioDataStream)
+    started = time.perf_counter()
+    tts.on_audio_start = lambda: print(f"Audio start after {(time.perf_counter() - started) * 1000:.0f} ms")
+    tts.synthesize("Salom, dunyo")
+    print(f"Done after {(time.perf_counter() - started) * 1000:.0f} ms;", tts.first_chunk_latency.stats())
@@ -0,0 +1,90 @@
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Tuple
+
+
+class MockSTTHandler(BaseHTTPRequestHandler):
+    """Stand-in for a chunked STT endpoint.
+
+    Accepts raw PCM either as a plain body or with ``Transfer-Encoding:
+    chunked`` and answers with a fixed transcript plus timing details, so the
+    streaming path can be exercised offline.
+    """
+
+    def do_POST(self):
+        started = time.perf_counter()
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            received, chunks = self._read_chunked()
+        else:
+            received = len(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            chunks = 1
+        body_done = time.perf_counter()
+
+        time.sleep(self.server.delay)
+        if self.server.status != 200:
+            self.send_error(self.server.status)
+            return
+        payload = json.dumps({
+            "text": self.server.transcript,
+            "bytes_received": received,
+            "chunks": chunks,
+            "upload_time": body_done - started,
+        }).encode()
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _read_chunked(self) -> Tuple[int, int]:
+        received = chunks = 0
+        while True:
+            size = int(self.rfile.readline().split(b";")[0].strip(), 16)
+            if size == 0:
+                self.rfile.readline()
+                return received, chunks
+            received += len(self.rfile.read(size))
+            self.rfile.readline()
+            chunks += 1
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class MockSTTServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, port: int = 8765, transcript: str = "Salom", delay: float = 0.0, status: int = 200,
+                 verbose: bool = False):
+        super().__init__(("127.0.0.1", port), MockSTTHandler)
+        self.transcript = transcript
+        # Задержку и код ответа можно менять на лету, имитируя медленный/упавший сервис
+        self.delay = delay
+        self.status = status
+        self.verbose = verbose
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/stt"
+
+    def start(self) -> 'MockSTTServer':
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-in for a chunked STT endpoint")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--transcript", default="Salom")
+    parser.add_argument("--delay", type=float, default=0.0, help="Processing delay in seconds")
+    parser.add_argument("--status", type=int, default=200, help="HTTP status to answer with")
+    args = parser.parse_args()
+
+    server = MockSTTServer(args.port, args.transcript, args.delay, args.status, verbose=True)
+    print(f"Mock STT listening on {server.url}")
+    server.serve_forever()
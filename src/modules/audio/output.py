@@ -0,0 +1,231 @@
+import concurrent.futures
+import queue
+import threading
+from typing import Dict, Iterable, Optional, Tuple, Union
+
+import numpy as np
+from pydub import AudioSegment
+
+try:
+    import sounddevice
+except (ImportError, OSError):  # без PortAudio воспроизведение недоступно
+    sounddevice = None
+
+# Приоритеты: звук с более высоким приоритетом приглушает все, что ниже
+SPEECH = 30
+EFFECT = 20
+FILLER = 10
+
+
+def decode_file(path: str, sample_rate: int, channels: int = 1) -> np.ndarray:
+    """Decodes any ffmpeg-readable file into interleaved 16-bit PCM."""
+    audio = AudioSegment.from_file(path).set_frame_rate(sample_rate).set_channels(channels).set_sample_width(2)
+    return np.frombuffer(audio.raw_data, dtype=np.int16)
+
+
+class Playback:
+    """One sound in the mixer.
+
+    The source is either a decoded clip (int16 samples) or a stream such as
+    PCMPlayer that fills each block itself. ``future`` resolves to True when
+    a clip has played to the end and to False when it was stopped.
+    """
+
+    def __init__(self, source, priority: int, volume: float, sample_rate: int, ramp_frames: int):
+        self.source = source
+        self.sample_rate = sample_rate
+        self.priority = priority
+        self.volume = volume
+        self.is_stream = not isinstance(source, np.ndarray)
+        self.position = 0
+        self.gain = volume
+        self.step = 1.0 / max(ramp_frames, 1)
+        self.stopping = False
+        self.finished = False
+        self.future = concurrent.futures.Future()
+
+    @property
+    def audible(self) -> bool:
+        if self.finished or self.stopping:
+            return False
+        return self.source.started if self.is_stream else True
+
+    @property
+    def done(self) -> bool:
+        return self.future.done()
+
+    def stop(self, fade_ms: float = 0) -> None:
+        """Fades the sound out over ``fade_ms`` (0 - at the next block) and drops it."""
+        if fade_ms:
+            self.step = 1.0 / max(int(fade_ms * self.sample_rate / 1000), 1)
+        else:
+            self.gain = 0.0
+        self.stopping = True
+
+    def cancel(self) -> None:
+        self.stop(0)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Blocks until the sound is over; True if it played to the end."""
+        return self.future.result(timeout)
+
+    def read(self, n: int, scratch: bytearray) -> np.ndarray:
+        if self.is_stream:
+            view = memoryview(scratch)[:n * 2]
+            self.source.fill(view)
+            return np.frombuffer(view, dtype=np.int16)
+        samples = self.source[self.position:self.position + n]
+        self.position += len(samples)
+        return samples
+
+    @property
+    def exhausted(self) -> bool:
+        return not self.is_stream and self.position >= len(self.source)
+
+
+class AudioOutput:
+    """The process-wide audio output: one persistent stream and a mixer.
+
+    Every sound goes through here - TTS (PCMPlayer streams attached with
+    ``attach``), filler clips, effects and the greeting - so the device is
+    opened once and nothing blocks its caller: ``play`` returns a Playback
+    whose future completes when the sound ends. Clips are decoded once and
+    kept in memory (``load``/``preload``). While a sound is audible, every
+    sound with a lower priority is ducked to ``duck_gain``; gain changes
+    are ramped over ``ramp_ms`` to avoid clicks. The audio callback never
+    takes a lock: the voice list is swapped as a whole and finished voices
+    are resolved on a separate thread.
+    """
+
+    def __init__(self, sample_rate: int = 24000, channels: int = 1, block_duration: float = 0.02,
+                 duck_gain: float = 0.3, ramp_ms: float = 50, device=None):
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.blocksize = int(block_duration * sample_rate)
+        self.duck_gain = duck_gain
+        self.ramp_frames = int(ramp_ms * sample_rate / 1000)
+        self.device = device
+        self.clips: Dict[str, np.ndarray] = {}
+        self._voices: Tuple[Playback, ...] = ()
+        self._lock = threading.Lock()
+        self._finished = queue.SimpleQueue()
+        self._mix = np.zeros(self.blocksize * channels, dtype=np.float32)
+        self._scratch = bytearray(self.blocksize * channels * 2)
+        self._stream = None
+        threading.Thread(target=self._resolve_loop, name="audio-output", daemon=True).start()
+
+    def open(self) -> None:
+        if self._stream is not None:
+            return
+        if sounddevice is None:
+            raise RuntimeError("sounddevice is not installed, audio output is unavailable")
+        self._stream = sounddevice.RawOutputStream(
+            samplerate=self.sample_rate,
+            channels=self.channels,
+            dtype="int16",
+            blocksize=self.blocksize,
+            latency="low",
+            device=self.device,
+            callback=self._callback
+        )
+        self._stream.start()
+
+    def load(self, path: str) -> np.ndarray:
+        """Returns the decoded clip, decoding it only the first time."""
+        clip = self.clips.get(path)
+        if clip is None:
+            clip = decode_file(path, self.sample_rate, self.channels)
+            with self._lock:
+                self.clips[path] = clip
+        return clip
+
+    def preload(self, paths: Iterable[str]) -> None:
+        for path in paths:
+            try:
+                self.load(path)
+            except Exception as e:
+                print(f"Не удалось загрузить {path}: {e}")
+
+    def _add(self, playback: Playback) -> Playback:
+        self.open()
+        with self._lock:
+            self._voices = self._voices + (playback,)
+        return playback
+
+    def play(self, clip: Union[str, np.ndarray], priority: int = EFFECT, volume: float = 1.0) -> Playback:
+        """Starts a clip (a path or decoded samples) and returns at once."""
+        samples = self.load(clip) if isinstance(clip, str) else clip
+        return self._add(Playback(samples, priority, volume, self.sample_rate, self.ramp_frames))
+
+    def attach(self, source, priority: int = SPEECH, volume: float = 1.0) -> Playback:
+        """Mixes a stream source (``fill(out)`` and ``started``) until the returned Playback is stopped."""
+        return self._add(Playback(source, priority, volume, self.sample_rate, self.ramp_frames))
+
+    def stop_all(self, below: Optional[int] = None, fade_ms: float = 0) -> None:
+        """Stops every clip (streams stay attached), or only those with priority below ``below``."""
+        for playback in self._voices:
+            if not playback.is_stream and (below is None or playback.priority < below):
+                playback.stop(fade_ms)
+
+    def _callback(self, outdata, frames, time_info, status):
+        n = frames * self.channels
+        if len(self._mix) < n:
+            # Только если устройство попросило блок больше обычного
+            self._mix = np.zeros(n, dtype=np.float32)
+            self._scratch = bytearray(n * 2)
+        mix = self._mix[:n]
+        mix[:] = 0
+        voices = self._voices
+        top = max((v.priority for v in voices if v.audible), default=None)
+
+        for voice in voices:
+            if voice.finished:
+                continue
+            ducked = top is not None and voice.priority < top
+            target = 0.0 if voice.stopping else voice.volume * (self.duck_gain if ducked else 1.0)
+            delta = target - voice.gain
+            limit = voice.step * frames
+            gain = target if abs(delta) <= limit else voice.gain + limit * np.sign(delta)
+            samples = voice.read(n, self._scratch) if not voice.stopping or voice.gain > 0 else ()
+            if len(samples):
+                if gain == voice.gain:
+                    mix[:len(samples)] += samples * gain
+                else:
+                    mix[:len(samples)] += samples * np.linspace(voice.gain, gain, len(samples), dtype=np.float32)
+            voice.gain = gain
+            if (voice.stopping and gain == 0.0) or voice.exhausted:
+                voice.finished = True
+                self._finished.put(voice)
+
+        out = np.frombuffer(outdata, dtype=np.int16)
+        np.clip(mix, -32768, 32767, out=mix)
+        out[:n] = mix
+
+    def _resolve_loop(self) -> None:
+        while True:
+            voice = self._finished.get()
+            with self._lock:
+                self._voices = tuple(v for v in self._voices if v is not voice)
+            if not voice.future.done():
+                voice.future.set_result(not voice.stopping)
+
+    def close(self) -> None:
+        for playback in self._voices:
+            playback.cancel()
+        if self._stream is not None:
+            self._stream.stop()
+            self._stream.close()
+            self._stream = None
+
+
+_output: Optional[AudioOutput] = None
+_output_lock = threading.Lock()
+
+
+def audio_output() -> AudioOutput:
+    """The shared AudioOutput; created on first use."""
+    global _output
+    with _output_lock:
+        if _output is None:
+            _output = AudioOutput()
+        return _output
@@ -0,0 +1,183 @@
+import threading
+import time
+from typing import Callable, Optional
+
+import numpy as np
+
+from src.modules.audio.output import SPEECH, AudioOutput, Playback, audio_output
+
+
+class PCMRing:
+    """Single-producer/single-consumer byte ring for 16-bit PCM.
+
+    The producer (TTS download) only moves ``_head`` and the audio callback
+    only moves ``_tail``, so the real-time callback never takes a lock.
+    ``clear`` may be called from any thread: it only records where the
+    cleared data ends, and the callback skips up to there on its next read.
+    ``write`` blocks while the ring is full; the callback never blocks.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._data = np.zeros(capacity, dtype=np.uint8)
+        self._head = 0
+        self._tail = 0
+        self._cleared = 0
+        self._space = threading.Event()
+
+    def __len__(self) -> int:
+        """Bytes left to play, not counting data already cleared."""
+        return self._head - max(self._tail, self._cleared)
+
+    def write(self, data, cancelled: Callable[[], bool]) -> None:
+        view = np.frombuffer(data, dtype=np.uint8)
+        while len(view) and not cancelled():
+            # Очищенные байты занимают место, пока callback их не пропустит
+            free = self.capacity - (self._head - self._tail)
+            if free == 0:
+                self._space.clear()
+                self._space.wait(0.05)
+                continue
+            n = min(free, len(view))
+            pos = self._head % self.capacity
+            first = min(n, self.capacity - pos)
+            self._data[pos:pos + first] = view[:first]
+            self._data[:n - first] = view[first:n]
+            # Публикуем данные только после копирования
+            self._head += n
+            view = view[n:]
+
+    def read_into(self, out: memoryview) -> int:
+        """Copies up to ``len(out)`` bytes into ``out``; returns how many (consumer side only)."""
+        if self._tail < self._cleared:
+            self._tail = self._cleared
+            self._space.set()
+        n = min(len(out), self._head - self._tail)
+        pos = self._tail % self.capacity
+        first = min(n, self.capacity - pos)
+        target = np.frombuffer(out, dtype=np.uint8)
+        target[:first] = self._data[pos:pos + first]
+        target[first:n] = self._data[:n - first]
+        self._tail += n
+        self._space.set()
+        return n
+
+    def clear(self) -> None:
+        self._cleared = self._head
+
+
+class PCMPlayer:
+    """Low-latency stream of raw 16-bit PCM mixed into the shared AudioOutput.
+
+    The player stays attached to the output for the whole process and is
+    fed from a preallocated ring, so there are no temp files, decoder
+    processes or gaps between network chunks. Each utterance goes ``begin`` ->
+    ``write``... -> ``end`` -> ``wait``; playback starts once ``prebuffer``
+    seconds are queued (with 0, on the first write) or the utterance ended
+    earlier, and ``on_start`` fires at that moment. ``stop`` silences the
+    output immediately.
+    """
+
+    def __init__(self, sample_rate: int = 24000, channels: int = 1, buffer_seconds: float = 30.0,
+                 prebuffer: float = 0.1, output: Optional[AudioOutput] = None, priority: int = SPEECH):
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.frame_bytes = 2 * channels
+        self.prebuffer_bytes = int(prebuffer * sample_rate) * self.frame_bytes
+        self.output = output
+        self.priority = priority
+        self.ring = PCMRing(int(buffer_seconds * sample_rate) * self.frame_bytes)
+        self.underruns = 0
+        self._voice: Optional[Playback] = None
+        self._playing = False
+        self._ended = True
+        self._stopped = False
+        self._drained = threading.Event()
+        self._drained.set()
+        self._on_start: Optional[Callable[[], None]] = None
+        self._first_write: Optional[float] = None
+
+    @property
+    def started(self) -> bool:
+        """True while the current utterance is audible."""
+        return self._playing
+
+    def open(self) -> None:
+        if self._voice is not None:
+            return
+        self.output = self.output or audio_output()
+        if (self.output.sample_rate, self.output.channels) != (self.sample_rate, self.channels):
+            raise ValueError(f"PCMPlayer {self.sample_rate} Hz x{self.channels} does not match the audio output "
+                             f"{self.output.sample_rate} Hz x{self.output.channels}")
+        self._voice = self.output.attach(self, self.priority)
+
+    def fill(self, out: memoryview) -> None:
+        """Called by the AudioOutput mixer for every block."""
+        out = out.cast("B")
+        # Пустое чтение тоже нужно: кольцо применяет clear только на стороне callback
+        n = self.ring.read_into(out if self._playing else out[:0])
+        if n < len(out):
+            out[n:] = bytes(len(out) - n)
+            if self._playing and not self._ended:
+                self.underruns += 1
+        if self._playing and self._ended and len(self.ring) == 0:
+            self._playing = False
+            self._drained.set()
+
+    def begin(self, on_start: Optional[Callable[[], None]] = None) -> None:
+        """Starts a new utterance; leftovers of the previous one are dropped."""
+        self.open()
+        self._playing = False
+        self.ring.clear()
+        self._ended = False
+        self._stopped = False
+        self._on_start = on_start
+        self._first_write = None
+        self._drained.clear()
+
+    def _start_playback(self) -> None:
+        if self._playing or self._stopped:
+            return
+        print(f"Playback start: {len(self.ring)} bytes buffered, "
+              f"{(time.perf_counter() - self._first_write) * 1000:.0f} ms after first data")
+        if self._on_start is not None:
+            self._on_start()
+        self._playing = True
+
+    def write(self, data) -> None:
+        """Queues PCM given as bytes or an int16 array (e.g. a memory map) without decoding."""
+        data = memoryview(data).cast("B")
+        if self._stopped or not len(data):
+            return
+        if self._first_write is None:
+            self._first_write = time.perf_counter()
+        # Порциями: большой чанк не должен заполнить кольцо до старта воспроизведения
+        step = self.prebuffer_bytes or len(data)
+        for i in range(0, len(data), step):
+            self.ring.write(data[i:i + step], lambda: self._stopped)
+            if len(self.ring) >= self.prebuffer_bytes:
+                self._start_playback()
+
+    def end(self) -> None:
+        """No more data for this utterance; short answers start playing now."""
+        self._ended = True
+        if len(self.ring):
+            self._start_playback()
+        if not self._playing:
+            self._drained.set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Blocks until the utterance has played out (or was stopped)."""
+        return self._drained.wait(timeout)
+
+    def stop(self) -> None:
+        self._stopped = True
+        self._playing = False
+        self.ring.clear()
+        self._drained.set()
+
+    def close(self) -> None:
+        self.stop()
+        if self._voice is not None:
+            self._voice.cancel()
+            self._voice = None
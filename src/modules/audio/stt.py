@@ -1,39 +1,122 @@
+import asyncio
+import concurrent.futures
 import os
-import requests
+import time
+import httpx
 from abc import ABC, abstractmethod
-from openai import OpenAI
+from typing import List, Optional, Union
+
+import numpy as np
+from openai import AsyncOpenAI
+
+from src.modules.audio.audio_data import AudioData
+from src.modules.audio.encoding import AudioEncoder, EncodedAudio, create_encoder
+from src.utils.async_runner import AsyncRunner, get_runner
+from src.utils.http import HTTPTransport, get_transport
+from src.utils.latency import LatencyTracker
 
 UZBEKVOICE_API_KEY = os.getenv("UZBEKVOICE_API_KEY")
+UZBEKVOICE_URL = 'https://uzbekvoice.ai/api/v1/stt'
+CHUNKED_STT_URL = os.getenv("CHUNKED_STT_URL", "http://127.0.0.1:8765/stt")
+
+
+class STTStream:
+    """Streaming transcription session fed while the user is still speaking.
+
+    The base implementation does not stream: it ignores ``feed`` and sends the
+    whole utterance from ``finish``, so every provider supports the interface.
+    ``feed`` is called from the capture loop, ``finish`` runs on the event loop.
+    """
+
+    def __init__(self, stt: 'BaseSTT'):
+        self.stt = stt
+
+    def feed(self, samples: np.ndarray) -> None:
+        pass
+
+    async def finish(self, audio: AudioData) -> str:
+        return await self.stt.transcribe(audio)
+
+    def cancel(self) -> None:
+        pass
 
 
 class BaseSTT(ABC):
+    """Speech-to-text provider.
+
+    ``transcribe`` returns the transcript; a failed request (HTTP error,
+    timeout, unexpected response) raises instead of returning text, so an
+    error message can never be mistaken for the user's words.
+    """
+
+    encoder: Optional[AudioEncoder] = None
+    last_encoding: Optional[EncodedAudio] = None
+
     @abstractmethod
-    async def transcribe(self, file_path: str) -> str:
+    async def transcribe(self, audio: Union[AudioData, str]) -> str:
+        pass
+
+    def open_stream(self, sample_rate: int, channels: int = 1) -> STTStream:
+        return STTStream(self)
+
+    def warm_up(self) -> None:
+        """Opens the provider connection ahead of the first phrase; returns at once."""
+        pass
+
+    def close(self) -> None:
+        """Releases pooled connections at shutdown."""
         pass
 
+    @staticmethod
+    def _as_audio(audio: Union[AudioData, str]) -> AudioData:
+        # Путь к файлу оставлен для обратной совместимости
+        if isinstance(audio, str):
+            return AudioData.from_file(audio)
+        return audio
+
+    async def _encode(self, audio: Union[AudioData, str]) -> EncodedAudio:
+        encoder = self.encoder or create_encoder("wav")
+        # Кодирование Opus занимает десятки мс - не держим цикл событий
+        encoded = await asyncio.to_thread(encoder.encode, self._as_audio(audio))
+        self.last_encoding = encoded
+        return encoded
+
 
 class WhisperSTT(BaseSTT):
-    def __init__(self, client: OpenAI):
+    def __init__(self, client: AsyncOpenAI, encoder: Optional[AudioEncoder] = None):
         self.client = client
+        # Whisper принимает ogg/opus - в разы меньше WAV при том же качестве распознавания
+        self.encoder = encoder or create_encoder("opus", bitrate_kbps=24)
 
-    def transcribe(self, file_path: str) -> str:
-        audio_file = open(file_path, "rb")
-        transcription = self.client.audio.transcriptions.create(
+    async def transcribe(self, audio: Union[AudioData, str]) -> str:
+        encoded = await self._encode(audio)
+        transcription = await self.client.audio.transcriptions.create(
             model="whisper-1",
-            file=audio_file
+            file=encoded.as_upload()
         )
         return transcription.text
 
 
 class UzbekVoiceSTT(BaseSTT):
+    def __init__(self, encoder: Optional[AudioEncoder] = None, transport: Optional[HTTPTransport] = None):
+        # Без потерь: uzbekvoice.ai принимает FLAC
+        self.encoder = encoder or create_encoder("flac")
+        self.transport = transport or get_transport()
+
+    def warm_up(self) -> None:
+        # TLS-соединение открываем заранее, а не на первой фразе
+        get_runner().submit(self.transport.awarm_up(UZBEKVOICE_URL))
 
-    def transcribe(self, file_path: str) -> str:
-        url = 'https://uzbekvoice.ai/api/v1/stt'
+    def close(self) -> None:
+        self.transport.close()
+
+    async def transcribe(self, audio: Union[AudioData, str]) -> str:
+        encoded = await self._encode(audio)
         headers = {
             "Authorization": UZBEKVOICE_API_KEY
         }
         files = {
-            "file": open(file_path, "rb"),
+            "file": encoded.as_upload(),
         }
         data = {
             "return_offsets": "true",
@@ -42,11 +125,226 @@ class UzbekVoiceSTT(BaseSTT):
             "blocking": "true",
         }
 
+        response = await self.transport.apost(UZBEKVOICE_URL, headers=headers, files=files, data=data)
+        response.raise_for_status()
+        text = (response.json().get('result') or {}).get('conversation_text')
+        if text is None:
+            raise ValueError(f"Unexpected uzbekvoice.ai response: {response.text[:200]}")
+        return text
+
+
+class ChunkedUploadStream(STTStream):
+    def __init__(self, stt: 'ChunkedHTTPSTT', sample_rate: int, channels: int):
+        super().__init__(stt)
+        self.chunk_size = int(stt.chunk_duration * sample_rate) * channels * 2
+        self.headers = stt.headers(sample_rate, channels)
+        self.loop = stt.runner.loop
+        self._pending = bytearray()
+        self._cancelled = False
+        self._chunks = asyncio.Queue()
+        self._upload = stt.runner.submit(self._run_upload())
+
+    async def _body(self):
+        while True:
+            chunk = await self._chunks.get()
+            if chunk is None:
+                return
+            yield chunk
+
+    async def _run_upload(self) -> httpx.Response:
+        # Тело-генератор уходит с Transfer-Encoding: chunked; повторить его нельзя
+        return await self.stt.transport.apost(self.stt.url, retry=False, headers=self.headers, content=self._body())
+
+    def _put(self, chunk: Optional[bytes]):
+        self.loop.call_soon_threadsafe(self._chunks.put_nowait, chunk)
+
+    def feed(self, samples: np.ndarray) -> None:
+        if self._cancelled:
+            return
+        self._pending += samples.tobytes()
+        if len(self._pending) >= self.chunk_size:
+            self._put(bytes(self._pending))
+            self._pending.clear()
+
+    async def finish(self, audio: AudioData) -> str:
+        if self._pending:
+            self._put(bytes(self._pending))
+            self._pending.clear()
+        self._put(None)
+        response = await asyncio.wrap_future(self._upload)
+        return self.stt.parse_response(response)
+
+    def cancel(self) -> None:
+        self._cancelled = True
+        self._pending.clear()
+        self._upload.cancel()
+
+
+class ChunkedHTTPSTT(BaseSTT):
+    """Uploads raw 16-bit PCM over chunked HTTP while the user is speaking.
+
+    Only the audio after the last full chunk is left to send once the
+    endpointer fires. ``mock_stt_server`` implements the same protocol.
+    """
+
+    def __init__(self, url: str = CHUNKED_STT_URL, language: str = "uz", chunk_duration: float = 0.25,
+                 transport: Optional[HTTPTransport] = None, runner: Optional[AsyncRunner] = None):
+        self.url = url
+        self.language = language
+        self.chunk_duration = chunk_duration
+        self.transport = transport or get_transport()
+        self.runner = runner or get_runner()
+
+    def headers(self, sample_rate: int, channels: int) -> dict:
+        return {
+            "Content-Type": f"audio/L16; rate={sample_rate}; channels={channels}",
+            "X-Language": self.language,
+        }
+
+    @staticmethod
+    def parse_response(response: httpx.Response) -> str:
+        response.raise_for_status()
+        text = response.json().get('text')
+        if text is None:
+            raise ValueError(f"Unexpected STT response: {response.text[:200]}")
+        return text
+
+    def open_stream(self, sample_rate: int, channels: int = 1) -> STTStream:
+        return ChunkedUploadStream(self, sample_rate, channels)
+
+    def warm_up(self) -> None:
+        self.runner.submit(self.transport.awarm_up(self.url))
+
+    def close(self) -> None:
+        self.transport.close()
+
+    async def transcribe(self, audio: Union[AudioData, str]) -> str:
+        audio = self._as_audio(audio)
+        response = await self.transport.apost(
+            self.url,
+            headers=self.headers(audio.sample_rate, audio.channels),
+            content=audio.samples.tobytes()
+        )
+        return self.parse_response(response)
+
+
+class HedgedSTT(BaseSTT):
+    """Sends the utterance to the primary provider and, if it is slow, to the next one.
+
+    Each following provider is fired after ``hedge_delay`` (0 races them
+    all immediately). The first provider that returns a transcript wins and
+    the remaining requests are cancelled; a provider that raises counts as
+    failed, and if all of them fail the last error is raised. With ``hedge_delay=None`` the delay
+    follows the primary's rolling p95, so hedging only kicks in for the slow
+    tail instead of doubling every request.
+    """
+
+    def __init__(self, providers: List[BaseSTT], hedge_delay: Optional[float] = None,
+                 default_delay: float = 1.0, min_delay: float = 0.2, max_delay: float = 3.0, min_samples: int = 5):
+        self.providers = providers
+        self.fixed_delay = hedge_delay
+        self.default_delay = default_delay
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.min_samples = min_samples
+        self.latency = {self._name(provider): LatencyTracker() for provider in providers}
+        self.wins = {self._name(provider): 0 for provider in providers}
+
+    @staticmethod
+    def _name(provider: BaseSTT) -> str:
+        return getattr(provider, "name", type(provider).__name__)
+
+    def hedge_delay(self) -> float:
+        if self.fixed_delay is not None:
+            return self.fixed_delay
+        primary = self.latency[self._name(self.providers[0])]
+        if len(primary.samples) < self.min_samples:
+            return self.default_delay
+        return min(max(primary.p95, self.min_delay), self.max_delay)
+
+    def warm_up(self) -> None:
+        for provider in self.providers:
+            provider.warm_up()
+
+    def close(self) -> None:
+        for provider in self.providers:
+            provider.close()
+
+    async def _timed(self, provider: BaseSTT, audio: AudioData) -> str:
+        tracker = self.latency[self._name(provider)]
+        started = time.perf_counter()
         try:
-            response = requests.post(url, headers=headers, files=files, data=data)
-            if response.status_code == 200:
-                return response.json().get('result').get('conversation_text')
-            else:
-                return f"Request failed with status code {response.status_code}: {response.text}"
-        except requests.exceptions.Timeout:
-            return "Request timed out. The API response took too long to arrive."
+            text = await provider.transcribe(audio)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            tracker.record_error()
+            raise
+        tracker.record(time.perf_counter() - started)
+        return text
+
+    async def transcribe(self, audio: Union[AudioData, str]) -> str:
+        audio = self._as_audio(audio)
+        delay = self.hedge_delay()
+        waiting = list(self.providers)
+        running = {}
+        last_error: Optional[Exception] = None
+
+        try:
+            while waiting or running:
+                if waiting:
+                    provider = waiting.pop(0)
+                    running[asyncio.ensure_future(self._timed(provider, audio))] = provider
+                timeout = delay if waiting else None
+                done, _ = await asyncio.wait(running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    provider = running.pop(task)
+                    if task.exception() is not None:
+                        last_error = task.exception()
+                        print(f"STT {self._name(provider)} failed: {last_error!r}")
+                        continue
+                    self.wins[self._name(provider)] += 1
+                    return task.result()
+            raise last_error
+        finally:
+            for task in running:
+                task.cancel()
+
+    def stats(self) -> dict:
+        return {
+            "hedge_delay": self.hedge_delay(),
+            "wins": dict(self.wins),
+            "providers": {name: tracker.stats() for name, tracker in self.latency.items()},
+        }
+
+
+class STTEngine:
+    """Runs transcriptions on the shared event loop.
+
+    Calls return ``concurrent.futures.Future`` objects so the synchronous
+    assistant loop can start other work (LLM warm-up, filler audio) and
+    collect the transcript later. Each request gets a deadline, and at most
+    ``max_concurrency`` requests are in flight at once.
+    """
+
+    def __init__(self, stt: BaseSTT, deadline: float = 10.0, max_concurrency: int = 2,
+                 runner: Optional[AsyncRunner] = None):
+        self.stt = stt
+        self.deadline = deadline
+        self.runner = runner or get_runner()
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def _limited(self, coro, stream: Optional[STTStream] = None) -> str:
+        async with self._semaphore:
+            try:
+                return await asyncio.wait_for(coro, self.deadline)
+            except (asyncio.TimeoutError, asyncio.CancelledError):
+                if stream is not None:
+                    stream.cancel()
+                raise
+
+    def transcribe(self, audio: AudioData) -> concurrent.futures.Future:
+        return self.runner.submit(self._limited(self.stt.transcribe(audio)))
+
+    def finish(self, stream: STTStream, audio: AudioData) -> concurrent.futures.Future:
+        return self.runner.submit(self._limited(stream.finish(audio), stream))
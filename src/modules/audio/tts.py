@@ -1,110 +1,154 @@
 import argparse
 import os
-import time
-import io
 import threading
-import queue
-import tempfile
-from typing import Optional
+import time
+import wave
+from typing import Callable, Iterator, Optional
 
 from openai import OpenAI
 from dotenv import load_dotenv
-from pydub import AudioSegment
-from pydub.playback import play
 from abc import ABC, abstractmethod
 import azure.cognitiveservices.speech as speechsdk
 
+from src.modules.audio.output import audio_output
+from src.modules.audio.playback import PCMPlayer
+from src.utils.latency import LatencyTracker
+
 
 class BaseTTS(ABC):
+    # Вызывается перед тем, как зазвучит ответ (например, чтобы убрать звук-заполнитель)
+    on_audio_start: Optional[Callable[[], None]] = None
+    sample_rate = 24000
+    # PCM последней полностью озвученной фразы (None, если ее прервали)
+    last_pcm: Optional[bytes] = None
+    player: Optional[PCMPlayer] = None
+
     @abstractmethod
     def synthesize(self, text: str) -> bytes:
         pass
 
+    @abstractmethod
+    def stream_pcm(self, text: str) -> Iterator[bytes]:
+        """Yields 16-bit mono PCM at ``sample_rate`` without playing it."""
+        pass
+
+    def cache_params(self) -> dict:
+        """Everything besides the text that changes the rendered audio."""
+        return {"provider": type(self).__name__}
+
+    def stop(self) -> None:
+        """Interrupts playback started by synthesize (barge-in)."""
+        if self.player is not None:
+            self.player.stop()
+
+    def play_file(self, path: str) -> None:
+        """Plays pre-synthesized speech, e.g. a cached answer; ``stop`` interrupts it."""
+        # Файл декодируется один раз и дальше живет в памяти AudioOutput
+        self._play_samples(audio_output().load(path))
+
+    def _play_samples(self, samples) -> None:
+        if self.player is None:
+            self.player = PCMPlayer(sample_rate=self.sample_rate)
+        self.player.begin(on_start=self._audio_started)
+        self.player.write(samples)
+        self.player.end()
+        self.player.wait()
+
+    def _audio_started(self) -> None:
+        if self.on_audio_start is not None:
+            self.on_audio_start()
+
+    def _play_stream(self, text: str, player: PCMPlayer, stopped: threading.Event) -> None:
+        """Plays ``stream_pcm`` as it arrives: playback starts on the first chunk, not on completion."""
+        stopped.clear()
+        self.last_pcm = None
+        player.begin(on_start=self._audio_started)
+        rendered = bytearray()
+
+        try:
+            for data in self.stream_pcm(text):
+                if stopped.is_set():
+                    break
+                rendered += data
+                player.write(data)
+            else:
+                # Поток без исключения - значит, фраза синтезирована целиком
+                if not stopped.is_set():
+                    self.last_pcm = bytes(rendered)
+        except Exception as e:
+            print(f"Ошибка при получении аудио: {e}")
+
+        player.end()
+        player.wait()
+        if player.underruns:
+            print("Playback underruns:", player.underruns)
+
 
 load_dotenv()
 
 OPENAI_TOKEN = os.getenv("OPENAI_API_KEY")
 client = OpenAI(api_key=OPENAI_TOKEN)
 
-# Очередь для передачи аудио данных между потоками
-audio_queue = queue.Queue()
-
 
 class WhisperTTS(BaseTTS):
-    def __init__(self, client: OpenAI):
+    def __init__(self, client: OpenAI, player: Optional[PCMPlayer] = None, voice: str = "echo"):
         self.client = client
-
-    @staticmethod
-    def play_audio():
-        buffer = io.BytesIO()
-        not_first_execution = 0
-        while True:
-            try:
-                chunk = audio_queue.get(timeout=1)
-                if chunk is None:  # Сигнал о завершении
-                    print("Speach finished")
-                    break
-                buffer.write(chunk)
-
-                # Если накоплено достаточно данных, начинаем воспроизведение
-                print("Buffer: ", buffer.tell())
-                if buffer.tell() > 64000 or not_first_execution:  # Примерно 1 секунда аудио
-                    buffer.seek(0)
-                    # Используем временный файл для обхода проблем с форматом
-                    with tempfile.NamedTemporaryFile(suffix='.mp3', delete=False) as temp_file:
-                        temp_file.write(buffer.getvalue())
-                        temp_file_path = temp_file.name
-
-                    # Воспроизводим аудио
-                    audio = AudioSegment.from_mp3(temp_file_path)
-                    print("Play sound time:", time.perf_counter())
-                    play(audio)
-
-                    # Удаляем временный файл
-                    os.unlink(temp_file_path)
-                    not_first_execution = 1
-                    # Очищаем буфер и начинаем накапливать снова
-                    buffer = io.BytesIO()
-            except queue.Empty:
-                continue
-            except Exception as e:
-                print(f"Ошибка при воспроизведении: {e}")
+        self.voice = voice
+        # tts-1 отдает "pcm" как 24 кГц 16 бит моно без заголовка
+        self.player = player or PCMPlayer(sample_rate=24000)
+        self.stopped = threading.Event()
+
+    def stop(self) -> None:
+        self.stopped.set()
+        self.player.stop()
+
+    def cache_params(self) -> dict:
+        return {"provider": "openai", "model": "tts-1", "voice": self.voice}
+
+    def stream_pcm(self, text: str) -> Iterator[bytes]:
+        with self.client.audio.speech.with_streaming_response.create(
+                model="tts-1",
+                voice=self.voice,
+                input=text,
+                response_format="pcm",
+        ) as response:
+            # Небольшие чанки: воспроизведение начинается с первых килобайт
+            yield from response.iter_bytes(chunk_size=4096)
 
     def synthesize(self, text: str) -> bytes:
-        # Запускаем поток воспроизведения
-        play_thread = threading.Thread(target=self.play_audio)
-        play_thread.start()
+        self._play_stream(text, self.player, self.stopped)
 
-        try:
-            with client.audio.speech.with_streaming_response.create(
-                    model="tts-1",
-                    voice="echo",
-                    input=text,
-            ) as response:
-                with open("audio_files/output.mp3", mode="wb") as f:
-                    for data in response.iter_bytes(chunk_size=64000):
-                        f.write(data)
-                        audio_queue.put(data)
-        except Exception as e:
-            print(f"Ошибка при получении аудио: {e}")
 
-        # Сигнализируем о завершении потока воспроизведения
-        audio_queue.put(None)
-        play_thread.join()
+class AzureTTS(BaseTTS):
+    """Azure neural TTS streamed into PCMPlayer.
 
+    One long-lived synthesizer with a pre-opened connection renders into
+    memory; ``stream_pcm`` pulls audio from an AudioDataStream while the
+    service is still synthesizing, so playback starts on the first chunk
+    instead of after ``speak_ssml_async().get()``. ``synthesizer`` and
+    ``audio_stream`` can be replaced (see ``mock_azure``) to test the
+    streaming path without Azure.
+    """
 
-class AzureTTS:
-    def __init__(self):
+    def __init__(self, synthesizer=None, audio_stream: Optional[Callable] = None,
+                 player: Optional[PCMPlayer] = None, chunk_size: int = 4800):
         self.speech_key = os.getenv('SPEECH_KEY')
         self.speech_region = os.getenv('SPEECH_REGION')
         self.args = self.parse_arguments()
         self.voice_name = self.args.voice
-        self.speech_config = self._create_speech_config()
-        self.audio_config = speechsdk.audio.AudioOutputConfig(use_default_speaker=True)
-        self.speech_synthesizer = speechsdk.SpeechSynthesizer(
-            speech_config=self.speech_config,
-            audio_config=self.audio_config
-        )
+        self.chunk_size = chunk_size  # 100 мс при 24 кГц
+        self.player = player or PCMPlayer(sample_rate=self.sample_rate)
+        self.stopped = threading.Event()
+        self.first_chunk_latency = LatencyTracker()
+        self.connection = None
+        if synthesizer is None:
+            speech_config = self._create_speech_config()
+            synthesizer = speechsdk.SpeechSynthesizer(speech_config=speech_config, audio_config=None)
+            # TLS и websocket поднимаем сейчас, а не на первой фразе
+            self.connection = speechsdk.Connection.from_speech_synthesizer(synthesizer)
+            self.connection.open(True)
+        self.synthesizer = synthesizer
+        self.audio_stream = audio_stream or speechsdk.AudioDataStream
 
         self._warm_up()
 
@@ -113,31 +157,60 @@ class AzureTTS:
             subscription=self.speech_key,
             region=self.speech_region
         )
+        # Сырой PCM без заголовка: чанки сразу идут в плеер
         speech_config.set_speech_synthesis_output_format(
-            speechsdk.SpeechSynthesisOutputFormat.Riff24Khz16BitMonoPcm
+            speechsdk.SpeechSynthesisOutputFormat.Raw24Khz16BitMonoPcm
         )
         speech_config.speech_synthesis_voice_name = self.voice_name
         return speech_config
 
     def _warm_up(self):
         """Выполняет 'прогрев' системы, синтезируя короткую фразу."""
-        warm_up_text = "Asistent yoqildi"
-        warm_up_ssml = self._create_ssml(warm_up_text, self.args.rate, self.args.pitch)
-        self.speech_synthesizer.speak_ssml_async(warm_up_ssml).get()
+        try:
+            for _ in self.stream_pcm("Asistent yoqildi"):
+                pass
+        except RuntimeError as e:
+            print(f"Прогрев Azure не удался: {e}")
+            return
         print("Система инициализирована и готова к быстрой работе.")
 
-    def synthesize(self, text: str) -> speechsdk.SpeechSynthesisResult:
-        ssml = self._create_ssml(text, self.args.rate, self.args.pitch)
-        speech_synthesizer = self._get_speech_synthesizer(self.args.output)
+    def synthesize(self, text: str) -> None:
+        self._play_stream(text, self.player, self.stopped)
+        if self.args.output and self.last_pcm:
+            self._save_wav(self.last_pcm, self.args.output)
+
+    def stop(self) -> None:
+        self.stopped.set()
+        self.player.stop()
+        self.synthesizer.stop_speaking_async()
 
-        result = speech_synthesizer.speak_ssml_async(ssml).get()
-        self._handle_synthesis_result(result, text, self.args.output)
-        return result
+    def cache_params(self) -> dict:
+        return {"provider": "azure", "voice": self.voice_name, "rate": self.args.rate, "pitch": self.args.pitch}
+
+    def stream_pcm(self, text: str) -> Iterator[bytes]:
+        ssml = self._create_ssml(text, self.args.rate, self.args.pitch)
+        started = time.perf_counter()
+        # start_speaking возвращается, как только сервис начал отдавать аудио
+        result = self.synthesizer.start_speaking_ssml_async(ssml).get()
+        stream = self.audio_stream(result)
+        buffer = bytearray(self.chunk_size)
+        first = True
+        while True:
+            filled = stream.read_data(buffer)
+            if filled == 0:
+                break
+            if first:
+                self.first_chunk_latency.record(time.perf_counter() - started)
+                print(f"Azure first audio: {(time.perf_counter() - started) * 1000:.0f} ms")
+                first = False
+            yield bytes(buffer[:filled])
+        # Обрезанный поток не должен выглядеть как готовая фраза (кэш, last_pcm)
+        self._handle_stream_status(stream, text)
 
     def _create_ssml(self, text: str, rate: str, pitch: str) -> str:
         return f"""
         <speak version="1.0" xmlns="http://www.w3.org/2001/10/synthesis" xml:lang="uz-UZ">
-          <voice name="{self.speech_config.speech_synthesis_voice_name}">
+          <voice name="{self.voice_name}">
             <prosody rate="{rate}" pitch="{pitch}">
               {text}
             </prosody>
@@ -145,24 +218,22 @@ class AzureTTS:
         </speak>
         """
 
-    def _get_speech_synthesizer(self, output_file: Optional[str]) -> speechsdk.SpeechSynthesizer:
-        if output_file:
-            audio_config = speechsdk.audio.AudioOutputConfig(filename=output_file)
-            return speechsdk.SpeechSynthesizer(
-                speech_config=self.speech_config,
-                audio_config=audio_config
-            )
-        return self.speech_synthesizer
+    def _save_wav(self, pcm: bytes, output_file: str) -> None:
+        with wave.open(output_file, "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(self.sample_rate)
+            wav.writeframes(pcm)
+        print(f"Audio saved to {output_file}")
 
     @staticmethod
-    def _handle_synthesis_result(result: speechsdk.SpeechSynthesisResult, text: str, output_file: Optional[str]):
-        if result.reason == speechsdk.ResultReason.SynthesizingAudioCompleted:
-            print(f"Speech synthesized for text: [{text}]")
-            if output_file:
-                print(f"Audio saved to {output_file}")
-        elif result.reason == speechsdk.ResultReason.Canceled:
-            cancellation_details = result.cancellation_details
-            print(f"Speech synthesis canceled: {cancellation_details.reason}")
+    def _handle_stream_status(stream, text: str):
+        if stream.status == speechsdk.StreamStatus.Canceled:
+            details = stream.cancellation_details
+            raise RuntimeError(f"Speech synthesis canceled: {details.reason} {details.error_details}")
+        if stream.status != speechsdk.StreamStatus.AllData:
+            raise RuntimeError(f"Speech synthesis ended with status {stream.status}")
+        print(f"Speech synthesized for text: [{text}]")
 
     @staticmethod
     def parse_arguments():
@@ -171,4 +242,5 @@ class AzureTTS:
         parser.add_argument("--rate", default="1.18", help="Speech rate")
         parser.add_argument("--pitch", default="0%", help="Speech pitch")
         parser.add_argument("--output", help="Output audio_files file path")
-        return parser.parse_args()
+        # parse_known_args: класс создается и из других утилит со своими аргументами
+        return parser.parse_known_args()[0]
@@ -0,0 +1,248 @@
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Iterable, Iterator, List, Optional
+
+import numpy as np
+
+from src.modules.audio.playback import PCMPlayer
+from src.modules.audio.tts import BaseTTS
+
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", "core/audio_files/tts_cache")
+
+
+def normalize_text(text: str) -> str:
+    # Регистр и пунктуацию не трогаем - они меняют интонацию
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def cache_key(params: dict, text: str) -> str:
+    payload = json.dumps({**params, "text": normalize_text(text)}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode()).hexdigest()[:32]
+
+
+class TTSCache:
+    """Content-addressed on-disk cache of rendered speech.
+
+    Each entry is a raw 16-bit PCM file named by the hash of the provider
+    settings and normalized text. Recently used entries stay open as
+    read-only memory maps, so a hit is served straight from the page cache
+    without reading or decoding. The directory is kept under ``max_bytes``
+    by evicting the least recently used entries.
+    """
+
+    def __init__(self, directory: str = TTS_CACHE_DIR, max_bytes: int = 200 * 1024 * 1024, hot_entries: int = 64):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hot_entries = hot_entries
+        self.index_path = os.path.join(directory, "index.json")
+        os.makedirs(directory, exist_ok=True)
+        self.entries: 'OrderedDict[str, dict]' = OrderedDict()
+        self._maps: 'OrderedDict[str, np.memmap]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+        self._load_index()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.pcm")
+
+    def _load_index(self) -> None:
+        if not os.path.exists(self.index_path):
+            return
+        try:
+            with open(self.index_path, encoding="utf-8") as f:
+                index = json.load(f)
+            entries = sorted(index.items(), key=lambda item: item[1]["last_used"])
+        except (OSError, ValueError, KeyError, AttributeError, TypeError) as e:
+            # Испорченный индекс не должен мешать запуску: начинаем с пустого кэша
+            print(f"TTS cache index ignored: {e}")
+            return
+        for key, entry in entries:
+            if os.path.exists(self._path(key)):
+                self.entries[key] = entry
+
+    def save_index(self) -> None:
+        with self._lock:
+            self._save_index()
+
+    def _save_index(self) -> None:
+        # Под блокировкой: параллельные put из пула рендера пишут индекс по очереди
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, ensure_ascii=False)
+        os.replace(tmp_path, self.index_path)
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(entry["size"] for entry in self.entries.values())
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        """Returns the cached samples as a read-only memory map, or None."""
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is None or entry["size"] == 0:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            entry["last_used"] = time.time()
+            samples = self._maps.get(key)
+            if samples is None:
+                samples = np.memmap(self._path(key), dtype=np.int16, mode="r")
+                self._maps[key] = samples
+                while len(self._maps) > self.hot_entries:
+                    self._maps.popitem(last=False)
+            self._maps.move_to_end(key)
+            self.hits += 1
+            self.bytes_saved += entry["size"]
+            return samples
+
+    def put(self, key: str, pcm: bytes, sample_rate: int, text: str = "") -> None:
+        if not pcm:
+            return
+        pcm = pcm[:len(pcm) - len(pcm) % 2]
+        with self._lock:
+            self._maps.pop(key, None)
+        # Атомарная запись: недописанный файл никогда не попадет в кэш;
+        # у каждого потока свой временный файл, даже если фраза одна и та же
+        tmp_path = f"{self._path(key)}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(pcm)
+        os.replace(tmp_path, self._path(key))
+        with self._lock:
+            self.entries[key] = {"size": len(pcm), "sample_rate": sample_rate, "text": text,
+                                 "last_used": time.time()}
+            self.entries.move_to_end(key)
+            self._evict()
+            self._save_index()
+
+    def _evict(self) -> None:
+        total = self.total_bytes
+        while total > self.max_bytes and len(self.entries) > 1:
+            key, entry = self.entries.popitem(last=False)
+            self._maps.pop(key, None)
+            total -= entry["size"]
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "total_bytes": self.total_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "bytes_saved": self.bytes_saved,
+        }
+
+
+class CachedTTS(BaseTTS):
+    """Plays phrases from TTSCache and renders only the ones it has not heard before.
+
+    A miss goes through the wrapped provider's own streaming playback, so it
+    is no slower than before; the PCM it played is stored for next time.
+    A hit is written from the memory map straight into the PCM player.
+    """
+
+    def __init__(self, tts: BaseTTS, cache: Optional[TTSCache] = None, player: Optional[PCMPlayer] = None):
+        self.tts = tts
+        self.sample_rate = tts.sample_rate
+        self.cache = cache or TTSCache()
+        self.player = player or getattr(tts, "player", None) or PCMPlayer(sample_rate=tts.sample_rate)
+        # Номер остановки: рендер, во время которого вызвали stop, в кэш не попадает
+        self._stops = 0
+
+    def cache_params(self) -> dict:
+        return {**self.tts.cache_params(), "sample_rate": self.sample_rate}
+
+    def stream_pcm(self, text: str) -> Iterator[bytes]:
+        key = cache_key(self.cache_params(), text)
+        samples = self.cache.get(key)
+        if samples is not None:
+            yield samples
+            return
+        stops = self._stops
+        rendered = bytearray()
+        # Прерванный или отмененный синтез бросает исключение, закрытый генератор - GeneratorExit:
+        # в обоих случаях до put не доходим
+        for data in self.tts.stream_pcm(text):
+            rendered += data
+            yield data
+        if stops == self._stops:
+            self.cache.put(key, bytes(rendered), self.sample_rate, normalize_text(text))
+
+    def synthesize(self, text: str):
+        key = cache_key(self.cache_params(), text)
+        samples = self.cache.get(key)
+
+        if samples is None:
+            stops = self._stops
+            self.tts.on_audio_start = self.on_audio_start
+            self.tts.synthesize(text)
+            # last_pcm остается None, если фразу прервали или синтез отменили
+            if self.tts.last_pcm and stops == self._stops:
+                self.cache.put(key, self.tts.last_pcm, self.sample_rate, normalize_text(text))
+            return
+
+        print(f"TTS cache hit: {text!r}")
+        self._play_samples(samples)
+
+    def stop(self) -> None:
+        self._stops += 1
+        self.player.stop()
+        self.tts.stop()
+
+    def stats(self) -> dict:
+        return self.cache.stats()
+
+
+def load_phrases(path: str) -> List[str]:
+    """One phrase per line; empty lines and # comments are skipped."""
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+
+def warm_up(tts: BaseTTS, phrases: Iterable[str], cache: Optional[TTSCache] = None) -> TTSCache:
+    """Pre-renders phrases into the cache with the given provider."""
+    cache = cache or TTSCache()
+    params = {**tts.cache_params(), "sample_rate": tts.sample_rate}
+    for phrase in phrases:
+        key = cache_key(params, phrase)
+        if key in cache.entries:
+            continue
+        started = time.perf_counter()
+        cache.put(key, b"".join(tts.stream_pcm(phrase)), tts.sample_rate, normalize_text(phrase))
+        print(f"Rendered in {time.perf_counter() - started:.2f} s: {phrase}")
+    print(cache.stats())
+    return cache
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pre-render phrases into the TTS cache")
+    parser.add_argument("phrases", nargs="?", help="Text file with one phrase per line")
+    parser.add_argument("--seeds", help="Response cache JSON whose answers should be rendered too")
+    parser.add_argument("--tts", choices=["whisper", "azure"], default="azure")
+    parser.add_argument("--cache-dir", default=TTS_CACHE_DIR)
+    args, _ = parser.parse_known_args()
+
+    if args.tts == "whisper":
+        from src.modules.audio.tts import WhisperTTS, client
+        provider = WhisperTTS(client)
+    else:
+        from src.modules.audio.tts import AzureTTS
+        provider = AzureTTS()
+    phrases = load_phrases(args.phrases) if args.phrases else []
+    if args.seeds:
+        from src.modules.intelligence.response_cache import seed_sentences
+        # Те же предложения, что уйдут в TTS при попадании в кэш ответов
+        phrases += seed_sentences(args.seeds)
+    warm_up(provider, phrases, TTSCache(args.cache_dir))
@@ -0,0 +1,141 @@
+import concurrent.futures
+import queue
+import threading
+import time
+from typing import List, Optional
+
+from src.modules.audio.playback import PCMPlayer
+from src.modules.audio.tts import BaseTTS
+from src.utils.latency import LatencyTracker
+
+
+class _Job:
+    def __init__(self, text: str, cancelled: threading.Event):
+        self.text = text
+        self.cancelled = cancelled
+        self.pieces = queue.Queue()
+
+
+class TTSPipeline:
+    """Renders upcoming sentences while the current one is playing.
+
+    ``submit`` hands each sentence to a render pool (``BaseTTS.stream_pcm``)
+    and a writer thread feeds the renders into one continuous PCMPlayer
+    utterance strictly in submission order, so sentence N+1 is usually
+    ready before sentence N has finished playing. At most ``lookahead``
+    sentences wait behind the one being written; ``submit`` blocks beyond
+    that. ``cancel`` drops everything at once (barge-in). The silence
+    between consecutive sentences is measured and reported in ms.
+    """
+
+    def __init__(self, tts: BaseTTS, player: Optional[PCMPlayer] = None, lookahead: int = 2):
+        self.tts = tts
+        self.player = player or getattr(tts, "player", None) or PCMPlayer(sample_rate=tts.sample_rate)
+        self.lookahead = lookahead
+        self.gaps = LatencyTracker(window=200)
+        self.last_gaps: List[float] = []
+        self._render_pool = concurrent.futures.ThreadPoolExecutor(lookahead + 1, thread_name_prefix="tts-render")
+        self._slots = threading.Semaphore(lookahead + 1)
+        self._jobs = queue.Queue()
+        self._cancelled = threading.Event()
+        self._writer: Optional[threading.Thread] = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def begin(self) -> None:
+        # Новый ответ - новые флаг и очередь: потоки прерванного ответа их не увидят
+        self._cancelled = threading.Event()
+        self._slots = threading.Semaphore(self.lookahead + 1)
+        self._jobs = queue.Queue()
+        self.last_gaps = []
+        self.player.begin(on_start=self._audio_started)
+        self._writer = threading.Thread(target=self._write_loop, args=(self._jobs, self._slots, self._cancelled),
+                                        name="tts-writer", daemon=True)
+        self._writer.start()
+
+    def _audio_started(self) -> None:
+        if self.tts.on_audio_start is not None:
+            self.tts.on_audio_start()
+
+    def submit(self, text: str) -> None:
+        while not self._slots.acquire(timeout=0.1):
+            if self.cancelled:
+                return
+        if self.cancelled:
+            return
+        job = _Job(text, self._cancelled)
+        self._jobs.put(job)
+        self._render_pool.submit(self._render, job)
+
+    def _render(self, job: _Job) -> None:
+        pcm = None
+        try:
+            pcm = self.tts.stream_pcm(job.text)
+            for data in pcm:
+                if job.cancelled.is_set():
+                    break
+                job.pieces.put(data)
+        except Exception as e:
+            print(f"Ошибка при получении аудио: {e}")
+        finally:
+            if pcm is not None and hasattr(pcm, "close"):
+                pcm.close()
+            job.pieces.put(None)
+
+    @staticmethod
+    def _next_piece(job: _Job):
+        while not job.cancelled.is_set():
+            try:
+                return job.pieces.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return None
+
+    def _write_loop(self, jobs: queue.Queue, slots: threading.Semaphore, cancelled: threading.Event) -> None:
+        bytes_per_second = self.player.sample_rate * self.player.frame_bytes
+        playback_end = None  # когда доиграет уже записанное в плеер
+        while not cancelled.is_set():
+            job = jobs.get()
+            if job is None:
+                break
+            first = True
+            while True:
+                piece = self._next_piece(job)
+                if piece is None:
+                    break
+                if first and playback_end is not None:
+                    gap = max(time.perf_counter() - playback_end, 0.0)
+                    self.gaps.record(gap)
+                    self.last_gaps.append(gap)
+                first = False
+                self.player.write(piece)
+            if self.player.started:
+                playback_end = time.perf_counter() + len(self.player.ring) / bytes_per_second
+            slots.release()
+        if not cancelled.is_set():
+            self.player.end()
+
+    def finish(self) -> bool:
+        """Waits until every submitted sentence has played; False if cancelled."""
+        self._jobs.put(None)
+        if self._writer is not None:
+            self._writer.join()
+        self.player.wait()
+        if self.last_gaps:
+            print("Sentence gaps, ms:", [round(gap * 1000) for gap in self.last_gaps])
+        return not self.cancelled
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+        self._jobs.put(None)
+        self.player.stop()
+
+    def stats(self) -> dict:
+        return {
+            "sentences": self.gaps.calls,
+            "gap_p50_ms": None if self.gaps.p50 is None else self.gaps.p50 * 1000,
+            "gap_p95_ms": None if self.gaps.p95 is None else self.gaps.p95 * 1000,
+            "underruns": self.player.underruns,
+        }
@@ -1,4 +1,6 @@
+import ast
 import json
+import operator
 import os
 
 tools = [
@@ -18,6 +20,38 @@ tools = [
     }
 ]
 
+groq_tools = [
+    {
+        "type": "function",
+        "function": {
+            "name": "calculate",
+            "description": "Evaluate a mathematical expression",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "expression": {
+                        "type": "string",
+                        "description": "The mathematical expression to evaluate",
+                    }
+                },
+                "required": ["expression"],
+            },
+        },
+    }
+]
+
+OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: operator.pow,
+    ast.USub: operator.neg,
+    ast.UAdd: operator.pos,
+}
+
 
 def visual_analysis():
     """Evaluate a mathematical expression"""
@@ -27,3 +61,26 @@ def visual_analysis():
     except:
         return json.dumps({"result": "error to camera"})
 
+
+
+
+def _evaluate(node):
+    if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)):
+        return node.value
+    if isinstance(node, ast.BinOp) and type(node.op) in OPERATORS:
+        left, right = _evaluate(node.left), _evaluate(node.right)
+        if isinstance(node.op, ast.Pow) and abs(right) > 100:
+            raise ValueError("exponent too large")
+        return OPERATORS[type(node.op)](left, right)
+    if isinstance(node, ast.UnaryOp) and type(node.op) in OPERATORS:
+        return OPERATORS[type(node.op)](_evaluate(node.operand))
+    raise ValueError("unsupported expression")
+
+
+def calculate(expression: str):
+    """Evaluate a mathematical expression"""
+    # Только арифметика: eval на тексте от модели небезопасен
+    try:
+        return json.dumps({"result": _evaluate(ast.parse(expression, mode="eval").body)})
+    except Exception as e:
+        return json.dumps({"error": f"Invalid expression: {e}"})
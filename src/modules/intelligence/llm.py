@@ -1,28 +1,237 @@
 import os
-import json
+import threading
+import time
 from abc import ABC, abstractmethod
+from typing import Callable, List, Optional
 
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
 from groq import Groq
 
 from src.modules.intelligence import funcs
+from src.modules.intelligence.memory import ConversationMemory, chat_summarizer
+from src.modules.intelligence.response_cache import CacheEntry, ResponseCache, normalize
+from src.modules.intelligence.segmenter import SentenceSegmenter
+from src.modules.intelligence.tools import ToolRuntime
 from src.modules.vision.scenes import draw_scenario
 
 OPENAI_TOKEN = os.getenv("OPENAI_API_KEY")
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 OPENAI_ASSISTANT_ID = os.getenv("OPENAI_ASSISTANT_ID")
 openai_client = OpenAI(api_key=OPENAI_TOKEN)
+async_openai_client = AsyncOpenAI(api_key=OPENAI_TOKEN)
 groq_client = Groq(api_key=GROQ_API_KEY)
-MODEL = 'lama3-groq-70b-8192-tool-use-preview'
+MODEL = os.getenv("GROQ_MODEL", "llama-3.3-70b-versatile")
 
 
 class BaseLLM(ABC):
+    # True если последний ответ вызвал инструмент - такой ответ нельзя кэшировать
+    used_tools = False
+
     @abstractmethod
     def generate_response(self, input_text: str) -> str:
         pass
 
+    def cancel(self) -> None:
+        """Asks a running generate_response to stop as soon as possible."""
+        pass
+
+    def warm_up(self) -> None:
+        """Re-opens the provider connection while STT is still running."""
+        pass
+
+    def reset_session(self) -> None:
+        """Called when a wake-word session ends; the next visitor starts fresh."""
+        pass
+
+
+class ChatCompletionLLM(BaseLLM):
+    """Streaming chat-completions backend shared by OpenAI and Groq.
+
+    ``generate_response`` returns a generator of sentences cut by
+    SentenceSegmenter as tokens arrive. Tool calls are collected from the
+    stream, executed by ``tool_runtime`` and the follow-up completion is
+    streamed the same way, for up to ``max_tool_rounds`` rounds.
+    """
+
+    max_tool_rounds = 3
+    keepalive = 30  # Примерно столько живет простаивающее соединение
+
+    def __init__(self, client, model: str, memory: ConversationMemory, tool_schemas: List[dict],
+                 tool_runtime: ToolRuntime):
+        self.client = client
+        self.model = model
+        self.memory = memory
+        self.tool_schemas = tool_schemas
+        self.tool_runtime = tool_runtime
+        self._last_request_time = 0.0
+        self._cancelled = threading.Event()
+        self._stream = None
+        self._turn = 0
+        self._discarded_turn = None
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+        # Закрытие потока обрывает соединение; читающий поток завершится на
+        # следующем чанке или на ошибке чтения (см. _chunks)
+        stream = self._stream
+        if stream is not None:
+            try:
+                stream.close()
+            except Exception:
+                pass
+
+    def abort(self) -> None:
+        """Cancels the turn and keeps nothing of it in memory (another backend answers instead)."""
+        self._discarded_turn = self._turn
+        self.cancel()
+
+    def reset_session(self) -> None:
+        self.memory.reset()
+
+    def warm_up(self) -> None:
+        if time.perf_counter() - self._last_request_time < self.keepalive:
+            return
+        self._last_request_time = time.perf_counter()
+        try:
+            self.client.models.retrieve(self.model)
+        except Exception as e:
+            print(f"LLM warm-up failed: {e}")
+
+    def generate_response(self, content: str, role="user"):
+        self.memory.append({"role": role, "content": content})
+        return self.respond()
+
+    def respond(self, on_first_token: Optional[Callable[[], None]] = None):
+        """Streams an answer to the conversation as it stands in memory."""
+        # Сбрасываем отмену до начала итерации, чтобы перебивание во время
+        # ожидания первого чанка не потерялось
+        self._cancelled.clear()
+        self.used_tools = False
+        self._turn += 1
+        return self._stream_response(self._turn, on_first_token)
+
+    def _is_cancelled(self, turn: int) -> bool:
+        # Запрос прошлого хода, отмененный до ответа сервера, не должен ожить
+        return self._cancelled.is_set() or turn != self._turn
+
+    def _create_stream(self, allow_tools: bool = True):
+        self._last_request_time = time.perf_counter()
+        self._stream = self.client.chat.completions.create(
+            model=self.model,
+            messages=self.memory.messages(),
+            stream=True,
+            tools=self.tool_schemas,
+            # В последнем раунде модель должна ответить текстом, а не новым вызовом
+            tool_choice="auto" if allow_tools else "none"
+        )
+        return self._stream
+
+    def _stream_response(self, turn: int, on_first_token: Optional[Callable[[], None]] = None):
+        stream = self._create_stream()
+        spoken = []
+        said_before = 0  # часть ответа, уже записанная в историю вместе с вызовом инструментов
+        segmenter = SentenceSegmenter()
+
+        try:
+            for tool_round in range(self.max_tool_rounds + 1):
+                called_tools = {}
+                for chunk in self._chunks(stream, turn):
+                    if self._is_cancelled(turn):
+                        print("Response generation cancelled")
+                        return
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta
+                    if on_first_token is not None and (delta.content or delta.tool_calls):
+                        on_first_token()
+                        on_first_token = None
+
+                    if delta.content:
+                        # Каждое законченное предложение сразу уходит в TTS
+                        for sentence in segmenter.feed(delta.content):
+                            spoken.append(sentence)
+                            yield sentence
+                    if delta.tool_calls:
+                        self._collect_tool_calls(delta.tool_calls, called_tools)
+                if self._is_cancelled(turn):
+                    print("Response generation cancelled")
+                    return
+
+                if not called_tools:
+                    break
+
+                # Фраза перед вызовом инструмента звучит, пока он выполняется
+                rest = segmenter.flush()
+                if rest:
+                    spoken.append(rest)
+                    yield rest
+                stream.close()
+                self._process_tool_calls(
+                    [called_tools[index] for index in sorted(called_tools)],
+                    " ".join(spoken[said_before:]) or None
+                )
+                said_before = len(spoken)
+                if self._is_cancelled(turn):
+                    print("Response generation cancelled")
+                    return
+                stream = self._create_stream(allow_tools=tool_round + 1 < self.max_tool_rounds)
+
+            rest = segmenter.flush()
+            if rest:
+                print("Sentence chunk:", rest)
+                spoken.append(rest)
+                yield rest
+        finally:
+            # Закрытие потока обрывает генерацию, токены больше не оплачиваются.
+            # При перебивании в историю попадает только уже отданная часть ответа
+            stream.close()
+            # Пустой ответ и ответ, отброшенный при переключении на другой сервер, в историю не пишем
+            if (spoken or self.used_tools) and turn != self._discarded_turn:
+                self.memory.append({"role": "assistant", "content": " ".join(spoken[said_before:])})
+            print("Response generation completed")
+
+    def _chunks(self, stream, turn: int):
+        # cancel() закрывает поток из другого потока, и чтение обрывается ошибкой
+        # соединения; для отмененного хода это обычное завершение
+        try:
+            yield from stream
+        except Exception:
+            if not self._is_cancelled(turn):
+                raise
+
+    @staticmethod
+    def _collect_tool_calls(tool_call_deltas, called_tools):
+        # Аргументы приходят фрагментами; параллельные вызовы различаются по index
+        for call in tool_call_deltas:
+            tool = called_tools.setdefault(call.index, ["", "", ""])
+            if call.id:
+                tool[0] = call.id
+            if call.function is not None:
+                if call.function.name:
+                    tool[1] = call.function.name
+                if call.function.arguments:
+                    tool[2] += call.function.arguments
+
+    def _process_tool_calls(self, called_tools, content=None):
+        print("Processing tool calls:", called_tools)
+        self.used_tools = True
+        # Инструменты одного ответа выполняются параллельно
+        tool_messages = self.tool_runtime.run(called_tools)
+        self._add_tool_calls_to_conversation(called_tools, tool_messages, content)
+
+    def _add_tool_calls_to_conversation(self, called_tools, tool_messages, content=None):
+        self.memory.append({
+            'role': 'assistant',
+            'content': content,
+            'tool_calls': [
+                {'id': id_call, 'type': 'function', 'function': {'name': name, 'arguments': args or '{}'}}
+                for id_call, name, args in called_tools
+            ]
+        })
+        self.memory.extend(tool_messages)
+
 
-class OpenAIGPT(BaseLLM):
+class OpenAIGPT(ChatCompletionLLM):
     def __init__(self):
         print("Initializing OpenAI Chat Completion")
         self.instruction = """
@@ -63,100 +272,23 @@ Har qanday zo'ravonlik yoki noqonuniy harakatlarni rad eting.
 
 Eslatma: Siz sun'iy intellektsiz va sizning vazifangiz - odamlarga quvonch ulashish. Doimo axloq qoidalariga rioya qiling va atrofdagilarning hurmatini qozona bilish.
         """
-        self.conversation = [
-            {"role": "system", "content": self.instruction},
-            {"role": "user", "content": "Arif!"},
-            {"role": "assistant", "content": "Ha, eshtaman!"}
-        ]
-
-    def generate_response(self, content: str, role="user") -> str:
-        self.conversation.append({"role": role, "content": content})
-
-        stream = openai_client.chat.completions.create(
-            model="gpt-4o-2024-08-06",
-            messages=self.conversation,
-            stream=True,
-            tools=funcs.tools,
-            tool_choice="auto"
+        memory = ConversationMemory(
+            # Отступы в инструкции - лишние токены в каждом запросе
+            "\n".join(line.strip() for line in self.instruction.strip().splitlines()),
+            preamble=[
+                {"role": "user", "content": "Arif!"},
+                {"role": "assistant", "content": "Ha, eshtaman!"}
+            ],
+            summarizer=chat_summarizer(openai_client, "gpt-4o-mini")
         )
-
-        full_response = ""
-        sentence_chunk = ""
-        called_tools = []
-        is_first_sentence = True
-
-        for chunk in stream:
-            delta = chunk.choices[0].delta
-
-            if delta.content:
-                sentence_chunk += delta.content
-                if len(sentence_chunk) > 15 and delta.content in [".", "!", "?", ";", ":"] and is_first_sentence:
-                    is_first_sentence = False
-                    yield sentence_chunk
-                    full_response += sentence_chunk
-                    sentence_chunk = ""
-
-            elif delta.tool_calls:
-                self._handle_tool_calls(delta, called_tools)
-            else:
-                if called_tools:
-                    sentence_chunk = self._process_tool_calls(called_tools)
-                    full_response = sentence_chunk
-
-                if sentence_chunk:
-                    print("Sentence chunk:", sentence_chunk)
-                    yield sentence_chunk
-
-        self.conversation.append({"role": "assistant", "content": full_response})
-        print("Response generation completed")
-
-    @staticmethod
-    def _handle_tool_calls(delta, called_tools):
-        if delta.tool_calls[0].function.name:
-            called_tools.append([delta.tool_calls[0].id, delta.tool_calls[0].function.name, ''])
-        called_tools[-1][-1] += delta.tool_calls[0].function.arguments
-
-    def _process_tool_calls(self, called_tools):
-        print("Processing tool calls:", called_tools)
-        available_functions = {
-            "visual_analysis": funcs.visual_analysis,
-            "draw": draw_scenario,
-        }
-
-        for tool in called_tools:
-            id_call, name, args = tool
-            function_to_call = available_functions[name]
-            function_response = function_to_call()
-
-            self._add_tool_call_to_conversation(id_call, name, args, function_response)
-
-        return self._get_response_after_tool_calls()
-
-    def _add_tool_call_to_conversation(self, id_call, name, args, function_response):
-        self.conversation.extend([
-            {
-                'role': 'assistant',
-                'content': None,
-                'tool_calls': [{'id': id_call, 'type': 'function', 'function': {'name': name, 'arguments': args}}]
-            },
-            {
-                "role": "tool",
-                "name": name,
-                "content": function_response,
-                "tool_call_id": id_call,
-            }
-        ])
-
-    def _get_response_after_tool_calls(self):
-        call_response = openai_client.chat.completions.create(
-            model="gpt-4o-2024-08-06",
-            messages=self.conversation,
-        )
-        return call_response.choices[0].message.content
+        tool_runtime = ToolRuntime()
+        tool_runtime.register("visual_analysis", funcs.visual_analysis, timeout=5)
+        tool_runtime.register("draw", draw_scenario, timeout=2)
+        super().__init__(openai_client, "gpt-4o-2024-08-06", memory, funcs.tools, tool_runtime)
 
     def add_message(self):
 
-        self.conversation.append({
+        self.memory.append({
             "role": "user",
             "content": [
                 {
@@ -176,77 +308,88 @@ Eslatma: Siz sun'iy intellektsiz va sizning vazifangiz - odamlarga quvonch ulash
         pass
 
 
+class CachedLLM(BaseLLM):
+    """Answers frequent questions from a ResponseCache before calling the LLM.
+
+    On a hit the cached sentences are returned without a request and the
+    turn is still written to the wrapped LLM's memory. ``last_hit`` holds
+    the matched entry so the caller can play its pre-synthesized audio.
+    With ``learn=True`` completed answers are learned as well, but only for
+    questions that open a conversation (no history yet) and are at least
+    ``min_learn_chars`` long: a reply to "ha" depends on what came before
+    and must not be replayed to the next person who says it.
+    """
+
+    def __init__(self, llm: BaseLLM, cache: Optional[ResponseCache] = None, learn: bool = False,
+                 min_learn_chars: int = 12):
+        self.llm = llm
+        self.cache = cache or ResponseCache.load()
+        self.learn = learn
+        self.min_learn_chars = min_learn_chars
+        self.last_hit: Optional[CacheEntry] = None
+        self._cancelled = threading.Event()
+
+    def generate_response(self, content: str, *args, **kwargs):
+        self._cancelled.clear()
+        # Поиск делаем сразу, а не при первой итерации: вызывающему нужен last_hit
+        self.last_hit = self.cache.lookup(content)
+        if self.last_hit is not None:
+            memory = getattr(self.llm, "memory", None)
+            if memory is not None:
+                memory.extend([
+                    {"role": "user", "content": content},
+                    {"role": "assistant", "content": self.last_hit.answer},
+                ])
+            return iter(self.last_hit.chunks)
+        learnable = self._learnable(content)
+        return self._learn(content, self.llm.generate_response(content, *args, **kwargs), learnable)
+
+    def _learnable(self, content: str) -> bool:
+        if not self.learn or len(normalize(content)) < self.min_learn_chars:
+            return False
+        # Ответ в середине разговора зависит от контекста
+        memory = getattr(self.llm, "memory", None)
+        return memory is not None and not memory.turns and not memory.summary
+
+    def _learn(self, content: str, responses, learnable: bool):
+        chunks = []
+        try:
+            for chunk in responses:
+                chunks.append(chunk)
+                yield chunk
+        finally:
+            if hasattr(responses, "close"):
+                responses.close()
+        # Оборванный ответ не запоминаем
+        if learnable and not self.llm.used_tools and not self._cancelled.is_set():
+            self.cache.store(content, chunks)
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+        self.llm.cancel()
+
+    def warm_up(self) -> None:
+        self.llm.warm_up()
+
+    def reset_session(self) -> None:
+        print("Response cache:", self.cache.stats())
+        self.llm.reset_session()
+
+    def stats(self) -> dict:
+        stats = {"response_cache": self.cache.stats()}
+        if hasattr(self.llm, "stats"):
+            stats["llm"] = self.llm.stats()
+        return stats
+
+
 # =============================================================================================
 
-class GroqLLM(BaseLLM):
+class GroqLLM(ChatCompletionLLM):
     def __init__(self):
-        self.messages = [
-            {
-                "role": "system",
-                "content": "You are a helpfull Assistant and You should speak only in Russian."
-            },
-        ]
-        self.tools = [
-            {
-                "type": "function",
-                "function": {
-                    "name": "calculate",
-                    "description": "Evaluate a mathematical expression",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "expression": {
-                                "type": "string",
-                                "description": "The mathematical expression to evaluate",
-                            }
-                        },
-                        "required": ["expression"],
-                    },
-                },
-            }
-        ]
-
-    def generate_response(self, user_prompt: str):
-        self.messages.append({
-            "role": "user",
-            "content": user_prompt,
-        })
-        response = groq_client.chat.completions.create(
-            model=MODEL,
-            messages=self.messages,
-            tools=self.tools,
-            tool_choice="auto",
-            max_tokens=500
+        memory = ConversationMemory(
+            "You are a helpfull Assistant and You should speak only in Russian.",
+            summarizer=chat_summarizer(groq_client, "llama-3.1-8b-instant")
         )
-
-        response_message = response.choices[0].message
-        tool_calls = response_message.tool_calls
-        if tool_calls:
-            available_functions = {
-                "calculate": funcs,
-            }
-            self.messages.append(response_message)
-            for tool_call in tool_calls:
-                function_name = tool_call.function.name
-                function_to_call = available_functions[function_name]
-                function_args = json.loads(tool_call.function.arguments)
-                function_response = function_to_call(
-                    expression=function_args.get("expression")
-                )
-                self.messages.append(
-                    {
-                        "tool_call_id": tool_call.id,
-                        "role": "tool",
-                        "name": function_name,
-                        "content": function_response,
-                    }
-                )
-            second_response = groq_client.chat.completions.create(
-                model=MODEL,
-                messages=self.messages
-            )
-            print("Response second: ")
-            return second_response.choices[0].message.content
-        else:
-            print("Response: ")
-            return response.choices[0].message.content
+        tool_runtime = ToolRuntime()
+        tool_runtime.register("calculate", funcs.calculate, timeout=1)
+        super().__init__(groq_client, MODEL, memory, funcs.groq_tools, tool_runtime)
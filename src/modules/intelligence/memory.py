@@ -0,0 +1,159 @@
+import json
+import threading
+from typing import Callable, List, Optional
+
+try:
+    import tiktoken
+except ImportError:  # грубая оценка по символам
+    tiktoken = None
+
+MESSAGE_OVERHEAD = 4  # служебные токены роли/разделителей на каждое сообщение
+SUMMARY_PROMPT = ("Suhbatning qisqacha mazmunini o'zbek tilida 2-3 gapda yozing. "
+                  "Faqat keyingi javoblar uchun kerakli faktlarni qoldiring.")
+_encoding = None
+
+
+def count_tokens(text: str) -> int:
+    global _encoding
+    if tiktoken is not None and _encoding is None:
+        try:
+            _encoding = tiktoken.get_encoding("o200k_base")
+        except Exception:
+            pass
+    if _encoding is not None:
+        return len(_encoding.encode(text))
+    # Для узбекского/кириллицы в среднем ~3 символа на токен
+    return len(text) // 3 + 1
+
+
+def message_tokens(message) -> int:
+    if not isinstance(message, dict):
+        message = message.model_dump(exclude_none=True)
+    content = message.get("content") or ""
+    if not isinstance(content, str):
+        content = json.dumps(content, ensure_ascii=False)
+    tokens = MESSAGE_OVERHEAD + count_tokens(content)
+    for call in message.get("tool_calls") or []:
+        function = call.get("function", {})
+        tokens += count_tokens(function.get("name", "") + function.get("arguments", ""))
+    return tokens
+
+
+class ConversationMemory:
+    """Chat history kept within a prompt token budget.
+
+    Messages are grouped into turns, each starting with a user message, so
+    tool-call messages are never separated from their turn. When the prompt
+    exceeds ``budget_tokens``, the oldest turns (beyond the last
+    ``keep_last_turns``) leave the window; with a ``summarizer`` they are
+    folded into a running summary on a background thread. The system prompt
+    stays first and unchanged, so the provider's prompt-prefix cache keeps
+    hitting; the summary goes in a separate message after it.
+
+    The budget is soft: the last ``keep_last_turns`` turns are never evicted,
+    so a long recent exchange can push the prompt over it. Tokens are
+    counted with tiktoken's ``o200k_base``; without it (or its encoding file)
+    a rough estimate of ~3 characters per token is used instead.
+    """
+
+    def __init__(self, system_prompt: str, preamble: Optional[List[dict]] = None, budget_tokens: int = 3000,
+                 keep_last_turns: int = 2, summarizer: Optional[Callable[[str, List[dict]], str]] = None):
+        self.system = {"role": "system", "content": system_prompt}
+        self.preamble = list(preamble or [])
+        self.budget_tokens = budget_tokens
+        self.keep_last_turns = keep_last_turns
+        self.summarizer = summarizer
+        self.summary = ""
+        self.turns: List[List] = []
+        self.last_prompt_tokens = 0
+        self._lock = threading.Lock()
+        self._summary_thread: Optional[threading.Thread] = None
+        self._session = 0
+
+    def append(self, message) -> None:
+        role = message.get("role") if isinstance(message, dict) else message.role
+        with self._lock:
+            if role == "user" or not self.turns:
+                self.turns.append([])
+            self.turns[-1].append(message)
+
+    def extend(self, messages) -> None:
+        for message in messages:
+            self.append(message)
+
+    def _fixed_messages(self) -> List[dict]:
+        messages = [self.system]
+        if self.summary:
+            messages.append({"role": "system", "content": f"Avvalgi suhbat qisqacha: {self.summary}"})
+        return messages + self.preamble
+
+    def messages(self) -> List:
+        """Builds the prompt for the next request and records its size."""
+        with self._lock:
+            fixed = self._fixed_messages()
+            fixed_tokens = sum(message_tokens(m) for m in fixed)
+            turn_tokens = [sum(message_tokens(m) for m in turn) for turn in self.turns]
+
+            evicted = []
+            while fixed_tokens + sum(turn_tokens) > self.budget_tokens and len(self.turns) > self.keep_last_turns:
+                evicted.extend(self.turns.pop(0))
+                turn_tokens.pop(0)
+
+            self.last_prompt_tokens = fixed_tokens + sum(turn_tokens)
+            prompt = fixed + [m for turn in self.turns for m in turn]
+
+        if evicted:
+            self._summarize_later(evicted)
+        print(f"Prompt tokens: {self.last_prompt_tokens} ({len(self.turns)} turns in window)")
+        return prompt
+
+    def _summarize_later(self, evicted: List) -> None:
+        if self.summarizer is None:
+            return
+        previous = self._summary_thread
+        session = self._session
+
+        def run():
+            if previous is not None:
+                previous.join()
+            try:
+                summary = self.summarizer(self.summary, evicted)
+            except Exception as e:
+                print(f"Conversation summary failed: {e}")
+                return
+            with self._lock:
+                if session == self._session:
+                    self.summary = summary
+
+        self._summary_thread = threading.Thread(target=run, daemon=True)
+        self._summary_thread.start()
+
+    def reset(self) -> None:
+        """Forgets the session (e.g. when the wake-word session ends)."""
+        with self._lock:
+            self.turns = []
+            self.summary = ""
+            self._session += 1
+
+
+def chat_summarizer(client, model: str) -> Callable[[str, List], str]:
+    """Summarizer for ConversationMemory backed by a chat-completions client."""
+
+    def summarize(previous: str, messages: List) -> str:
+        lines = [previous] if previous else []
+        for message in messages:
+            if not isinstance(message, dict):
+                message = message.model_dump(exclude_none=True)
+            if message.get("role") in ("user", "assistant") and isinstance(message.get("content"), str):
+                lines.append(f"{message['role']}: {message['content']}")
+        response = client.chat.completions.create(
+            model=model,
+            messages=[
+                {"role": "system", "content": SUMMARY_PROMPT},
+                {"role": "user", "content": "\n".join(lines)},
+            ],
+            max_tokens=200
+        )
+        return response.choices[0].message.content.strip()
+
+    return summarize
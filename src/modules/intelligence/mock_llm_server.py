@@ -0,0 +1,150 @@
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class MockLLMHandler(BaseHTTPRequestHandler):
+    """Stand-in for an OpenAI-compatible chat-completions endpoint.
+
+    Streams a fixed answer word by word as server-sent events, waiting
+    ``first_token_delay`` before the first token and ``token_delay`` between
+    tokens, so routing and failover can be exercised offline with the
+    regular OpenAI/Groq clients pointed at ``url``.
+
+    Each round in ``tool_rounds`` answers one streamed request that allows
+    tools with those tool calls instead of text; their arguments arrive in
+    fragments of ``argument_chunk`` characters, like a real stream.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        # client.models.retrieve(...) при прогреве соединения
+        model = self.path.rstrip("/").rsplit("/", 1)[-1]
+        self._send_json(200, {"id": model, "object": "model", "created": 0, "owned_by": "mock"})
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        self.server.requests += 1
+        self.server.last_request = request
+        if self.server.status != 200:
+            self._send_json(self.server.status, {"error": {"message": "mock failure", "type": "server_error"}})
+            return
+        if not request.get("stream"):
+            self._send_json(200, self._completion(request.get("model", "mock"), self.server.answer))
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        time.sleep(self.server.first_token_delay)
+        try:
+            if self.server.tool_rounds and request.get("tools") and request.get("tool_choice") != "none":
+                self._stream_tool_calls(request.get("model", "mock"), self.server.tool_rounds.pop(0))
+                return
+            for i, word in enumerate(self.server.answer.split(" ")):
+                if i:
+                    time.sleep(self.server.token_delay)
+                self._send_event(self._chunk(request.get("model", "mock"), {"content": ("" if i == 0 else " ") + word}))
+            self._send_event(self._chunk(request.get("model", "mock"), {}, "stop"))
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # клиент отменил запрос
+        self.close_connection = True
+
+    def _stream_tool_calls(self, model: str, calls):
+        step = self.server.argument_chunk
+        for index, (name, arguments) in enumerate(calls):
+            # Первый фрагмент несет id и имя, дальше только куски аргументов
+            self._send_event(self._chunk(model, {"tool_calls": [{
+                "index": index, "id": f"call_{self.server.requests}_{index}", "type": "function",
+                "function": {"name": name, "arguments": ""},
+            }]}))
+            for start in range(0, len(arguments), step):
+                time.sleep(self.server.token_delay)
+                self._send_event(self._chunk(model, {"tool_calls": [{
+                    "index": index, "function": {"arguments": arguments[start:start + step]},
+                }]}))
+        self._send_event(self._chunk(model, {}, "tool_calls"))
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+        self.close_connection = True
+
+    @staticmethod
+    def _chunk(model: str, delta: dict, finish_reason=None) -> dict:
+        return {
+            "id": "chatcmpl-mock", "object": "chat.completion.chunk", "created": int(time.time()), "model": model,
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+        }
+
+    @staticmethod
+    def _completion(model: str, answer: str) -> dict:
+        return {
+            "id": "chatcmpl-mock", "object": "chat.completion", "created": int(time.time()), "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": answer}, "finish_reason": "stop"}],
+        }
+
+    def _send_event(self, payload: dict):
+        self.wfile.write(f"data: {json.dumps(payload, ensure_ascii=False)}\n\n".encode())
+        self.wfile.flush()
+
+    def _send_json(self, status: int, payload: dict):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class MockLLMServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, port: int = 8766, answer: str = "Salom! Men Arifman. Sizga qanday yordam bera olaman?",
+                 first_token_delay: float = 0.2, token_delay: float = 0.02, status: int = 200,
+                 verbose: bool = False, tool_rounds=None, argument_chunk: int = 4):
+        super().__init__(("127.0.0.1", port), MockLLMHandler)
+        self.answer = answer
+        # Задержки и код ответа можно менять на лету, имитируя медленный/упавший сервис
+        self.first_token_delay = first_token_delay
+        self.token_delay = token_delay
+        self.status = status
+        self.verbose = verbose
+        # Раунды вызовов инструментов: список [(имя, аргументы JSON), ...] на каждый запрос
+        self.tool_rounds = list(tool_rounds or [])
+        self.argument_chunk = argument_chunk
+        self.requests = 0
+        self.last_request = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/v1"
+
+    def start(self) -> 'MockLLMServer':
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-in for an OpenAI-compatible chat endpoint")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--answer", default="Salom! Men Arifman. Sizga qanday yordam bera olaman?")
+    parser.add_argument("--first-token-delay", type=float, default=0.2, help="Seconds before the first token")
+    parser.add_argument("--token-delay", type=float, default=0.02, help="Seconds between tokens")
+    parser.add_argument("--status", type=int, default=200, help="HTTP status to answer with")
+    parser.add_argument("--tool-call", nargs=2, action="append", metavar=("NAME", "ARGUMENTS"),
+                        help="Answer the first request that allows tools with this call (repeatable)")
+    args = parser.parse_args()
+
+    server = MockLLMServer(args.port, args.answer, args.first_token_delay, args.token_delay, args.status,
+                           verbose=True, tool_rounds=[args.tool_call] if args.tool_call else None)
+    print(f"Mock LLM listening on {server.url}")
+    server.serve_forever()
@@ -0,0 +1,207 @@
+import argparse
+import json
+import os
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Iterable, List, Optional
+
+import numpy as np
+
+from src.modules.intelligence.segmenter import SentenceSegmenter
+
+RESPONSE_CACHE_PATH = os.getenv("RESPONSE_CACHE_PATH", "core/audio_files/response_cache.json")
+APOSTROPHES = "‘’ʻʼ`´"
+
+
+def normalize(text: str) -> str:
+    """Lowercases and strips punctuation so "Sen kimsan?" and "sen kimsan" match."""
+    text = text.lower()
+    for apostrophe in APOSTROPHES:
+        text = text.replace(apostrophe, "'")
+    text = re.sub(r"[^\w\s']", " ", text)
+    return " ".join(text.split())
+
+
+class HashingVectorizer:
+    """Character n-gram vectors hashed into a fixed number of buckets.
+
+    No vocabulary to fit, so entries can be added one by one. Character
+    n-grams tolerate the spelling noise STT produces ("qanaqa"/"qanday").
+    """
+
+    def __init__(self, n_features: int = 4096, ngram_range=(2, 4)):
+        self.n_features = n_features
+        self.ngram_range = ngram_range
+
+    def transform(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.n_features, dtype=np.float32)
+        padded = f" {text} "
+        for n in range(self.ngram_range[0], self.ngram_range[1] + 1):
+            for i in range(len(padded) - n + 1):
+                # crc32 стабилен между запусками, в отличие от hash()
+                vector[zlib.crc32(padded[i:i + n].encode()) % self.n_features] += 1
+        np.log1p(vector, out=vector)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+
+class CacheEntry:
+    def __init__(self, question: str, chunks: List[str], vector: np.ndarray, audio_path: Optional[str] = None,
+                 pinned: bool = False):
+        self.question = question
+        self.chunks = chunks
+        self.vector = vector
+        self.audio_path = audio_path
+        # Ответы из файла не вытесняются и не устаревают
+        self.pinned = pinned
+        self.created = time.monotonic()
+        self.hits = 0
+        self.last_hit: Optional[float] = None
+
+    @property
+    def answer(self) -> str:
+        return " ".join(self.chunks)
+
+    def __repr__(self):
+        return f"CacheEntry({self.question!r}, hits={self.hits}, audio={self.audio_path is not None})"
+
+
+class ResponseCache:
+    """Answers to frequent questions matched by transcript similarity.
+
+    ``lookup`` returns the entry whose question is most similar (cosine over
+    hashed character n-grams) if it reaches ``threshold``. Learned entries
+    expire after ``ttl`` seconds and the least recently used are evicted
+    beyond ``max_entries``; entries loaded from the seed file are pinned.
+    """
+
+    def __init__(self, threshold: float = 0.82, ttl: Optional[float] = 6 * 3600, max_entries: int = 256,
+                 vectorizer: Optional[HashingVectorizer] = None):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.vectorizer = vectorizer or HashingVectorizer()
+        self.entries: 'OrderedDict[str, CacheEntry]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._matrix: Optional[np.ndarray] = None
+        self._keys: List[str] = []
+
+    def _index(self):
+        if self._matrix is None:
+            self._keys = list(self.entries)
+            self._matrix = (np.stack([self.entries[key].vector for key in self._keys])
+                            if self._keys else np.zeros((0, self.vectorizer.n_features), dtype=np.float32))
+        return self._keys, self._matrix
+
+    def _expire(self, now: float) -> None:
+        if self.ttl is None:
+            return
+        expired = [key for key, entry in self.entries.items()
+                   if not entry.pinned and now - entry.created > self.ttl]
+        for key in expired:
+            del self.entries[key]
+        if expired:
+            self._matrix = None
+
+    def lookup(self, text: str) -> Optional[CacheEntry]:
+        question = normalize(text)
+        if not question:
+            return None
+        vector = self.vectorizer.transform(question)
+        with self._lock:
+            self._expire(time.monotonic())
+            keys, matrix = self._index()
+            if keys:
+                scores = matrix @ vector
+                best = int(np.argmax(scores))
+                if scores[best] >= self.threshold:
+                    entry = self.entries[keys[best]]
+                    self.entries.move_to_end(keys[best])
+                    entry.hits += 1
+                    entry.last_hit = time.monotonic()
+                    self.hits += 1
+                    print(f"Response cache hit ({scores[best]:.2f}): {entry.question!r}")
+                    return entry
+            self.misses += 1
+            return None
+
+    def store(self, question: str, chunks: List[str], audio_path: Optional[str] = None,
+              pinned: bool = False) -> Optional[CacheEntry]:
+        key = normalize(question)
+        if not key or not chunks:
+            return None
+        entry = CacheEntry(question, list(chunks), self.vectorizer.transform(key), audio_path, pinned)
+        with self._lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            learned = [k for k, e in self.entries.items() if not e.pinned]
+            for evicted in learned[:max(len(self.entries) - self.max_entries, 0)]:
+                del self.entries[evicted]
+            self._matrix = None
+        return entry
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "top": sorted(((e.question, e.hits) for e in self.entries.values()), key=lambda x: -x[1])[:5],
+        }
+
+    @classmethod
+    def load(cls, path: str = RESPONSE_CACHE_PATH, **kwargs) -> 'ResponseCache':
+        """Seeds the cache from a JSON list of {question, alternatives, answer, audio}.
+
+        ``audio`` (a pre-rendered file) is optional: answers are normally
+        pre-rendered into the TTS cache with the configured voice instead.
+        """
+        cache = cls(**kwargs)
+        if not os.path.exists(path):
+            return cache
+        with open(path, encoding="utf-8") as f:
+            seeds = json.load(f)
+        for seed in seeds:
+            chunks = split_answer(seed["answer"])
+            for question in [seed["question"]] + seed.get("alternatives", []):
+                cache.store(question, chunks, seed.get("audio"), pinned=True)
+        print(f"Response cache: {len(cache.entries)} questions loaded from {path}")
+        return cache
+
+
+def split_answer(answer: str) -> List[str]:
+    segmenter = SentenceSegmenter()
+    chunks = segmenter.feed(answer)
+    rest = segmenter.flush()
+    return chunks + [rest] if rest else chunks
+
+
+def seed_sentences(path: str = RESPONSE_CACHE_PATH) -> List[str]:
+    """Every sentence a seed answer is spoken as, for pre-rendering into the TTS cache."""
+    with open(path, encoding="utf-8") as f:
+        seeds = json.load(f)
+    return [chunk for seed in seeds for chunk in split_answer(seed["answer"])]
+
+
+def _print_matches(cache: ResponseCache, queries: Iterable[str]) -> None:
+    for query in queries:
+        entry = cache.lookup(query)
+        print(f"{query!r} -> {entry.answer if entry else None!r}")
+    print(cache.stats())
+
+
+if __name__ == "__main__":
+    # Озвучка ответов: python -m src.modules.audio.tts_cache --seeds <файл> --tts <провайдер>
+    parser = argparse.ArgumentParser(description="Match transcripts against the response cache")
+    parser.add_argument("--seeds", default=RESPONSE_CACHE_PATH, help="JSON file with cached answers")
+    parser.add_argument("--threshold", type=float, default=0.82)
+    parser.add_argument("queries", nargs="*", help="Transcripts to match against the cache")
+    args = parser.parse_args()
+
+    _print_matches(ResponseCache.load(args.seeds, threshold=args.threshold), args.queries)
@@ -0,0 +1,192 @@
+import concurrent.futures
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+from src.modules.intelligence.llm import BaseLLM, ChatCompletionLLM
+from src.modules.intelligence.memory import ConversationMemory
+from src.utils.latency import LatencyTracker
+
+
+class _Attempt:
+    """One backend answering the current turn on its own thread until its first sentence."""
+
+    def __init__(self, name: str, backend: ChatCompletionLLM, on_first_token, on_done):
+        self.name = name
+        self.backend = backend
+        self.started = time.perf_counter()
+        self.first_token_at: Optional[float] = None
+        self.first_sentence = concurrent.futures.Future()
+        self.generator = backend.respond(lambda: on_first_token(self))
+        threading.Thread(target=self._run, args=(on_done,), name=f"llm-{name}", daemon=True).start()
+
+    def _run(self, on_done):
+        # Дальше генератор продолжает читать поток вызывающего: запас не копится
+        try:
+            self.first_sentence.set_result(next(self.generator))
+        except StopIteration:
+            self.first_sentence.set_result(None)
+        except Exception as e:
+            self.first_sentence.set_exception(e)
+        finally:
+            on_done()
+
+    @property
+    def ttft(self) -> Optional[float]:
+        return None if self.first_token_at is None else self.first_token_at - self.started
+
+    def failed(self) -> bool:
+        return self.first_token_at is None and self.first_sentence.done()
+
+    def abort(self):
+        self.backend.abort()
+
+
+class RouterLLM(BaseLLM):
+    """Sends each turn to the backend with the best recent time-to-first-token.
+
+    Backends share one ConversationMemory. If the chosen backend sends no
+    token within ``first_token_deadline`` (or fails), it is aborted and the
+    next one is asked; the last remaining backend is never cut off by the
+    deadline. With ``hedge=True`` the two best backends race and the first
+    token wins. Every ``explore_every`` turns the runner-up goes first so
+    its statistics stay fresh. ``stats()`` exposes TTFT, errors and the
+    recent routing decisions for the admin panel.
+    """
+
+    def __init__(self, backends: Dict[str, ChatCompletionLLM], memory: Optional[ConversationMemory] = None,
+                 first_token_deadline: float = 2.0, hedge: bool = False, explore_every: int = 20,
+                 default_ttft: float = 1.0, min_samples: int = 3):
+        self.backends = backends
+        self.memory = memory or next(iter(backends.values())).memory
+        for backend in backends.values():
+            backend.memory = self.memory
+        self.first_token_deadline = first_token_deadline
+        self.hedge = hedge
+        self.explore_every = explore_every
+        self.default_ttft = default_ttft
+        self.min_samples = min_samples
+        self.latency = {name: LatencyTracker() for name in backends}
+        self.wins = {name: 0 for name in backends}
+        self.decisions = deque(maxlen=50)
+        self.winner: Optional[_Attempt] = None
+        self._turns = 0
+        self._signal = threading.Event()
+        self._cancelled = threading.Event()
+
+    @property
+    def used_tools(self) -> bool:
+        return self.winner is not None and self.winner.backend.used_tools
+
+    def predicted_ttft(self, name: str) -> float:
+        tracker = self.latency[name]
+        ttft = tracker.p50 if len(tracker.samples) >= self.min_samples else self.default_ttft
+        # Каждая ошибка стоит целого дедлайна ожидания
+        return ttft + tracker.error_rate * self.first_token_deadline
+
+    def ranking(self) -> List[str]:
+        order = sorted(self.backends, key=self.predicted_ttft)
+        if self.explore_every and len(order) > 1 and self._turns % self.explore_every == 0:
+            order[0], order[1] = order[1], order[0]
+        return order
+
+    def generate_response(self, content: str, role="user"):
+        self._cancelled.clear()
+        self._turns += 1
+        self.winner = None
+        self.memory.append({"role": role, "content": content})
+        return self._route()
+
+    def _on_first_token(self, attempt: _Attempt):
+        attempt.first_token_at = time.perf_counter()
+        self._signal.set()
+
+    def _start(self, name: str) -> _Attempt:
+        return _Attempt(name, self.backends[name], self._on_first_token, self._signal.set)
+
+    def _choose(self, order: List[str], decision: dict) -> Optional[_Attempt]:
+        pending = list(order)
+        running = [self._start(pending.pop(0))]
+        if self.hedge and pending:
+            running.append(self._start(pending.pop(0)))
+            decision["hedged"] = True
+
+        while running and not self._cancelled.is_set():
+            started = [a for a in running if a.first_token_at is not None]
+            if started:
+                winner = min(started, key=lambda a: a.first_token_at)
+                for attempt in running:
+                    if attempt is not winner:
+                        attempt.abort()
+                return winner
+
+            now = time.perf_counter()
+            for attempt in list(running):
+                last_resort = len(running) == 1 and not pending
+                expired = now - attempt.started > self.first_token_deadline and not last_resort
+                if attempt.failed() or expired:
+                    attempt.abort()
+                    running.remove(attempt)
+                    self.latency[attempt.name].record_error()
+                    decision["failovers"].append(f"{attempt.name}: {'error' if attempt.failed() else 'timeout'}")
+                    if pending:
+                        running.append(self._start(pending.pop(0)))
+            if not running:
+                break
+
+            # Последний оставшийся сервер ждем без дедлайна: о его ответе или ошибке сообщит сигнал
+            bounded = pending or len(running) > 1
+            timeout = max(min(self.first_token_deadline - (now - a.started) for a in running), 0.01)
+            self._signal.wait(timeout if bounded else None)
+            self._signal.clear()
+
+        for attempt in running:
+            attempt.abort()
+        return None
+
+    def _route(self):
+        order = self.ranking()
+        decision = {"time": time.time(), "order": order, "hedged": False, "failovers": [], "winner": None,
+                    "ttft": None}
+        self.decisions.append(decision)
+        winner = self._choose(order, decision)
+        if winner is None:
+            print("LLM router: no backend answered", decision["failovers"])
+            return
+
+        self.winner = winner
+        self.wins[winner.name] += 1
+        self.latency[winner.name].record(winner.ttft)
+        decision.update(winner=winner.name, ttft=winner.ttft)
+        print(f"LLM router: {winner.name}, first token in {winner.ttft * 1000:.0f} ms")
+
+        try:
+            first = winner.first_sentence.result()
+            if first is None:
+                return
+            yield first
+            yield from winner.generator
+        finally:
+            winner.generator.close()
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+        self._signal.set()
+        if self.winner is not None:
+            self.winner.backend.cancel()
+
+    def warm_up(self) -> None:
+        for backend in self.backends.values():
+            backend.warm_up()
+
+    def reset_session(self) -> None:
+        self.memory.reset()
+
+    def stats(self) -> dict:
+        return {
+            "predicted_ttft": {name: self.predicted_ttft(name) for name in self.backends},
+            "wins": dict(self.wins),
+            "backends": {name: tracker.stats() for name, tracker in self.latency.items()},
+            "decisions": list(self.decisions)[-10:],
+        }
@@ -0,0 +1,102 @@
+from typing import List, Optional
+
+SENTENCE_END = ".!?…"
+CLAUSE_END = ",;:—"
+CLOSERS = "\"'»”)]"
+NEED_MORE = -1
+
+# Сокращения, после точки в которых предложение не заканчивается (в нижнем регистре)
+ABBREVIATIONS = {
+    # o'zbekcha
+    "h.k.", "va h.k.", "sh.", "t.", "m.", "mln.", "mlrd.", "ming.", "km.", "kg.", "mas.", "prof.", "dots.",
+    # русские
+    "т.е.", "т.д.", "т.п.", "т.к.", "др.", "пр.", "г.", "гг.", "ул.", "им.", "руб.", "тыс.", "млн.", "млрд.",
+    "стр.", "см.", "напр.", "проф.", "доц.", "акад.", "св.", "обл.", "р-н.",
+    # english
+    "mr.", "mrs.", "ms.", "dr.", "e.g.", "i.e.", "vs.", "no.",
+}
+
+
+class SentenceSegmenter:
+    """Cuts a streamed LLM answer into speakable chunks as soon as they end.
+
+    ``feed`` takes the next text delta and returns the sentences it
+    completed. A boundary after ``.`` only counts once the following
+    character shows it is not a decimal point, an abbreviation, an initial or
+    a list number. Chunks shorter than ``min_chars`` are merged with the
+    next sentence; a sentence longer than ``max_chars`` is split at the last
+    clause boundary so TTS does not wait for it to finish.
+    """
+
+    def __init__(self, min_chars: int = 15, max_chars: int = 200, abbreviations=ABBREVIATIONS):
+        self.min_chars = min_chars
+        self.max_chars = max_chars
+        self.abbreviations = abbreviations
+        self._buffer = ""
+
+    def feed(self, text: str) -> List[str]:
+        self._buffer += text
+        chunks = []
+        while True:
+            end = self._find_boundary()
+            if end is None:
+                return chunks
+            chunk = self._buffer[:end].strip()
+            self._buffer = self._buffer[end:].lstrip()
+            if chunk:
+                chunks.append(chunk)
+
+    def flush(self) -> Optional[str]:
+        chunk = self._buffer.strip()
+        self._buffer = ""
+        return chunk or None
+
+    def _find_boundary(self) -> Optional[int]:
+        buffer = self._buffer
+        for i, char in enumerate(buffer):
+            if char not in SENTENCE_END and char != "\n":
+                continue
+            end = self._sentence_end(buffer, i)
+            if end == NEED_MORE:
+                break
+            if end is not None and len(buffer[:end].strip()) >= self.min_chars:
+                return end
+
+        if len(buffer) > self.max_chars:
+            return self._forced_split(buffer)
+        return None
+
+    def _sentence_end(self, buffer: str, i: int) -> Optional[int]:
+        if buffer[i] == "\n":
+            return i + 1
+
+        j = i
+        while j < len(buffer) and buffer[j] in SENTENCE_END:
+            j += 1
+        while j < len(buffer) and buffer[j] in CLOSERS:
+            j += 1
+        if j == len(buffer):
+            # "3." может оказаться "3.14" - ждем следующий символ
+            return NEED_MORE
+        if not buffer[j].isspace():
+            return None
+
+        if buffer[i] == "." and j == i + 1:
+            words = buffer[:i + 1].split()
+            word = words[-1].lstrip("\"'«“([").lower() if words else ""
+            two_words = " ".join(words[-2:]).lower()
+            if word in self.abbreviations or two_words in self.abbreviations:
+                return None
+            if len(word) == 2 and word[0].isalpha() and words[-1][-2].isupper():
+                return None  # инициал: "A. Navoiy"
+            if word[:-1].isdigit() and len(word) <= 3:
+                return None  # номер пункта или дата: "1. ", "15. avgust"
+        return j
+
+    def _forced_split(self, buffer: str) -> int:
+        window = buffer[:self.max_chars]
+        for i in range(len(window) - 1, 0, -1):
+            if window[i] in CLAUSE_END and i + 1 < len(buffer) and buffer[i + 1].isspace():
+                return i + 1
+        space = window.rfind(" ")
+        return space + 1 if space > 0 else self.max_chars
@@ -0,0 +1,101 @@
+import concurrent.futures
+import json
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+
+class ToolResult:
+    """Tool output plus an optional side effect that keeps running after it.
+
+    ``content`` goes back to the LLM right away; ``background`` (an eye
+    animation, a sound) runs on the runtime's background worker, so the
+    follow-up answer does not wait for it.
+    """
+
+    def __init__(self, content: str, background: Optional[Callable[[], None]] = None):
+        self.content = content
+        self.background = background
+
+
+class Tool:
+    def __init__(self, name: str, func: Callable, timeout: float):
+        self.name = name
+        self.func = func
+        self.timeout = timeout
+
+
+class ToolRuntime:
+    """Executes LLM tool calls concurrently with per-tool timeouts.
+
+    ``run`` submits every call of a turn to a worker pool at once and
+    returns the tool messages for the follow-up request as soon as the last
+    result is in or its timeout expires. A tool that times out or raises
+    gets a JSON error as its result instead of blocking the answer.
+    Background side effects run one after another on a single worker so
+    animations do not fight over the eyes.
+    """
+
+    def __init__(self, max_workers: int = 4, default_timeout: float = 5.0):
+        self.default_timeout = default_timeout
+        self.tools: Dict[str, Tool] = {}
+        self._pool = concurrent.futures.ThreadPoolExecutor(max_workers, thread_name_prefix="tool")
+        self._background = concurrent.futures.ThreadPoolExecutor(1, thread_name_prefix="tool-background")
+
+    def register(self, name: str, func: Callable, timeout: Optional[float] = None) -> None:
+        self.tools[name] = Tool(name, func, timeout or self.default_timeout)
+
+    def _call(self, tool: Tool, arguments: str) -> str:
+        started = time.perf_counter()
+        kwargs = json.loads(arguments) if arguments and arguments.strip() else {}
+        result = tool.func(**kwargs)
+        if isinstance(result, ToolResult):
+            if result.background is not None:
+                self._background.submit(self._run_background, tool.name, result.background)
+            result = result.content
+        print(f"Tool {tool.name}: {(time.perf_counter() - started) * 1000:.0f} ms")
+        return result if isinstance(result, str) else json.dumps(result, ensure_ascii=False)
+
+    @staticmethod
+    def _run_background(name: str, side_effect: Callable[[], None]) -> None:
+        try:
+            side_effect()
+        except Exception as e:
+            print(f"Tool {name} background error: {e}")
+
+    def submit(self, name: str, arguments: str) -> Tuple[concurrent.futures.Future, float]:
+        """Starts one call; returns its future and deadline."""
+        tool = self.tools.get(name)
+        if tool is None:
+            future = concurrent.futures.Future()
+            future.set_result(json.dumps({"error": f"unknown tool {name}"}))
+            return future, time.monotonic()
+        return self._pool.submit(self._call, tool, arguments), time.monotonic() + tool.timeout
+
+    @staticmethod
+    def result(name: str, future: concurrent.futures.Future, deadline: float) -> str:
+        try:
+            return future.result(timeout=max(deadline - time.monotonic(), 0))
+        except concurrent.futures.TimeoutError:
+            # Поток инструмента не прервать - он доработает сам, ответ его не ждет
+            print(f"Tool {name} timed out")
+            return json.dumps({"error": "timeout"})
+        except Exception as e:
+            print(f"Tool {name} failed: {e}")
+            return json.dumps({"error": str(e)})
+
+    def run(self, calls: Sequence[Sequence[str]]) -> List[dict]:
+        """Runs ``(id, name, arguments)`` calls and returns their tool messages."""
+        pending = [(call_id, name, *self.submit(name, arguments)) for call_id, name, arguments in calls]
+        return [
+            {
+                "role": "tool",
+                "name": name,
+                "content": self.result(name, future, deadline),
+                "tool_call_id": call_id,
+            }
+            for call_id, name, future, deadline in pending
+        ]
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        self._background.shutdown(wait=False, cancel_futures=True)
@@ -1,13 +1,24 @@
 import json
 import time
+from typing import Optional
 
-import playsound
-
+from src.modules.audio.output import audio_output
+from src.modules.intelligence.tools import ToolResult
 from src.modules.vision.eye_controller import MechanicalEyes
-eyes = MechanicalEyes()
+
+_eyes: Optional[MechanicalEyes] = None
+
+
+def get_eyes() -> MechanicalEyes:
+    # Последовательный порт открываем при первой анимации, а не при импорте
+    global _eyes
+    if _eyes is None:
+        _eyes = MechanicalEyes()
+    return _eyes
 
 
 def wakeup():
+    eyes = get_eyes()
     eyes.open_eyes()
     time.sleep(0.1)
     eyes.close_eyes()
@@ -35,34 +46,15 @@ def wakeup():
     eyes.send_data([90, 90])
 
 
-def draw_scenario():
-    eyes.open_eyes()
-    time.sleep(0.1)
-    eyes.close_eyes()
-    time.sleep(0.1)
-    eyes.open_eyes()
-    time.sleep(0.5)
-    eyes.close_eyes()
-    eyes.send_data([130, 90])
-    time.sleep(0.1)
-    eyes.open_eyes()
-    time.sleep(0.5)
-    eyes.close_eyes()
-    eyes.send_data([50, 90])
-    time.sleep(0.1)
-    eyes.open_eyes()
-    time.sleep(0.5)
-    eyes.close_eyes()
-    time.sleep(0.1)
-    eyes.open_eyes()
-    time.sleep(0.2)
-    eyes.close_eyes()
-    time.sleep(0.1)
-    eyes.open_eyes()
-    time.sleep(0.2)
-    eyes.send_data([90, 90])
-    playsound.playsound("core/audio_files/draw1.mp3")
+def draw_animation():
+    # Те же движения глаз, что при пробуждении, затем звуки рисования
+    wakeup()
+    output = audio_output()
+    output.play("core/audio_files/draw1.mp3").wait()
     time.sleep(1)
-    playsound.playsound("core/audio_files/draw2.mp3")
+    output.play("core/audio_files/draw2.mp3")
 
-    return json.dumps({"result": "draw finished"})
+
+def draw_scenario():
+    # Анимация и звуки идут в фоне, ответ LLM их не ждет
+    return ToolResult(json.dumps({"result": "drawing started"}), background=draw_animation)
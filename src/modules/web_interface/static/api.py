@@ -4,6 +4,12 @@ import threading
 app = Flask(__name__)
 
 animation_state = 'on'
+# Источники статистики для панели администратора: имя -> функция, возвращающая dict
+stats_sources = {}
+
+
+def register_stats_source(name, source):
+    stats_sources[name] = source
 
 
 @app.route('/')
@@ -26,8 +32,19 @@ def toggle_animation(state):
     return jsonify({'success': False, 'error': 'Invalid state'})
 
 
-def run_server():
-    app.run(debug=True, use_reloader=False)
+@app.route('/stats')
+def get_stats():
+    stats = {}
+    for name, source in list(stats_sources.items()):
+        try:
+            stats[name] = source()
+        except Exception as e:
+            stats[name] = {'error': str(e)}
+    return jsonify(stats)
+
+
+def run_server(host='127.0.0.1', port=5000):
+    app.run(host=host, port=port, debug=True, use_reloader=False)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,43 @@
+import asyncio
+import concurrent.futures
+import threading
+from typing import Awaitable, Optional
+
+
+class AsyncRunner:
+    """Event loop running on its own thread.
+
+    The assistant loop is synchronous; it hands coroutines to this loop and
+    gets ``concurrent.futures.Future`` objects back, so several network calls
+    can be in flight while it keeps doing other work.
+    """
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name="async-runner", daemon=True)
+        self._thread.start()
+
+    def submit(self, coro: Awaitable) -> concurrent.futures.Future:
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro: Awaitable, timeout: Optional[float] = None):
+        return self.submit(coro).result(timeout)
+
+    def call_soon(self, callback, *args):
+        self.loop.call_soon_threadsafe(callback, *args)
+
+    def stop(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout=1)
+
+
+_shared_runner: Optional[AsyncRunner] = None
+_lock = threading.Lock()
+
+
+def get_runner() -> AsyncRunner:
+    global _shared_runner
+    with _lock:
+        if _shared_runner is None:
+            _shared_runner = AsyncRunner()
+        return _shared_runner
@@ -0,0 +1,74 @@
+import asyncio
+from typing import Optional
+
+import httpx
+
+from src.utils.async_runner import get_runner
+
+# Коды, при которых запрос имеет смысл повторить
+RETRY_STATUSES = {502, 503, 504}
+
+
+class HTTPTransport:
+    """Pooled keep-alive HTTP client shared by the HTTP-based providers.
+
+    Reusing connections saves the TCP+TLS handshake on every turn. Requests
+    have separate connect/read deadlines and are retried a bounded number of
+    times on connection errors (including a dead keep-alive socket) and
+    gateway errors; timeouts are not retried, the caller is already late.
+    """
+
+    def __init__(self, connect_timeout: float = 3.0, read_timeout: float = 15.0, retries: int = 2,
+                 backoff: float = 0.2, max_connections: int = 10, keepalive_expiry: float = 120.0):
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self.limits = httpx.Limits(max_connections=max_connections,
+                                   max_keepalive_connections=max_connections,
+                                   keepalive_expiry=keepalive_expiry)
+        self.retries = retries
+        self.backoff = backoff
+        # Клиент привязан к циклу событий AsyncRunner, создаем его внутри цикла
+        self._async_client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def async_client(self) -> httpx.AsyncClient:
+        if self._async_client is None:
+            self._async_client = httpx.AsyncClient(timeout=self.timeout, limits=self.limits)
+        return self._async_client
+
+    async def apost(self, url: str, retry: bool = True, **kwargs) -> httpx.Response:
+        """POST with bounded retries; streamed bodies must pass retry=False."""
+        attempts = self.retries + 1 if retry else 1
+        for attempt in range(attempts):
+            last = attempt == attempts - 1
+            try:
+                response = await self.async_client.post(url, **kwargs)
+            except (httpx.ConnectError, httpx.RemoteProtocolError, httpx.WriteError):
+                if last:
+                    raise
+            else:
+                if response.status_code not in RETRY_STATUSES or last:
+                    return response
+            await asyncio.sleep(self.backoff * (2 ** attempt))
+
+    async def awarm_up(self, url: str) -> None:
+        """Opens a pooled connection ahead of the first real request."""
+        try:
+            await self.async_client.head(url)
+        except httpx.HTTPError as e:
+            print(f"HTTP warm-up failed for {url}: {e}")
+
+    def close(self, timeout: float = 5.0):
+        """Closes pooled connections; the client is closed on the loop it was created on."""
+        if self._async_client is not None:
+            client, self._async_client = self._async_client, None
+            get_runner().run(client.aclose(), timeout)
+
+
+_shared_transport: Optional[HTTPTransport] = None
+
+
+def get_transport() -> HTTPTransport:
+    global _shared_transport
+    if _shared_transport is None:
+        _shared_transport = HTTPTransport()
+    return _shared_transport
@@ -0,0 +1,52 @@
+from collections import deque
+from typing import Optional
+
+import numpy as np
+
+
+class LatencyTracker:
+    """Rolling latency and error statistics over the last ``window`` calls."""
+
+    def __init__(self, window: int = 50):
+        self.samples = deque(maxlen=window)
+        self.outcomes = deque(maxlen=window)
+        self.calls = 0
+        self.errors = 0
+
+    def record(self, seconds: float) -> None:
+        self.samples.append(seconds)
+        self.outcomes.append(True)
+        self.calls += 1
+
+    def record_error(self) -> None:
+        self.outcomes.append(False)
+        self.calls += 1
+        self.errors += 1
+
+    def percentile(self, p: float) -> Optional[float]:
+        if not self.samples:
+            return None
+        return float(np.percentile(self.samples, p))
+
+    @property
+    def p50(self) -> Optional[float]:
+        return self.percentile(50)
+
+    @property
+    def p95(self) -> Optional[float]:
+        return self.percentile(95)
+
+    @property
+    def error_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return 1 - sum(self.outcomes) / len(self.outcomes)
+
+    def stats(self) -> dict:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "error_rate": self.error_rate,
+            "p50": self.p50,
+            "p95": self.p95,
+        }
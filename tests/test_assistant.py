@@ -0,0 +1,111 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from src.core.assistant import Assistant
+from src.core.audio_source import SyntheticSource
+from src.modules.audio.audio_data import AudioData
+from src.modules.audio.mock_stt_server import MockSTTServer
+from src.modules.audio.stt import BaseSTT, ChunkedHTTPSTT, HedgedSTT, STTEngine
+from src.modules.audio.tts import BaseTTS
+from src.utils.http import HTTPTransport
+
+
+class ScriptedSTT(BaseSTT):
+    def __init__(self, delay: float = 0.0, error: Exception = None, text: str = "Salom"):
+        self.delay = delay
+        self.error = error
+        self.text = text
+
+    async def transcribe(self, audio):
+        await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return self.text
+
+
+def _transcribe(stt: BaseSTT, deadline: float = 1.0):
+    # _transcribe использует только stt_engine и llm.warm_up
+    assistant = SimpleNamespace(stt_engine=STTEngine(stt, deadline=deadline),
+                                llm=SimpleNamespace(warm_up=lambda: None))
+    audio = AudioData(np.zeros(1600, dtype=np.int16), 16000)
+    return Assistant._transcribe(assistant, stt.open_stream(16000), audio)
+
+
+def test_transcribe_returns_text():
+    assert _transcribe(ScriptedSTT()) == "Salom"
+
+
+def test_slow_provider_counts_as_no_transcript(capsys):
+    assert _transcribe(ScriptedSTT(delay=1.0), deadline=0.05) is None
+    assert "STT не ответил вовремя" in capsys.readouterr().out
+
+
+@pytest.mark.parametrize("error", [ValueError("bad json"), ConnectionError("reset")])
+def test_provider_error_counts_as_no_transcript(error, capsys):
+    assert _transcribe(ScriptedSTT(error=error)) is None
+    assert "Ошибка распознавания" in capsys.readouterr().out
+
+
+@pytest.mark.parametrize("status", [500, 404])
+def test_http_failure_never_reaches_the_llm_as_text(status, capsys):
+    # Раньше провайдер возвращал "Request failed ..." как обычную расшифровку
+    server = MockSTTServer(port=0, status=status).start()
+    transport = HTTPTransport(retries=0)
+    try:
+        stt = HedgedSTT([ChunkedHTTPSTT(server.url, transport=transport)], hedge_delay=0)
+        assert _transcribe(stt) is None
+        assert "Ошибка распознавания" in capsys.readouterr().out
+    finally:
+        transport.close()
+        server.shutdown()
+        server.server_close()
+
+
+class FakeVAD:
+    """Porcupine/Cobra stand-in: a frame is voiced when it is loud."""
+
+    frame_length = 512
+    sample_rate = 16000
+
+    def process(self, frame) -> float:
+        return 1.0 if np.sqrt(np.mean(np.square(frame, dtype=np.float64))) > 300 else 0.0
+
+    def delete(self):
+        pass
+
+
+class SilentTTS(BaseTTS):
+    def synthesize(self, text):
+        pass
+
+    def stream_pcm(self, text):
+        yield b""
+
+
+class HeadlessAssistant(Assistant):
+    def _respond(self, transcribed_text, start_time):
+        self.heard.append(transcribed_text)
+        return False
+
+
+def test_replayed_utterance_ends_faster_than_real_time(monkeypatch):
+    monkeypatch.setattr("src.core.mic_loop.pvporcupine.create", lambda **kwargs: FakeVAD())
+    monkeypatch.setattr("src.core.mic_loop.pvcobra.create", lambda **kwargs: FakeVAD())
+    source = SyntheticSource([("silence", 1.0), ("tone", 1.0), ("silence", 4.0)], speed=0)
+    llm = SimpleNamespace(warm_up=lambda: None, reset_session=lambda: None)
+    assistant = HeadlessAssistant(ScriptedSTT(), llm, SilentTTS(), source)
+    assistant.heard = []
+    assistant.MAX_RECORDING_TIME = 2.0
+    assistant.capture.start()
+    time.sleep(0.2)  # очередь успевает заполниться - из записи ничего не должно пропасть
+    started = time.perf_counter()
+    try:
+        assistant.voice_recording()  # возвращается по MAX_RECORDING_TIME после ответа
+    finally:
+        assistant.capture.stop()
+    assert assistant.heard == ["Salom"]
+    assert time.perf_counter() - started < 5.0
@@ -0,0 +1,37 @@
+import numpy as np
+
+from src.core.audio_buffer import AudioRingBuffer
+
+
+def test_latest_is_contiguous_across_the_wrap():
+    buffer = AudioRingBuffer(8)
+    for start in range(0, 20, 3):
+        buffer.write(np.arange(start, start + 3, dtype=np.int16))
+    latest = buffer.latest(8)
+    assert latest.flags["C_CONTIGUOUS"]
+    np.testing.assert_array_equal(latest, np.arange(13, 21))
+    assert len(buffer) == 8
+
+
+def test_utterance_starts_at_mark_with_preroll():
+    buffer = AudioRingBuffer(100)
+    buffer.write(np.arange(10, dtype=np.int16))
+    buffer.mark(preroll=4)
+    buffer.write(np.arange(10, 15, dtype=np.int16))
+    np.testing.assert_array_equal(buffer.utterance(), [6, 7, 8, 9, 10, 11, 12, 13, 14])
+
+
+def test_frame_larger_than_capacity_keeps_the_tail():
+    buffer = AudioRingBuffer(4)
+    buffer.mark()
+    buffer.write(np.arange(10, dtype=np.int16))
+    np.testing.assert_array_equal(buffer.latest(10), [6, 7, 8, 9])
+    np.testing.assert_array_equal(buffer.utterance(), [6, 7, 8, 9])
+
+
+def test_reset_forgets_everything():
+    buffer = AudioRingBuffer(4)
+    buffer.write(np.ones(3, dtype=np.int16))
+    buffer.reset()
+    assert len(buffer) == 0
+    assert len(buffer.utterance()) == 0
@@ -0,0 +1,55 @@
+import time
+
+import numpy as np
+import pytest
+
+from src.core.audio_source import ReplaySource, SyntheticSource
+from src.modules.audio.audio_data import AudioData
+
+
+def _read_all(source):
+    frames = []
+    source.start()
+    with pytest.raises(EOFError):
+        while True:
+            frames.append(source.read())
+    return frames
+
+
+def test_replay_emits_audio_then_tail_silence():
+    audio = np.arange(1000, dtype=np.int16)
+    frames = _read_all(ReplaySource(audio, frame_length=100, speed=0, tail_silence=0.05))
+    samples = np.concatenate(frames)
+    assert len(frames) == 18  # 1000 + 800 сэмплов тишины
+    np.testing.assert_array_equal(samples[:1000], audio)
+    assert not samples[1000:].any()
+
+
+def test_replay_paces_frames_at_speed():
+    source = ReplaySource(np.zeros(3200, dtype=np.int16), frame_length=320, speed=2.0, tail_silence=0)
+    started = time.perf_counter()
+    _read_all(source)
+    assert 0.08 < time.perf_counter() - started < 0.5
+
+
+def test_rewind_replays_from_the_start():
+    source = ReplaySource(np.arange(400, dtype=np.int16), frame_length=100, speed=0, tail_silence=0)
+    first = _read_all(source)
+    source.rewind()
+    np.testing.assert_array_equal(np.concatenate(_read_all(source)), np.concatenate(first))
+
+
+def test_replay_rejects_wrong_sample_rate():
+    with pytest.raises(ValueError):
+        ReplaySource(AudioData(np.zeros(100, dtype=np.int16), 8000))
+
+
+def test_synthetic_source_is_deterministic_and_loud_where_scripted():
+    script = [("silence", 0.5), ("tone", 0.5, 300), ("noise", 0.5)]
+    a, b = SyntheticSource(script), SyntheticSource(script)
+    np.testing.assert_array_equal(a.samples, b.samples)
+    rms = [np.sqrt(np.mean(part.astype(np.float64) ** 2)) for part in np.split(a.samples, 3)]
+    assert rms[0] < 50 < rms[1] and rms[0] < 50 < rms[2]
+    assert not a.realtime
+    with pytest.raises(ValueError):
+        SyntheticSource([("music", 1.0)])
@@ -0,0 +1,67 @@
+import threading
+import time
+
+import pytest
+
+from src.modules.audio.mock_azure import MockAudioDataStream, MockSynthesizer
+from src.modules.audio.playback import PCMPlayer
+from src.modules.audio.tts import AzureTTS
+
+
+@pytest.fixture
+def make_tts(fake_output, monkeypatch):
+    # AzureTTS читает свои флаги из командной строки
+    monkeypatch.setattr("sys.argv", ["test"])
+
+    def make(**kwargs):
+        synthesizer = MockSynthesizer(**kwargs)
+        return AzureTTS(synthesizer, audio_stream=MockAudioDataStream, player=PCMPlayer(output=fake_output))
+    return make
+
+
+def test_playback_starts_on_the_first_chunk(make_tts):
+    tts = make_tts(first_chunk_delay=0.1, chunk_delay=0.05, duration=1.0)
+    started = time.perf_counter()
+    audio_start = []
+    tts.on_audio_start = lambda: audio_start.append(time.perf_counter() - started)
+    tts.synthesize("Salom, dunyo")
+    assert audio_start and audio_start[0] < 0.35  # полный рендер занимает ~0.55 с
+    assert time.perf_counter() - started >= 1.0  # и фраза доиграна до конца
+    assert len(tts.last_pcm) == 2 * tts.sample_rate
+    assert "Salom, dunyo" in tts.synthesizer.requests[-1]
+    assert tts.first_chunk_latency.calls == 2  # прогрев и фраза
+
+
+def test_stream_pcm_yields_the_whole_render_without_playing(make_tts, fake_output):
+    tts = make_tts(first_chunk_delay=0.0, chunk_delay=0.0, duration=0.5)
+    assert len(b"".join(tts.stream_pcm("Salom"))) == tts.sample_rate
+    time.sleep(0.05)
+    assert not fake_output.samples().any()
+
+
+def test_stop_interrupts_synthesis_and_playback(make_tts):
+    tts = make_tts(first_chunk_delay=0.05, chunk_delay=0.05, duration=1.5)
+    threading.Timer(0.3, tts.stop).start()
+    started = time.perf_counter()
+    tts.synthesize("Uzun javob")
+    assert time.perf_counter() - started < 1.0
+    assert tts.last_pcm is None  # прерванная фраза не попадет в кэш
+    assert tts.synthesizer._stopped.is_set()
+
+
+def test_service_cancellation_raises_with_details(make_tts):
+    tts = make_tts(first_chunk_delay=0.0, chunk_delay=0.0, duration=1.0)
+    tts.synthesizer.fail_after = 9600
+    with pytest.raises(RuntimeError, match="Connection was closed"):
+        b"".join(tts.stream_pcm("Salom"))
+    tts.synthesize("Salom")
+    assert tts.last_pcm is None
+
+
+def test_stop_during_stream_pcm_raises(make_tts):
+    tts = make_tts(first_chunk_delay=0.0, chunk_delay=0.05, duration=1.0)
+    stream = tts.stream_pcm("Salom")
+    next(stream)
+    tts.synthesizer.stop_speaking_async()
+    with pytest.raises(RuntimeError, match="CancelledByUser"):
+        list(stream)
@@ -0,0 +1,41 @@
+import threading
+
+import numpy as np
+
+from src.core.audio_buffer import AudioRingBuffer
+from src.core.audio_source import SyntheticSource
+from src.core.barge_in import BargeInMonitor
+from src.core.capture import CaptureThread
+
+FRAME = 0.032  # 512 сэмплов при 16 кГц
+
+
+class LoudVAD:
+    def process(self, frame) -> float:
+        return 1.0 if np.abs(frame).max() > 1000 else 0.0
+
+
+def monitor_for(script, min_frames=3):
+    capture = CaptureThread(SyntheticSource(script, amplitude=3000), slots=512)
+    triggered = threading.Event()
+    monitor = BargeInMonitor(capture, LoudVAD(), AudioRingBuffer(16000 * 10), 0.9, min_frames, triggered.set)
+    capture.start()
+    monitor.start()
+    return capture, monitor, triggered
+
+
+def test_sustained_speech_triggers_once_and_leaves_the_rest_queued():
+    capture, monitor, triggered = monitor_for([("silence", 10 * FRAME), ("tone", 20 * FRAME)])
+    assert triggered.wait(2)
+    assert monitor.stop()
+    assert len(monitor.audio_buffer) == 13 * 512  # тишина и три кадра речи до срабатывания
+    assert np.abs(capture.read(timeout=1)).max() > 1000  # продолжение фразы досталось циклу записи
+    capture.stop()
+
+
+def test_short_bursts_do_not_trigger():
+    script = [("silence", 2 * FRAME), ("tone", 2 * FRAME)] * 10 + [("silence", 4 * FRAME)]
+    capture, monitor, triggered = monitor_for(script)
+    assert not triggered.wait(0.5)
+    assert not monitor.stop()
+    capture.stop()
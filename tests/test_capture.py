@@ -0,0 +1,82 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from src.core.audio_source import SyntheticSource
+from src.core.capture import CaptureThread, FrameQueue
+
+
+def test_frame_queue_drops_newest_frame_when_full():
+    queue = FrameQueue(2, 4)
+    assert queue.push(np.full(4, 1), 0.0)
+    assert queue.push(np.full(4, 2), 0.0)
+    assert not queue.push(np.full(4, 3), 0.0)
+    assert queue.overruns == 1
+    assert queue.pop(0)[0][0] == 1
+    assert queue.pop(0)[0][0] == 2
+    with pytest.raises(TimeoutError):
+        queue.pop(0.01)
+
+
+def test_frame_queue_blocks_producer_until_consumer_catches_up():
+    queue = FrameQueue(2, 4, block_when_full=True)
+    queue.push(np.full(4, 1), 0.0)
+    queue.push(np.full(4, 2), 0.0)
+    pushed = threading.Event()
+    threading.Thread(target=lambda: queue.push(np.full(4, 3), 0.0) and pushed.set(), daemon=True).start()
+    assert not pushed.wait(0.1)
+    queue.pop(0)
+    queue.pop(0)  # освобождает первый кадр
+    assert pushed.wait(1)
+    assert queue.pop(1)[0][0] == 3
+    assert queue.overruns == 0
+
+
+def test_frame_queue_close_releases_blocked_producer():
+    queue = FrameQueue(1, 4, block_when_full=True)
+    queue.push(np.zeros(4), 0.0)
+    result = []
+    thread = threading.Thread(target=lambda: result.append(queue.push(np.zeros(4), 0.0)))
+    thread.start()
+    queue.close()
+    thread.join(1)
+    assert result == [False]
+
+
+def test_fast_replay_through_capture_thread_loses_no_frames():
+    source = SyntheticSource([("noise", 2.0)], frame_length=512, speed=0)
+    total = len(source.samples) // 512
+    capture = CaptureThread(source, slots=8)
+    capture.start()
+    frames = []
+    with pytest.raises(EOFError):
+        while True:
+            frames.append(capture.read(timeout=1).copy())
+            if len(frames) % 10 == 0:
+                time.sleep(0.01)  # медленный потребитель
+    assert len(frames) == total
+    assert capture.overruns == 0
+    np.testing.assert_array_equal(np.concatenate(frames), source.samples[:total * 512])
+
+
+def test_stop_releases_capture_thread_blocked_on_full_queue():
+    capture = CaptureThread(SyntheticSource([("noise", 2.0)], speed=0), slots=4)
+    capture.start()
+    time.sleep(0.05)
+    thread = capture._thread
+    capture.stop()
+    assert not thread.is_alive()
+
+
+def test_frames_are_stamped_with_audio_time_not_read_time():
+    source = SyntheticSource([("noise", 1.0)], frame_length=400, speed=0)
+    capture = CaptureThread(source, slots=4)
+    capture.start()
+    time.sleep(0.1)  # кадры ждут в очереди
+    stamps = []
+    with pytest.raises(EOFError):
+        while True:
+            stamps.append(capture.read_timestamped(timeout=1)[1])
+    assert stamps == pytest.approx([(i + 1) * 0.025 for i in range(40)])
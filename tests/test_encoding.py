@@ -0,0 +1,37 @@
+import io
+
+import numpy as np
+import pytest
+
+from src.modules.audio import encoding
+from src.modules.audio.audio_data import AudioData
+from src.modules.audio.encoding import FlacEncoder, OpusEncoder, WavEncoder, create_encoder
+
+soundfile = pytest.importorskip("soundfile")
+
+
+@pytest.fixture
+def audio():
+    t = np.arange(16000) / 16000
+    return AudioData((3000 * np.sin(2 * np.pi * 300 * t)).astype(np.int16), 16000)
+
+
+def test_flac_is_lossless_and_smaller(audio):
+    encoded = FlacEncoder().encode(audio)
+    assert encoded.ratio > 1
+    samples, rate = soundfile.read(io.BytesIO(encoded.data), dtype="int16")
+    assert rate == 16000
+    np.testing.assert_array_equal(samples, audio.samples)
+
+
+@pytest.mark.skipif(not encoding.opus_supported(), reason="libsndfile without Opus")
+def test_opus_encodes(audio):
+    encoded = OpusEncoder(bitrate_kbps=24).encode(audio)
+    assert encoded.mime_type == "audio/ogg"
+    assert encoded.ratio > 4
+
+
+def test_opus_falls_back_to_flac_when_unsupported(monkeypatch):
+    monkeypatch.setattr(encoding, "opus_supported", lambda: False)
+    assert isinstance(create_encoder("opus"), FlacEncoder)
+    assert isinstance(create_encoder("wav"), WavEncoder)
@@ -0,0 +1,50 @@
+import numpy as np
+
+from src.core.endpointer import AdaptiveEndpointer, FixedSilenceEndpointer
+
+RATE = 16000
+FRAME = 512
+STEP = FRAME / RATE
+
+
+def _run(endpointer, script):
+    """Feeds (probability, amplitude, seconds) segments; returns the stop time or None."""
+    rng = np.random.default_rng(0)
+    now = 0.0
+    for probability, amplitude, seconds in script:
+        for _ in range(int(seconds / STEP)):
+            frame = (rng.standard_normal(FRAME) * amplitude).astype(np.int16)
+            now += STEP
+            if endpointer.update(probability, frame, now):
+                return now
+    return None
+
+
+def test_short_command_closes_well_before_the_fixed_timeout():
+    script = [(1.0, 3000, 0.6), (0.0, 20, 2.0)]
+    adaptive = _run(AdaptiveEndpointer(RATE), script)
+    fixed = _run(FixedSilenceEndpointer(), script)
+    assert adaptive is not None and fixed is not None
+    assert adaptive - 0.6 < 0.6
+    assert adaptive < fixed
+
+
+def test_mid_utterance_pause_does_not_end_a_long_answer():
+    endpointer = AdaptiveEndpointer(RATE)
+    script = [(1.0, 3000, 3.0), (0.0, 20, 0.6), (1.0, 3000, 2.0)]
+    assert _run(endpointer, script) is None
+    assert endpointer.required_silence() >= 0.6
+
+
+def test_timeout_never_exceeds_hard_limit():
+    endpointer = AdaptiveEndpointer(RATE)
+    stop = _run(endpointer, [(1.0, 3000, 5.0), (0.5, 3000, 3.0)])
+    assert stop is not None
+    assert stop - 5.0 <= endpointer.hard_limit + STEP
+
+
+def test_reset_starts_a_fresh_utterance():
+    endpointer = AdaptiveEndpointer(RATE)
+    _run(endpointer, [(1.0, 3000, 5.0)])
+    endpointer.reset()
+    assert endpointer.required_silence() == endpointer.min_silence
@@ -0,0 +1,49 @@
+import numpy as np
+
+from src.core.energy_gate import EnergyGate
+
+FRAME = 512
+
+
+def _frames(kind: str, count: int, amplitude: float, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    for i in range(count):
+        if kind == "tone":
+            t = np.arange(i * FRAME, (i + 1) * FRAME) / 16000
+            yield (amplitude * np.sin(2 * np.pi * 300 * t)).astype(np.int16)
+        else:
+            yield rng.normal(0, amplitude, FRAME).astype(np.int16)
+
+
+def test_silence_is_gated_and_speech_passes():
+    gate = EnergyGate(hangover_frames=3)
+    assert all(gate.is_silent(f) for f in list(_frames("noise", 50, 10))[1:])
+    assert not gate.is_silent(next(_frames("tone", 1, 5000)))
+    # хвост после громкого кадра проходит без проверки
+    assert [gate.is_silent(f) for f in _frames("noise", 4, 10)] == [False, False, False, True]
+    assert gate.stats()["gated"] > 0
+
+
+def test_open_frames_returns_gated_lookback_before_loud_frame():
+    gate = EnergyGate(lookback_frames=4)
+    silence = list(_frames("noise", 30, 10))
+    for frame in silence:
+        gate.open_frames(frame)
+    assert len(gate.open_frames(silence[-1])) == 0
+
+    loud = next(_frames("tone", 1, 5000))
+    frames = gate.open_frames(loud)
+    assert frames.shape == (5, FRAME)
+    np.testing.assert_array_equal(frames[-1], loud)
+    np.testing.assert_array_equal(frames[-2], silence[-1])
+
+    # пока гейт открыт, кадры идут по одному
+    assert gate.open_frames(loud).shape == (1, FRAME)
+
+
+def test_reset_lookback_drops_stale_frames():
+    gate = EnergyGate(lookback_frames=4)
+    for frame in _frames("noise", 30, 10):
+        gate.open_frames(frame)
+    gate.reset_lookback()
+    assert gate.open_frames(next(_frames("tone", 1, 5000))).shape == (1, FRAME)
@@ -0,0 +1,76 @@
+import time
+
+import numpy as np
+import pytest
+
+from src.core.filler import FillerScheduler
+
+
+class ClipPlayback:
+    def __init__(self, clip):
+        self.clip = clip
+        self.fade_ms = None
+
+    def stop(self, fade_ms=0):
+        self.fade_ms = fade_ms
+
+
+class ClipOutput:
+    def __init__(self):
+        self.played = []
+
+    def open(self):
+        pass
+
+    def load(self, path):
+        return np.full(10, ord(path[0]), dtype=np.int16)
+
+    def play(self, clip, priority, volume):
+        self.played.append(ClipPlayback(clip))
+        return self.played[-1]
+
+
+@pytest.fixture
+def output(monkeypatch):
+    output = ClipOutput()
+    monkeypatch.setattr("src.core.filler.audio_output", lambda: output)
+    return output
+
+
+def test_filler_plays_when_no_answer_by_the_threshold(output):
+    filler = FillerScheduler(["a.mp3"], threshold=0.05)
+    filler.start()
+    time.sleep(0.15)
+    assert len(output.played) == 1
+    filler.audio_ready()
+    assert output.played[0].fade_ms == filler.fade_ms  # ответ зазвучал - заполнитель затихает
+    assert filler.stats()["fired"] == 1
+
+
+def test_answer_before_the_threshold_skips_the_filler(output):
+    filler = FillerScheduler(["a.mp3"], threshold=0.1)
+    filler.start()
+    filler.audio_ready()
+    time.sleep(0.2)
+    assert output.played == []
+    assert filler.stats()["fire_rate"] == 0.0
+    assert filler.stats()["time_to_audio_p50"] < 0.1
+
+
+def test_finish_cancels_a_pending_or_playing_filler(output):
+    filler = FillerScheduler(["a.mp3"], threshold=0.05)
+    filler.start()
+    filler.finish()  # пустая расшифровка: ответа не будет
+    time.sleep(0.1)
+    assert output.played == []
+
+    filler.start()
+    time.sleep(0.1)
+    filler.finish()  # пользователь перебил
+    assert output.played[0].fade_ms == filler.fade_ms
+
+
+def test_clips_do_not_repeat_back_to_back(output):
+    filler = FillerScheduler(["a.mp3", "b.mp3", "c.mp3"], threshold=0.0)
+    clips = [filler._next_sound() for _ in range(30)]
+    assert all(a is not b for a, b in zip(clips, clips[1:]))
@@ -0,0 +1,36 @@
+import json
+
+import pytest
+
+from src.modules.audio.mock_stt_server import MockSTTServer
+from src.utils.async_runner import get_runner
+from src.utils.http import HTTPTransport
+
+
+@pytest.fixture
+def server():
+    server = MockSTTServer(port=0, transcript="Salom").start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_apost_reuses_connection_and_close_releases_client(server):
+    transport = HTTPTransport()
+    runner = get_runner()
+    for _ in range(2):
+        response = runner.run(transport.apost(server.url, content=b"\0" * 320), timeout=5)
+        assert json.loads(response.content)["text"] == "Salom"
+    client = transport.async_client
+    transport.close()
+    assert client.is_closed
+    assert transport._async_client is None
+    transport.close()  # повторный вызов ничего не делает
+
+
+def test_apost_gives_up_after_bounded_retries_on_gateway_errors(server):
+    server.status = 503
+    transport = HTTPTransport(retries=2, backoff=0.01)
+    response = get_runner().run(transport.apost(server.url, content=b"x"), timeout=5)
+    assert response.status_code == 503
+    transport.close()
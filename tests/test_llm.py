@@ -0,0 +1,160 @@
+import threading
+
+import pytest
+from openai import OpenAI
+
+from src.modules.intelligence.llm import ChatCompletionLLM
+from src.modules.intelligence.memory import ConversationMemory
+from src.modules.intelligence.mock_llm_server import MockLLMServer
+from src.modules.intelligence.tools import ToolRuntime
+
+
+@pytest.fixture
+def server():
+    server = MockLLMServer(port=0, answer="Salom! Men Arifman. Sizga qanday yordam bera olaman?",
+                           first_token_delay=0.05, token_delay=0.01).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def make_llm(server: MockLLMServer) -> ChatCompletionLLM:
+    client = OpenAI(api_key="test", base_url=server.url, max_retries=0)
+    return ChatCompletionLLM(client, "mock", ConversationMemory("system"), [], ToolRuntime())
+
+
+def history(llm: ChatCompletionLLM):
+    return [(m["role"], m["content"]) for turn in llm.memory.turns for m in turn]
+
+
+def test_streams_sentences_and_records_the_answer(server):
+    llm = make_llm(server)
+    sentences = list(llm.generate_response("Salom"))
+    assert len(sentences) > 1
+    assert " ".join(sentences) == server.answer
+    assert history(llm) == [("user", "Salom"), ("assistant", " ".join(sentences))]
+
+
+def test_cancel_while_waiting_for_first_token_ends_quietly(server):
+    server.first_token_delay = 0.5
+    llm = make_llm(server)
+    responses = llm.generate_response("Salom")
+    threading.Timer(0.2, llm.cancel).start()
+    assert list(responses) == []
+    assert history(llm) == [("user", "Salom")]
+
+
+def test_cancel_mid_answer_keeps_only_what_was_said(server):
+    server.token_delay = 0.2
+    llm = make_llm(server)
+    responses = llm.generate_response("Salom")
+    first = next(responses)
+    threading.Timer(0.1, llm.cancel).start()
+    assert list(responses) == []
+    assert history(llm) == [("user", "Salom"), ("assistant", first)]
+
+
+def test_server_error_is_raised_when_not_cancelled(server):
+    server.status = 500
+    llm = make_llm(server)
+    with pytest.raises(Exception):
+        list(llm.generate_response("Salom"))
+
+
+def tool_llm(server: MockLLMServer, runtime: ToolRuntime) -> ChatCompletionLLM:
+    client = OpenAI(api_key="test", base_url=server.url, max_retries=0)
+    schemas = [{"type": "function", "function": {"name": name, "parameters": {"type": "object", "properties": {}}}}
+               for name in runtime.tools]
+    return ChatCompletionLLM(client, "mock", ConversationMemory("system"), schemas, runtime)
+
+
+def tool_history(llm: ChatCompletionLLM):
+    entries = []
+    for message in (m for turn in llm.memory.turns for m in turn):
+        if message.get("tool_calls"):
+            entries.append(("calls", [(c["function"]["name"], c["function"]["arguments"])
+                                      for c in message["tool_calls"]]))
+        else:
+            entries.append((message["role"], message["content"]))
+    return entries
+
+
+def test_tool_arguments_split_across_chunks_are_reassembled(server):
+    server.argument_chunk = 3
+    server.tool_rounds = [[("add", '{"a": 2, "b": 40}'), ("add", '{"a": 1, "b": 1}')]]
+    runtime = ToolRuntime()
+    calls = []
+    runtime.register("add", lambda a, b: calls.append((a, b)) or {"sum": a + b})
+    llm = tool_llm(server, runtime)
+
+    answer = " ".join(llm.generate_response("Hisobla"))
+    assert answer == server.answer
+    assert sorted(calls) == [(1, 1), (2, 40)]
+    assert llm.used_tools
+    assert tool_history(llm) == [
+        ("user", "Hisobla"),
+        ("calls", [("add", '{"a": 2, "b": 40}'), ("add", '{"a": 1, "b": 1}')]),
+        ("tool", '{"sum": 42}'),
+        ("tool", '{"sum": 2}'),
+        ("assistant", answer),
+    ]
+    # Результаты ушли в повторный запрос вместе с id вызовов
+    sent = server.last_request["messages"]
+    assert [m["tool_call_id"] for m in sent if m["role"] == "tool"] == ["call_1_0", "call_1_1"]
+
+
+def test_two_tool_rounds_then_an_answer(server):
+    server.tool_rounds = [[("look", "")], [("draw", '{"subject": "mushuk"}')]]
+    runtime = ToolRuntime()
+    calls = []
+    runtime.register("look", lambda: calls.append("look") or {"seen": "mushuk"})
+    runtime.register("draw", lambda subject: calls.append(subject) or {"result": "ok"})
+    llm = tool_llm(server, runtime)
+
+    answer = " ".join(llm.generate_response("Nimani ko'ryapsan? Chiz"))
+    assert calls == ["look", "mushuk"]
+    assert server.requests == 3
+    assert [entry[0] for entry in tool_history(llm)] == ["user", "calls", "tool", "calls", "tool", "assistant"]
+    assert tool_history(llm)[-1] == ("assistant", answer)
+
+
+def test_last_round_forbids_further_tool_calls(server):
+    server.tool_rounds = [[("look", "")], [("look", "")]]
+    runtime = ToolRuntime()
+    runtime.register("look", lambda: {"seen": "mushuk"})
+    llm = tool_llm(server, runtime)
+    llm.max_tool_rounds = 1
+
+    answer = " ".join(llm.generate_response("Qara"))
+    assert answer == server.answer
+    assert server.last_request["tool_choice"] == "none"
+    assert len(server.tool_rounds) == 1
+
+
+def test_cancel_while_tool_arguments_stream_runs_no_tool(server):
+    server.token_delay = 0.2
+    server.tool_rounds = [[("draw", '{"subject": "mushuk"}')]]
+    runtime = ToolRuntime()
+    calls = []
+    runtime.register("draw", lambda subject: calls.append(subject))
+    llm = tool_llm(server, runtime)
+
+    responses = llm.generate_response("Chiz")
+    threading.Timer(0.3, llm.cancel).start()
+    assert list(responses) == []
+    assert calls == []
+    assert tool_history(llm) == [("user", "Chiz")]
+
+
+def test_cancel_during_a_tool_skips_the_follow_up_request(server):
+    server.tool_rounds = [[("look", "")]]
+    runtime = ToolRuntime()
+    llms = []
+    runtime.register("look", lambda: llms[0].cancel() or {"seen": "mushuk"})
+    llm = tool_llm(server, runtime)
+    llms.append(llm)
+
+    assert list(llm.generate_response("Qara")) == []
+    assert server.requests == 1
+    # Выполненный вызов остается в истории, чтобы следующий ход знал о нем
+    assert tool_history(llm)[:3] == [("user", "Qara"), ("calls", [("look", "{}")]), ("tool", '{"seen": "mushuk"}')]
@@ -0,0 +1,102 @@
+import threading
+
+from src.modules.intelligence.memory import ConversationMemory, message_tokens
+
+
+def turn(n: int, text: str = "salom dunyo " * 5):
+    return [{"role": "user", "content": f"{n}: {text}"}, {"role": "assistant", "content": f"{n}: {text}"}]
+
+
+def turn_tokens(n: int) -> int:
+    return sum(message_tokens(m) for m in turn(n))
+
+
+def user_contents(prompt):
+    return [m["content"].split(":")[0] for m in prompt if m["role"] == "user"]
+
+
+def test_oldest_turns_are_evicted_down_to_the_budget():
+    system_tokens = message_tokens({"role": "system", "content": "system"})
+    memory = ConversationMemory("system", budget_tokens=system_tokens + 3 * turn_tokens(0), keep_last_turns=1)
+    for n in range(6):
+        memory.extend(turn(n))
+    prompt = memory.messages()
+    assert prompt[0] == {"role": "system", "content": "system"}
+    assert user_contents(prompt) == ["3", "4", "5"]
+    assert memory.last_prompt_tokens <= memory.budget_tokens
+
+
+def test_tool_messages_leave_together_with_their_turn():
+    memory = ConversationMemory("system", budget_tokens=1, keep_last_turns=1)
+    memory.append({"role": "user", "content": "rasm chiz"})
+    memory.append({"role": "assistant", "content": None,
+                   "tool_calls": [{"id": "1", "type": "function", "function": {"name": "draw", "arguments": "{}"}}]})
+    memory.append({"role": "tool", "tool_call_id": "1", "content": "{}"})
+    memory.extend(turn(1))
+    prompt = memory.messages()
+    assert [m["role"] for m in prompt] == ["system", "user", "assistant"]
+
+
+def test_budget_is_soft_for_the_last_turns():
+    memory = ConversationMemory("system", budget_tokens=10, keep_last_turns=2)
+    for n in range(3):
+        memory.extend(turn(n))
+    prompt = memory.messages()
+    assert user_contents(prompt) == ["1", "2"]
+    assert memory.last_prompt_tokens > memory.budget_tokens
+
+
+def test_evicted_turns_are_summarized_in_the_background():
+    release = threading.Event()
+    calls = []
+
+    def summarizer(previous, messages):
+        calls.append((previous, user_contents(messages)))
+        release.wait(1)
+        return f"summary {len(calls)}"
+
+    memory = ConversationMemory("system", budget_tokens=1, keep_last_turns=1, summarizer=summarizer)
+    memory.extend(turn(0))
+    memory.extend(turn(1))
+    prompt = memory.messages()  # не ждет суммаризатор
+    assert not release.is_set() and user_contents(prompt) == ["1"]
+    assert all("summary" not in m["content"] for m in prompt)
+
+    memory.extend(turn(2))
+    memory.messages()
+    release.set()
+    memory._summary_thread.join(1)
+    # Суммаризации идут по очереди, каждая продолжает предыдущую
+    assert calls == [("", ["0"]), ("summary 1", ["1"])]
+    prompt = memory.messages()
+    assert prompt[1]["role"] == "system" and prompt[1]["content"].endswith("summary 2")
+    assert prompt[0]["content"] == "system"
+
+
+def test_failed_summary_keeps_the_previous_one():
+    memory = ConversationMemory("system", budget_tokens=1, keep_last_turns=1,
+                                summarizer=lambda previous, messages: 1 / 0)
+    memory.summary = "earlier"
+    memory.extend(turn(0))
+    memory.extend(turn(1))
+    memory.messages()
+    memory._summary_thread.join(1)
+    assert memory.summary == "earlier"
+
+
+def test_reset_forgets_turns_and_a_pending_summary():
+    release = threading.Event()
+
+    def summarizer(previous, messages):
+        release.wait(1)
+        return "stale"
+
+    memory = ConversationMemory("system", budget_tokens=1, keep_last_turns=1, summarizer=summarizer)
+    memory.extend(turn(0))
+    memory.extend(turn(1))
+    memory.messages()
+    memory.reset()
+    release.set()
+    memory._summary_thread.join(1)
+    assert memory.summary == ""
+    assert memory.messages() == [{"role": "system", "content": "system"}]
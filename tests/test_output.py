@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+
+from src.modules.audio.output import EFFECT, FILLER, SPEECH, AudioOutput
+
+BLOCK = 10
+
+
+class ConstantStream:
+    """Stream source (like PCMPlayer) that outputs one value once started."""
+
+    def __init__(self, value: int):
+        self.value = value
+        self.started = False
+
+    def fill(self, out):
+        np.frombuffer(out, dtype=np.int16)[:] = self.value if self.started else 0
+
+
+@pytest.fixture
+def output(monkeypatch):
+    # 1 кГц, блок 10 сэмплов, рампа громкости на один блок; устройство не открываем
+    output = AudioOutput(sample_rate=1000, block_duration=0.01, duck_gain=0.5, ramp_ms=10)
+    monkeypatch.setattr(output, "open", lambda: None)
+    return output
+
+
+def block(output) -> np.ndarray:
+    out = bytearray(BLOCK * 2)
+    output._callback(out, BLOCK, None, None)
+    return np.frombuffer(bytes(out), dtype=np.int16)
+
+
+def test_clip_plays_to_the_end_and_resolves_true(output):
+    playback = output.play(np.arange(1, 16, dtype=np.int16))
+    np.testing.assert_array_equal(block(output), np.arange(1, 11))
+    np.testing.assert_array_equal(block(output), [11, 12, 13, 14, 15, 0, 0, 0, 0, 0])
+    assert playback.wait(1) is True
+    assert output._voices == ()
+
+
+def test_higher_priority_sound_ducks_lower_ones_with_a_ramp(output):
+    filler = output.play(np.full(1000, 1000, dtype=np.int16), FILLER)
+    speech = ConstantStream(100)
+    output.attach(speech, SPEECH)
+    assert (block(output) == 1000).all()  # поток еще не звучит - приглушать нечего
+
+    speech.started = True
+    ramp = block(output)
+    assert ramp[0] > ramp[-1] > 500 + 100 - 1  # плавно, без щелчка
+    assert (block(output) == 500 + 100).all()
+
+    speech.started = False
+    assert block(output)[-1] == 1000  # громкость вернулась
+    filler.cancel()
+
+
+def test_only_lower_priorities_are_ducked(output):
+    output.play(np.full(1000, 1000, dtype=np.int16), SPEECH)
+    output.play(np.full(1000, 10, dtype=np.int16), EFFECT)
+    block(output)
+    assert (block(output) == 1000 + 5).all()
+
+
+def test_stop_fades_out_and_resolves_false(output):
+    playback = output.play(np.full(1000, 1000, dtype=np.int16))
+    block(output)
+    playback.stop(fade_ms=20)
+    faded = np.concatenate([block(output), block(output)])
+    assert (np.diff(faded) <= 0).all() and faded[-1] == 0
+    assert playback.wait(1) is False
+
+
+def test_stop_all_keeps_streams_and_higher_priorities(output):
+    stream = output.attach(ConstantStream(1), SPEECH)
+    effect = output.play(np.full(1000, 10, dtype=np.int16), EFFECT)
+    speech_clip = output.play(np.full(1000, 100, dtype=np.int16), SPEECH)
+    output.stop_all(below=SPEECH)
+    block(output)
+    assert effect.wait(1) is False
+    assert not speech_clip.done and not stream.done
+
+
+def test_mix_is_clipped_to_int16(output):
+    output.play(np.full(100, 30000, dtype=np.int16), SPEECH)
+    output.play(np.full(100, 30000, dtype=np.int16), SPEECH)
+    assert (block(output) == 32767).all()
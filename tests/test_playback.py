@@ -0,0 +1,121 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from src.modules.audio.playback import PCMPlayer, PCMRing
+
+
+def test_ring_wraps_around():
+    ring = PCMRing(8)
+    out = bytearray(8)
+    ring.write(bytes(range(6)), lambda: False)
+    assert ring.read_into(memoryview(out)[:4]) == 4
+    ring.write(bytes(range(6, 12)), lambda: False)
+    assert len(ring) == 8
+    assert ring.read_into(memoryview(out)) == 8
+    assert bytes(out) == bytes(range(4, 12))
+
+
+def test_clear_from_another_thread_never_replays_old_data():
+    ring = PCMRing(4096)
+    stop = threading.Event()
+    seen = []
+
+    def consume():
+        out = bytearray(256)
+        while not stop.is_set():
+            n = ring.read_into(memoryview(out))
+            seen.append((len(ring), bytes(out[:n])))
+
+    consumer = threading.Thread(target=consume)
+    consumer.start()
+    for value in range(1, 50):
+        ring.write(bytes([value]) * 3000, lambda: False)
+        ring.clear()
+    ring.write(b"\xff" * 1000, lambda: False)
+    time.sleep(0.05)
+    stop.set()
+    consumer.join()
+
+    assert all(length >= 0 for length, _ in seen)
+    tail = b"".join(data for _, data in seen).rstrip(b"\xff")
+    assert b"\xff" not in tail  # после последнего clear звучат только новые данные
+    assert len(ring) == 0
+
+
+def test_clear_takes_effect_before_the_callback_runs():
+    ring = PCMRing(100)
+    ring.write(b"\x01" * 100, lambda: False)
+    ring.clear()
+    assert len(ring) == 0
+    done = threading.Event()
+    threading.Thread(target=lambda: (ring.write(b"\x02" * 50, lambda: False), done.set())).start()
+    assert not done.wait(0.05)  # место освободит только callback
+    out = bytearray(100)
+    assert ring.read_into(memoryview(out)) == 0
+    assert done.wait(1)
+    assert ring.read_into(memoryview(out)) == 50 and out[:50] == b"\x02" * 50
+
+
+def tone(seconds: float, value: int = 1000) -> bytes:
+    return np.full(int(seconds * 24000), value, dtype=np.int16).tobytes()
+
+
+def test_player_starts_after_prebuffer_and_drains(fake_output):
+    player = PCMPlayer(prebuffer=0.1, output=fake_output)
+    started = threading.Event()
+    player.begin(on_start=started.set)
+    player.write(tone(0.05))
+    assert not started.is_set()
+    player.write(tone(0.1))
+    assert started.is_set()
+    player.end()
+    assert player.wait(2)
+    assert len(fake_output.samples()) == int(0.15 * 24000)
+    assert player.underruns == 0
+
+
+def test_short_utterance_plays_on_end(fake_output):
+    player = PCMPlayer(prebuffer=0.5, output=fake_output)
+    player.begin()
+    player.write(tone(0.05))
+    assert not player.started
+    player.end()
+    assert player.wait(2)
+    assert len(fake_output.samples()) == int(0.05 * 24000)
+
+
+def test_zero_prebuffer_starts_on_the_first_write(fake_output):
+    player = PCMPlayer(prebuffer=0, output=fake_output)
+    player.begin()
+    player.write(tone(0.05))
+    assert player.started
+    player.end()
+    assert player.wait(2)
+
+
+def test_stop_silences_at_once_and_next_utterance_is_clean(fake_output):
+    player = PCMPlayer(prebuffer=0.02, output=fake_output)
+    player.begin()
+    player.write(tone(2.0, 111))
+    time.sleep(0.1)
+    player.stop()
+    assert player.wait(0)
+    time.sleep(0.1)
+    heard = len(fake_output.samples())
+    assert heard < 0.5 * 24000
+
+    player.begin()
+    player.write(tone(0.1, 222))
+    player.end()
+    assert player.wait(2)
+    samples = fake_output.samples()
+    assert len(samples) == heard + int(0.1 * 24000)
+    assert (samples[heard:] == 222).all()
+
+
+def test_output_format_must_match(fake_output):
+    with pytest.raises(ValueError):
+        PCMPlayer(sample_rate=16000, output=fake_output).open()
@@ -0,0 +1,97 @@
+import pytest
+
+from src.modules.intelligence.llm import BaseLLM, CachedLLM
+from src.modules.intelligence.memory import ConversationMemory
+from src.modules.intelligence.response_cache import ResponseCache, normalize, seed_sentences, split_answer
+
+SEEDS = "src/core/audio_files/response_cache.json"
+
+
+class EchoLLM(BaseLLM):
+    def __init__(self):
+        self.memory = ConversationMemory("system")
+        self.calls = 0
+
+    def generate_response(self, content, role="user"):
+        self.calls += 1
+        self.memory.append({"role": role, "content": content})
+        answer = f"Javob {self.calls}."
+        yield answer
+        self.memory.append({"role": "assistant", "content": answer})
+
+
+def test_normalize_ignores_case_punctuation_and_apostrophe_variants():
+    assert normalize("  Qo‘lingdan NIMA keladi?! ") == "qo'lingdan nima keladi"
+
+
+def test_lookup_tolerates_stt_noise_but_not_other_questions():
+    cache = ResponseCache()
+    cache.store("Sen kimsan?", ["Men Arifman."])
+    assert cache.lookup("sen kimsan").answer == "Men Arifman."
+    assert cache.lookup("Sen kimsa?") is not None
+    assert cache.lookup("Bugun havo qanday?") is None
+    assert cache.stats()["hits"] == 2
+
+
+def test_learned_entries_expire_and_are_evicted():
+    cache = ResponseCache(ttl=0, max_entries=2)
+    cache.store("birinchi savol", ["a"])
+    assert cache.lookup("birinchi savol") is None
+    cache = ResponseCache(max_entries=2)
+    cache.store("pinned savol", ["p"], pinned=True)
+    for question in ["ikkinchi savol", "uchinchi savol", "to'rtinchi savol"]:
+        cache.store(question, ["x"])
+    assert "pinned savol" in cache.entries
+    assert "ikkinchi savol" not in cache.entries
+
+
+def test_shipped_seeds_load_and_match():
+    cache = ResponseCache.load(SEEDS)
+    assert all(entry.pinned for entry in cache.entries.values())
+    assert cache.lookup("Isming nima") is not None
+    sentences = seed_sentences(SEEDS)
+    entry = cache.lookup("Sen kimsan?")
+    assert set(entry.chunks) <= set(sentences)
+    assert split_answer(entry.answer) == entry.chunks
+
+
+def test_cached_llm_does_not_learn_by_default():
+    llm = CachedLLM(EchoLLM(), ResponseCache())
+    list(llm.generate_response("Bugun qanday ko'rgazmalar bor?"))
+    assert not llm.cache.entries
+
+
+def test_cached_llm_learns_only_opening_questions():
+    inner = EchoLLM()
+    llm = CachedLLM(inner, ResponseCache(), learn=True)
+    list(llm.generate_response("Bugun qanday ko'rgazmalar bor?"))
+    assert llm.cache.lookup("bugun qanday ko'rgazmalar bor") is not None
+
+    # Ответ в середине разговора и короткие реплики не запоминаются
+    list(llm.generate_response("Ertaga-chi, ertaga nima bo'ladi?"))
+    inner.memory.reset()
+    list(llm.generate_response("Ha"))
+    assert llm.cache.lookup("Ertaga-chi, ertaga nima bo'ladi?") is None
+    assert llm.cache.lookup("ha.") is None
+
+
+def test_cache_hit_is_recorded_in_memory_without_calling_llm():
+    inner = EchoLLM()
+    cache = ResponseCache()
+    cache.store("Sen kimsan?", ["Men Arifman."])
+    llm = CachedLLM(inner, cache)
+    assert list(llm.generate_response("sen kimsan")) == ["Men Arifman."]
+    assert llm.last_hit is not None
+    assert inner.calls == 0
+    assert [m["role"] for turn in inner.memory.turns for m in turn] == ["user", "assistant"]
+
+
+@pytest.mark.parametrize("cancel", [True, False])
+def test_cancelled_answer_is_not_learned(cancel):
+    llm = CachedLLM(EchoLLM(), ResponseCache(), learn=True)
+    responses = llm.generate_response("Bugun qanday ko'rgazmalar bor?")
+    next(responses)
+    if cancel:
+        llm.cancel()
+    list(responses)
+    assert bool(llm.cache.entries) is not cancel
@@ -0,0 +1,115 @@
+import threading
+import time
+
+import pytest
+from openai import OpenAI
+
+from src.modules.intelligence.llm import ChatCompletionLLM
+from src.modules.intelligence.memory import ConversationMemory
+from src.modules.intelligence.mock_llm_server import MockLLMServer
+from src.modules.intelligence.router import RouterLLM
+from src.modules.intelligence.tools import ToolRuntime
+
+ANSWERS = {"a": "Men birinchi serverman. Javob tayyor.", "b": "Men ikkinchi serverman. Javob tayyor."}
+
+
+@pytest.fixture
+def servers():
+    servers = {name: MockLLMServer(port=0, answer=answer, first_token_delay=0.02, token_delay=0.01).start()
+               for name, answer in ANSWERS.items()}
+    yield servers
+    for server in servers.values():
+        server.shutdown()
+        server.server_close()
+
+
+def make_router(servers, **kwargs) -> RouterLLM:
+    memory = ConversationMemory("system")
+    backends = {name: ChatCompletionLLM(OpenAI(api_key="test", base_url=server.url, max_retries=0),
+                                        "mock", memory, [], ToolRuntime())
+                for name, server in servers.items()}
+    kwargs.setdefault("explore_every", 0)
+    return RouterLLM(backends, **kwargs)
+
+
+def history(router: RouterLLM):
+    return [(m["role"], m["content"]) for turn in router.memory.turns for m in turn]
+
+
+def answer(router: RouterLLM, content: str = "Salom") -> str:
+    return " ".join(router.generate_response(content))
+
+
+def test_fastest_backend_answers(servers):
+    router = make_router(servers)
+    assert answer(router) == ANSWERS["a"]
+    assert router.decisions[-1]["winner"] == "a"
+    assert history(router) == [("user", "Salom"), ("assistant", ANSWERS["a"])]
+
+
+def test_slow_backend_fails_over_after_the_deadline(servers):
+    servers["a"].first_token_delay = 0.6
+    router = make_router(servers, first_token_deadline=0.2)
+    started = time.perf_counter()
+    assert answer(router) == ANSWERS["b"]
+    assert time.perf_counter() - started < 0.6
+    assert router.decisions[-1]["failovers"] == ["a: timeout"]
+    time.sleep(0.6)  # опоздавший сервер не должен дописать свой ответ в историю
+    assert history(router) == [("user", "Salom"), ("assistant", ANSWERS["b"])]
+
+
+def test_backend_error_fails_over_at_once(servers):
+    servers["a"].status = 500
+    router = make_router(servers, first_token_deadline=5.0)
+    started = time.perf_counter()
+    assert answer(router) == ANSWERS["b"]
+    assert time.perf_counter() - started < 2.0
+    assert router.decisions[-1]["failovers"] == ["a: error"]
+    assert router.latency["a"].errors == 1
+
+
+def test_last_backend_is_not_cut_off_by_the_deadline(servers):
+    servers["a"].status = 500
+    servers["b"].first_token_delay = 0.4
+    router = make_router(servers, first_token_deadline=0.1)
+    assert answer(router) == ANSWERS["b"]
+    # Ошибка "a" может прийти и позже дедлайна - важно лишь, что "b" дождались
+    assert [f.split(":")[0] for f in router.decisions[-1]["failovers"]] == ["a"]
+
+
+def test_no_backend_answering_ends_the_turn_quietly(servers):
+    for server in servers.values():
+        server.status = 500
+    router = make_router(servers)
+    assert answer(router) == ""
+    assert router.decisions[-1]["winner"] is None
+
+
+def test_hedged_race_keeps_only_the_winner_in_memory(servers):
+    servers["a"].first_token_delay = 0.4
+    router = make_router(servers, hedge=True)
+    assert answer(router) == ANSWERS["b"]
+    assert router.decisions[-1]["hedged"]
+    time.sleep(0.5)
+    assert history(router) == [("user", "Salom"), ("assistant", ANSWERS["b"])]
+
+
+def test_cancel_while_waiting_for_the_first_token(servers):
+    for server in servers.values():
+        server.first_token_delay = 0.5
+    router = make_router(servers, hedge=True)
+    responses = router.generate_response("Salom")
+    threading.Timer(0.1, router.cancel).start()
+    assert list(responses) == []
+    time.sleep(0.6)
+    assert history(router) == [("user", "Salom")]
+
+
+def test_ranking_prefers_lower_ttft_and_explores_the_runner_up(servers):
+    router = make_router(servers, explore_every=2, min_samples=1)
+    router.latency["a"].record(0.9)
+    router.latency["b"].record(0.1)
+    router._turns = 1
+    assert router.ranking() == ["b", "a"]
+    router._turns = 2
+    assert router.ranking() == ["a", "b"]
@@ -0,0 +1,43 @@
+from src.modules.intelligence.segmenter import SentenceSegmenter
+
+
+def segment(deltas, **kwargs):
+    segmenter = SentenceSegmenter(**kwargs)
+    chunks = []
+    for delta in deltas:
+        chunks += segmenter.feed(delta)
+    rest = segmenter.flush()
+    return chunks + ([rest] if rest else [])
+
+
+def test_sentence_is_emitted_once_the_next_delta_confirms_it():
+    segmenter = SentenceSegmenter()
+    assert segmenter.feed("Salom, men Arifman.") == []
+    assert segmenter.feed(" Sizga") == ["Salom, men Arifman."]
+    assert segmenter.flush() == "Sizga"
+
+
+def test_abbreviations_decimals_initials_and_numbers_do_not_split():
+    text = "Narxi 3.5 mln. so'm, ya'ni taxminan. A. Navoiy 15. avgust kuni keldi. Tamom bo'ldi!"
+    assert segment(text) == [
+        "Narxi 3.5 mln. so'm, ya'ni taxminan.",
+        "A. Navoiy 15. avgust kuni keldi.",
+        "Tamom bo'ldi!",
+    ]
+
+
+def test_token_by_token_stream_matches_whole_text():
+    text = "Bugun havo yaxshi bo'ladi. Ertaga esa yomg'ir yog'ishi mumkin! Soyabon oling."
+    assert segment(list(text)) == segment([text])
+
+
+def test_short_sentences_are_merged():
+    assert segment(["Ha. Albatta, bu mumkin."]) == ["Ha. Albatta, bu mumkin."]
+
+
+def test_long_sentence_is_split_at_a_clause_boundary():
+    text = "Bu juda uzun gap, unda vergullar bor, lekin nuqta hali yo'q va u davom etmoqda"
+    chunks = segment([text], max_chars=40)
+    assert all(len(chunk) <= 40 for chunk in chunks)
+    assert chunks[0].endswith(",")
+    assert " ".join(chunks) == text
@@ -0,0 +1,29 @@
+from types import SimpleNamespace
+
+import pytest
+
+from src.core.assistant import Assistant
+from src.modules.web_interface.static import api
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(api, "stats_sources", {})
+    return api.app.test_client()
+
+
+def test_stats_lists_registered_sources_and_survives_failing_ones(client):
+    api.register_stats_source("llm", lambda: {"wins": {"openai": 3}})
+    api.register_stats_source("broken", lambda: 1 / 0)
+    stats = client.get("/stats").get_json()
+    assert stats["llm"] == {"wins": {"openai": 3}}
+    assert "error" in stats["broken"]
+
+
+def test_assistant_registers_its_components(client):
+    component = SimpleNamespace(stats=lambda: {"ok": True})
+    assistant = SimpleNamespace(stt=component, llm=component, tts=SimpleNamespace(), tts_pipeline=component,
+                                filler=component, energy_gate=component)
+    Assistant.register_stats(assistant)
+    stats = client.get("/stats").get_json()
+    assert set(stats) == {"stt", "llm", "tts_pipeline", "filler", "energy_gate"}
@@ -0,0 +1,162 @@
+import asyncio
+import concurrent.futures
+
+import httpx
+import numpy as np
+import pytest
+
+from src.modules.audio.audio_data import AudioData
+from src.modules.audio.mock_stt_server import MockSTTServer
+from src.modules.audio.stt import BaseSTT, ChunkedHTTPSTT, HedgedSTT, STTEngine, UzbekVoiceSTT
+from src.utils.async_runner import get_runner
+from src.utils.http import HTTPTransport
+
+AUDIO = AudioData(np.zeros(1600, dtype=np.int16), 16000)
+
+
+class ScriptedSTT(BaseSTT):
+    def __init__(self, name: str, delay: float = 0.0, text: str = "Salom", error: Exception = None):
+        self.name = name
+        self.delay = delay
+        self.text = text
+        self.error = error
+        self.calls = 0
+        self.cancelled = False
+
+    async def transcribe(self, audio):
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        if self.error is not None:
+            raise self.error
+        return self.text
+
+
+def _run(stt: BaseSTT) -> str:
+    return get_runner().run(stt.transcribe(AUDIO), timeout=5)
+
+
+def test_fast_primary_is_never_hedged():
+    primary, backup = ScriptedSTT("primary", 0.01, "birinchi"), ScriptedSTT("backup", 0.0, "ikkinchi")
+    hedged = HedgedSTT([primary, backup], hedge_delay=0.5)
+    assert _run(hedged) == "birinchi"
+    assert backup.calls == 0
+    assert hedged.wins == {"primary": 1, "backup": 0}
+
+
+def test_slow_primary_is_hedged_and_cancelled():
+    primary, backup = ScriptedSTT("primary", 2.0, "birinchi"), ScriptedSTT("backup", 0.01, "ikkinchi")
+    hedged = HedgedSTT([primary, backup], hedge_delay=0.05)
+    assert _run(hedged) == "ikkinchi"
+    get_runner().run(asyncio.sleep(0.05), timeout=1)  # даем отмене дойти до задачи
+    assert primary.cancelled
+    assert hedged.wins["backup"] == 1
+
+
+@pytest.mark.parametrize("error", [ConnectionError("reset"), ValueError("bad json")])
+def test_failed_primary_falls_back_without_waiting_for_the_delay(error):
+    primary = ScriptedSTT("primary", error=error)
+    backup = ScriptedSTT("backup", text="ikkinchi")
+    hedged = HedgedSTT([primary, backup], hedge_delay=3.0)
+    loop_time = get_runner().loop.time
+    started = loop_time()
+    assert _run(hedged) == "ikkinchi"
+    assert loop_time() - started < 1.0
+    assert hedged.latency["primary"].errors == 1
+
+
+def test_error_looking_transcript_is_an_ordinary_result():
+    primary = ScriptedSTT("primary", text="Request failed deb aytdim")
+    hedged = HedgedSTT([primary, ScriptedSTT("backup", text="ikkinchi")], hedge_delay=1.0)
+    assert _run(hedged) == "Request failed deb aytdim"
+
+
+def test_all_providers_failing_raises_the_last_error():
+    hedged = HedgedSTT([ScriptedSTT("a", error=ValueError("x")),
+                        ScriptedSTT("b", delay=0.05, error=ConnectionError("reset"))],
+                       hedge_delay=0)
+    with pytest.raises(ConnectionError):
+        _run(hedged)
+    assert hedged.wins == {"a": 0, "b": 0}
+
+
+def test_adaptive_delay_follows_primary_p95():
+    hedged = HedgedSTT([ScriptedSTT("primary"), ScriptedSTT("backup")], default_delay=1.0, min_samples=3)
+    assert hedged.hedge_delay() == 1.0
+    for seconds in (0.4, 0.5, 0.6):
+        hedged.latency["primary"].record(seconds)
+    assert 0.5 < hedged.hedge_delay() <= 0.6
+    for _ in range(10):
+        hedged.latency["primary"].record(10.0)
+    assert hedged.hedge_delay() == hedged.max_delay
+
+
+@pytest.fixture
+def server():
+    server = MockSTTServer(port=0, transcript="Salom dunyo").start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_chunked_stream_uploads_while_feeding(server):
+    transport = HTTPTransport()
+    stt = ChunkedHTTPSTT(server.url, chunk_duration=0.1, transport=transport)
+    stream = stt.open_stream(16000)
+    audio = np.arange(16000, dtype=np.int16)
+    for start in range(0, len(audio), 512):
+        stream.feed(audio[start:start + 512])
+    assert len(stream._pending) < stream.chunk_size
+    future = STTEngine(stt, deadline=5).finish(stream, AudioData(audio, 16000))
+    assert future.result(5) == "Salom dunyo"
+    transport.close()
+
+
+def test_chunked_stream_raises_on_server_errors(server):
+    server.status = 500
+    transport = HTTPTransport(retries=0)
+    stt = ChunkedHTTPSTT(server.url, transport=transport)
+    stream = stt.open_stream(16000)
+    stream.feed(np.zeros(8000, dtype=np.int16))
+    with pytest.raises(httpx.HTTPStatusError):
+        STTEngine(stt, deadline=5).finish(stream, AUDIO).result(5)
+    with pytest.raises(httpx.HTTPStatusError):
+        _run(stt)
+    transport.close()
+
+
+def test_deadline_cancels_the_upload(server):
+    server.delay = 2.0
+    transport = HTTPTransport()
+    stt = ChunkedHTTPSTT(server.url, transport=transport)
+    stream = stt.open_stream(16000)
+    stream.feed(np.zeros(8000, dtype=np.int16))
+    with pytest.raises((asyncio.TimeoutError, concurrent.futures.TimeoutError)):
+        STTEngine(stt, deadline=0.1).finish(stream, AUDIO).result(5)
+    assert stream._upload.cancelled()
+    stream.feed(np.zeros(8000, dtype=np.int16))
+    assert not stream._pending
+    transport.close()
+
+
+def test_whole_utterance_transcribe(server):
+    transport = HTTPTransport()
+    assert _run(ChunkedHTTPSTT(server.url, transport=transport)) == "Salom dunyo"
+    transport.close()
+
+
+def test_construction_stays_offline_until_warm_up(server):
+    transport = HTTPTransport()
+    UzbekVoiceSTT(transport=transport)
+    stt = HedgedSTT([ChunkedHTTPSTT(server.url, transport=transport)])
+    assert transport._async_client is None
+
+    stt.warm_up()
+    get_runner().run(asyncio.sleep(0.2), timeout=1)
+    client = transport._async_client
+    assert client is not None
+    stt.close()
+    assert client.is_closed
@@ -0,0 +1,71 @@
+import json
+import threading
+import time
+
+from src.modules.intelligence.tools import ToolResult, ToolRuntime
+
+
+def contents(messages):
+    return [json.loads(m["content"]) for m in messages]
+
+
+def test_calls_run_concurrently_and_keep_their_order():
+    runtime = ToolRuntime()
+    runtime.register("slow", lambda value: time.sleep(0.2) or {"value": value})
+    started = time.perf_counter()
+    messages = runtime.run([("1", "slow", '{"value": 1}'), ("2", "slow", '{"value": 2}')])
+    assert time.perf_counter() - started < 0.35
+    assert contents(messages) == [{"value": 1}, {"value": 2}]
+    assert [m["tool_call_id"] for m in messages] == ["1", "2"]
+
+
+def test_timeout_becomes_an_error_without_waiting_for_the_tool():
+    runtime = ToolRuntime()
+    runtime.register("hang", lambda: time.sleep(1.0), timeout=0.1)
+    runtime.register("quick", lambda: "ok")
+    started = time.perf_counter()
+    messages = runtime.run([("1", "hang", ""), ("2", "quick", "{}")])
+    assert time.perf_counter() - started < 0.5
+    assert contents(messages[:1]) == [{"error": "timeout"}]
+    assert messages[1]["content"] == "ok"
+
+
+def test_exceptions_bad_arguments_and_unknown_tools_become_errors():
+    runtime = ToolRuntime()
+
+    def divide(a, b):
+        return a / b
+    runtime.register("divide", divide)
+    messages = runtime.run([("1", "divide", '{"a": 1, "b": 0}'), ("2", "divide", '{"a": 1'),
+                            ("3", "missing", "{}")])
+    errors = [content["error"] for content in contents(messages)]
+    assert errors[0] == "division by zero"
+    assert errors[1]  # недописанный JSON от модели
+    assert errors[2] == "unknown tool missing"
+
+
+def test_background_side_effects_run_after_the_result_one_at_a_time():
+    runtime = ToolRuntime()
+    running = []
+    overlaps = []
+    done = threading.Event()
+
+    def animation():
+        running.append(1)
+        overlaps.append(len(running) > 1)
+        time.sleep(0.1)
+        running.pop()
+
+    def failing():
+        raise RuntimeError("serial port closed")
+
+    runtime.register("draw", lambda: ToolResult('{"result": "drawing started"}', background=animation))
+    runtime.register("broken", lambda: ToolResult("{}", background=failing))
+    runtime.register("last", lambda: ToolResult("{}", background=done.set))
+    started = time.perf_counter()
+    messages = runtime.run([("1", "draw", ""), ("2", "draw", ""), ("3", "broken", "")])
+    assert time.perf_counter() - started < 0.1  # ответ не ждет анимаций
+    assert contents(messages)[0] == {"result": "drawing started"}
+    runtime.run([("4", "last", "")])
+    assert done.wait(1)  # ошибка фонового эффекта не останавливает очередь
+    assert overlaps == [False, False]
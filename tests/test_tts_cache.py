@@ -0,0 +1,117 @@
+import json
+import threading
+
+import numpy as np
+import pytest
+
+from src.modules.audio.mock_azure import MockAudioDataStream, MockSynthesizer
+from src.modules.audio.playback import PCMPlayer
+from src.modules.audio.tts import AzureTTS, BaseTTS
+from src.modules.audio.tts_cache import CachedTTS, TTSCache, cache_key
+
+
+class ToneTTS(BaseTTS):
+    def __init__(self):
+        self.rendered = []
+
+    def synthesize(self, text):
+        self.last_pcm = b"".join(self.stream_pcm(text))
+
+    def stream_pcm(self, text):
+        self.rendered.append(text)
+        samples = np.full(480, len(text), dtype=np.int16).tobytes()
+        yield samples[:480]
+        yield samples[480:]
+
+
+def test_concurrent_puts_keep_every_entry(tmp_path):
+    cache = TTSCache(str(tmp_path))
+    errors = []
+
+    def put(i):
+        try:
+            cache.put(f"key{i % 4}", b"\x01\x00" * (100 + i), 24000, f"phrase {i}")
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=put, args=(i,)) for i in range(32)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    with open(tmp_path / "index.json", encoding="utf-8") as f:
+        assert sorted(json.load(f)) == ["key0", "key1", "key2", "key3"]
+    assert not list(tmp_path.glob("*.tmp"))
+    assert TTSCache(str(tmp_path)).entries.keys() == cache.entries.keys()
+
+
+def test_corrupt_index_starts_empty(tmp_path):
+    (tmp_path / "index.json").write_text("{not json", encoding="utf-8")
+    cache = TTSCache(str(tmp_path))
+    assert len(cache.entries) == 0
+    cache.put("key", b"\x01\x00" * 10, 24000)
+    assert TTSCache(str(tmp_path)).get("key") is not None
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = TTSCache(str(tmp_path), max_bytes=250)
+    cache.put("old", b"\x00" * 100, 24000)
+    cache.put("used", b"\x00" * 100, 24000)
+    assert cache.get("old") is not None
+    cache.put("new", b"\x00" * 100, 24000)
+    assert list(cache.entries) == ["old", "new"]
+    assert not (tmp_path / "used.pcm").exists()
+
+
+def test_cached_tts_stores_only_complete_streams(tmp_path):
+    tts = ToneTTS()
+    cached = CachedTTS(tts, TTSCache(str(tmp_path)))
+    key = cache_key(cached.cache_params(), "Salom")
+
+    stream = cached.stream_pcm("Salom")
+    next(stream)
+    stream.close()
+    assert key not in cached.cache.entries
+
+    first = b"".join(cached.stream_pcm("Salom"))
+    second = b"".join(bytes(chunk) for chunk in cached.stream_pcm("Salom"))
+    assert first == second
+    assert tts.rendered == ["Salom", "Salom"]
+    assert cached.stats()["hits"] == 1
+
+
+def test_render_stopped_midway_is_not_cached(tmp_path):
+    cached = CachedTTS(ToneTTS(), TTSCache(str(tmp_path)))
+    stream = cached.stream_pcm("Salom")
+    next(stream)
+    cached.stop()
+    assert len(b"".join(stream)) == 480  # остаток фразы еще отдается
+    assert len(cached.cache.entries) == 0
+
+
+@pytest.fixture
+def azure(fake_output, monkeypatch, tmp_path):
+    monkeypatch.setattr("sys.argv", ["test"])
+    tts = AzureTTS(MockSynthesizer(first_chunk_delay=0.0, chunk_delay=0.05, duration=2.0),
+                   audio_stream=MockAudioDataStream, player=PCMPlayer(output=fake_output))
+    return CachedTTS(tts, TTSCache(str(tmp_path)))
+
+
+def test_interrupted_azure_stream_is_not_cached(azure):
+    stream = azure.stream_pcm("Uzun javob")
+    next(stream)
+    threading.Timer(0.1, azure.stop).start()
+    with pytest.raises(RuntimeError, match="canceled"):
+        list(stream)
+    assert len(azure.cache.entries) == 0
+
+    assert len(b"".join(azure.stream_pcm("Uzun javob"))) == 4 * azure.sample_rate
+    assert [entry["size"] for entry in azure.cache.entries.values()] == [4 * azure.sample_rate]
+
+
+def test_interrupted_azure_playback_is_not_cached(azure):
+    threading.Timer(0.2, azure.stop).start()
+    azure.synthesize("Uzun javob")
+    assert len(azure.cache.entries) == 0
@@ -0,0 +1,95 @@
+import threading
+import time
+
+import numpy as np
+
+from src.modules.audio.playback import PCMPlayer
+from src.modules.audio.tts import BaseTTS
+from src.modules.audio.tts_pipeline import TTSPipeline
+
+
+class NumberTTS(BaseTTS):
+    """Renders sentence "n" as ``duration`` seconds of samples equal to n, after ``delays[n]``."""
+
+    def __init__(self, delays=None, duration: float = 0.1, fail=()):
+        self.delays = delays or {}
+        self.duration = duration
+        self.fail = fail
+        self.rendering = set()
+        self.overlapped = False
+
+    def synthesize(self, text):
+        pass
+
+    def stream_pcm(self, text):
+        n = int(text)
+        self.rendering.add(n)
+        self.overlapped |= len(self.rendering) > 1
+        try:
+            time.sleep(self.delays.get(n, 0.0))
+            if n in self.fail:
+                raise ConnectionError("render failed")
+            samples = np.full(int(self.duration * self.sample_rate), n, dtype=np.int16)
+            for chunk in np.array_split(samples, 4):
+                yield chunk.tobytes()
+        finally:
+            self.rendering.discard(n)
+
+
+def make_pipeline(tts, output, lookahead: int = 2) -> TTSPipeline:
+    return TTSPipeline(tts, PCMPlayer(output=output, prebuffer=0.02), lookahead=lookahead)
+
+
+def played_order(output):
+    samples = output.samples()
+    return [int(v) for i, v in enumerate(samples) if i == 0 or samples[i - 1] != v]
+
+
+def test_sentences_play_in_submission_order_while_later_ones_render(fake_output):
+    tts = NumberTTS(delays={1: 0.15, 2: 0.05, 3: 0.0})
+    pipeline = make_pipeline(tts, fake_output)
+    pipeline.begin()
+    for n in (1, 2, 3):
+        pipeline.submit(str(n))
+    assert pipeline.finish()
+    assert played_order(fake_output) == [1, 2, 3]
+    assert tts.overlapped
+    assert len(pipeline.last_gaps) == 2  # паузы между соседними предложениями
+
+
+def test_failed_sentence_is_skipped(fake_output):
+    pipeline = make_pipeline(NumberTTS(fail={2}), fake_output)
+    pipeline.begin()
+    for n in (1, 2, 3):
+        pipeline.submit(str(n))
+    assert pipeline.finish()
+    assert played_order(fake_output) == [1, 3]
+
+
+def test_submit_blocks_beyond_lookahead(fake_output):
+    pipeline = make_pipeline(NumberTTS(delays={1: 0.3}), fake_output, lookahead=1)
+    pipeline.begin()
+    started = time.perf_counter()
+    for n in (1, 2, 3):
+        pipeline.submit(str(n))
+    assert time.perf_counter() - started > 0.2
+    assert pipeline.finish()
+    assert played_order(fake_output) == [1, 2, 3]
+
+
+def test_cancel_stops_playback_and_unblocks_submit(fake_output):
+    pipeline = make_pipeline(NumberTTS(duration=1.0), fake_output, lookahead=1)
+    pipeline.begin()
+    threading.Timer(0.2, pipeline.cancel).start()
+    started = time.perf_counter()
+    for n in range(1, 6):
+        pipeline.submit(str(n))
+    assert not pipeline.finish()
+    assert time.perf_counter() - started < 1.0
+    assert played_order(fake_output) == [1]
+
+    # Следующий ответ начинается с чистого листа
+    pipeline.begin()
+    pipeline.submit("7")
+    assert pipeline.finish()
+    assert played_order(fake_output)[-1] == 7